@@ -0,0 +1,13 @@
+def get_user_authorization(request, repository):
+    """
+    Resolve the request user authorization in repository once per request,
+    sharing it between permissions, filters, validators and serializers.
+    """
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, '_repository_authorizations'):
+        http_request._repository_authorizations = {}
+    cache = http_request._repository_authorizations
+    key = (request.user.pk, repository.pk,)
+    if key not in cache:
+        cache[key] = repository.get_user_authorization(request.user)
+    return cache[key]
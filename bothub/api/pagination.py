@@ -0,0 +1,120 @@
+import base64
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_estimated_count(queryset):
+    """
+    Rows count estimated by the PostgreSQL planner, other databases count
+    the rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) {}'.format(sql), params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0].get('Plan').get('Plan Rows'))
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination by default. Sending the cursor parameter, empty
+    for the first page, switches to a keyset pagination on (created_at, id)
+    that fetches any page in constant time and skips the count, unless
+    count=estimated asks for an estimated one.
+    """
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    count_estimated = 'estimated'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = self.cursor_query_param in request.query_params
+        if not self.cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        position = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param))
+
+        descending = self.is_descending(queryset)
+        queryset = queryset.order_by(
+            *(['-created_at', '-id'] if descending else ['created_at', 'id']))
+        self.count = None
+        if request.query_params.get(self.count_query_param) == \
+                self.count_estimated:
+            self.count = get_estimated_count(queryset)
+
+        if position:
+            lookup = 'lt' if descending else 'gt'
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(**{'created_at__{}'.format(lookup): created_at}) |
+                Q(created_at=created_at, **{'id__{}'.format(lookup): pk}))
+
+        results = list(queryset[:self.limit + 1])
+        self.next_position = None
+        if len(results) > self.limit:
+            results = results[:self.limit]
+            self.next_position = (results[-1].created_at, results[-1].pk,)
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.cursor:
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.cursor:
+            return super().get_next_link()
+        if not self.next_position:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position))
+
+    def is_descending(self, queryset):
+        ordering = queryset.query.order_by or \
+            queryset.model._meta.ordering or ['-created_at']
+        return ordering[0] != 'created_at'
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        return base64.urlsafe_b64encode('{}|{}'.format(
+            created_at.isoformat(),
+            pk).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(
+                cursor.encode('ascii')).decode('utf-8').split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(_('Invalid cursor'))
+        if not created_at:
+            raise NotFound(_('Invalid cursor'))
+        return (created_at, pk,)
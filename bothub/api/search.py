@@ -0,0 +1,21 @@
+from django.db import connections
+from rest_framework.filters import SearchFilter
+
+from bothub.common.search import get_search_backend
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Search the model SEARCH_FIELDS with the database search backend,
+    best ranked results first.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        if not text.split():
+            return queryset
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        queryset = get_search_backend(connections[queryset.db]).search(
+            queryset,
+            text)
+        return queryset.order_by('-search_rank', *ordering)
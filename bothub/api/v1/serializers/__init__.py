@@ -3,6 +3,8 @@ from .repository import (  # noqa: F401
     RepositorySerializer,
     RepositoryAuthorizationSerializer,
     AnalyzeTextSerializer,
+    AnalyzeTextBatchSerializer,
+    ExportExamplesSerializer,
     EditRepositorySerializer,
     VoteSerializer,
     RepositoryAuthorizationRoleSerializer,
@@ -18,11 +20,13 @@ from .example import (  # noqa: F401
     NewRepositoryExampleSerializer,
     NewRepositoryExampleEntitySerializer,
     RepositoryEntitySerializer,
+    ImportExamplesSerializer,
 )
 from .translate import (  # noqa: F401
     RepositoryTranslatedExampleEntitySeralizer,
     RepositoryTranslatedExampleSerializer,
     NewRepositoryTranslatedExampleSerializer,
+    ImportTranslationsSerializer,
 )
 
 from .user import (  # noqa: F401
@@ -42,4 +46,5 @@ from .request import (  # noqa: F401
 
 from .update import (  # noqa: F401
     RepositoryUpdateSerializer,
+    TrainingJobSerializer,
 )
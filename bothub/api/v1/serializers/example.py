@@ -2,13 +2,16 @@ from rest_framework import serializers
 from rest_framework.fields import empty
 
 from django.utils.translation import gettext as _
+from django.conf import settings
 
 from bothub.common.models import Repository
 from bothub.common.models import RepositoryExample
 from bothub.common.models import RepositoryExampleEntity
 from bothub.common.models import RepositoryEntity
 from bothub.common.models import RepositoryEntityLabel
+from bothub.common.models import RepositoryStats
 from bothub.common import languages
+from bothub.common.importer import ExamplesImporter
 
 from ..fields import EntityText
 from ..fields import EntityValueField
@@ -168,16 +171,96 @@ class NewRepositoryExampleSerializer(serializers.ModelSerializer):
             language = None
         repository_update = repository.current_update(language or None)
         validated_data.update({'repository_update': repository_update})
-        example = self.Meta.model.objects.create(**validated_data)
-        for entity_data in entities_data:
-            entity_data.update({'repository_example': example.pk})
-            entity_serializer = NewRepositoryExampleEntitySerializer(
-                data=entity_data)
-            entity_serializer.is_valid(raise_exception=True)
-            entity_serializer.save()
+        # the example and its entities refresh the stats once
+        with RepositoryStats.deferred():
+            example = self.Meta.model.objects.create(**validated_data)
+            # resolve every entity and label at once, entities created
+            # below read them from the values cache
+            RepositoryEntity.objects.resolve_many(
+                repository,
+                map(lambda x: x.get('entity'), entities_data))
+            RepositoryEntityLabel.objects.resolve_many(
+                repository,
+                filter(None, map(lambda x: x.get('label'), entities_data)))
+            for entity_data in entities_data:
+                entity_data.update({'repository_example': example.pk})
+                entity_serializer = NewRepositoryExampleEntitySerializer(
+                    data=entity_data)
+                entity_serializer.is_valid(raise_exception=True)
+                entity_serializer.save()
         return example
 
 
+class ImportExampleEntitySerializer(serializers.Serializer):
+    start = serializers.IntegerField(min_value=0)
+    end = serializers.IntegerField(min_value=0)
+    entity = EntityValueField()
+    label = LabelValueField(
+        allow_blank=True,
+        required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.validators.append(EntityNotEqualLabelValidator())
+
+
+class ImportExampleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RepositoryExample
+        fields = [
+            'text',
+            'language',
+            'intent',
+            'entities',
+        ]
+
+    language = serializers.ChoiceField(
+        languages.LANGUAGE_CHOICES,
+        allow_blank=True,
+        required=False)
+    entities = ImportExampleEntitySerializer(
+        many=True,
+        required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.validators.append(ExampleWithIntentOrEntityValidator())
+
+    def validate(self, attrs):
+        text = attrs.get('text')
+        for entity in attrs.get('entities', []):
+            if not entity.get('start') <= entity.get('end') <= len(text):
+                raise serializers.ValidationError({'entities': _(
+                    'Entity {} is out of the text bounds.').format(
+                        entity.get('entity'))})
+        return attrs
+
+
+class ImportExamplesSerializer(serializers.Serializer):
+    examples = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=settings.BOTHUB_IMPORT_EXAMPLES_MAX)
+
+    def validate_examples(self, value):
+        errors = {}
+        validated = []
+        for index, example in enumerate(value):
+            serializer = ImportExampleSerializer(data=example)
+            if serializer.is_valid():
+                validated.append(serializer.validated_data)
+            else:
+                errors[index] = serializer.errors
+        if errors:
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def create(self, validated_data):
+        repository = self.context.get('repository')
+        return ExamplesImporter(repository).import_examples(
+            validated_data.get('examples'))
+
+
 class RepositoryEntitySerializer(serializers.ModelSerializer):
     class Meta:
         model = RepositoryEntity
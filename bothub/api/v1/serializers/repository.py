@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 from django.utils.translation import gettext as _
+from django.conf import settings
 
 from bothub.common.models import Repository
 from bothub.common.models import RepositoryCategory
@@ -8,6 +9,7 @@ from bothub.common.models import RepositoryAuthorization
 from bothub.common.models import RepositoryVote
 from bothub.common.models import RequestRepositoryAuthorization
 from bothub.common.languages import LANGUAGE_CHOICES
+from bothub.api.authorization import get_user_authorization
 
 from ..fields import ModelMultipleChoiceField
 from ..fields import TextField
@@ -93,39 +95,70 @@ class RepositorySerializer(serializers.ModelSerializer):
         source='owner',
         slug_field='nickname',
         read_only=True)
+    available_languages = serializers.ReadOnlyField(
+        source='stats.available_languages')
     categories_list = serializers.SerializerMethodField()
-    entities = serializers.SerializerMethodField()
-    labels = RepositoryEntityLabelSerializer(many=True)
-    labels_list = serializers.SerializerMethodField()
+    intents = serializers.ReadOnlyField(source='stats.intents')
+    entities = serializers.ReadOnlyField(source='stats.entities')
+    labels = serializers.SerializerMethodField()
+    labels_list = serializers.ReadOnlyField(source='stats.labels')
     authorization = serializers.SerializerMethodField()
     examples__count = serializers.SerializerMethodField()
     request_authorization = serializers.SerializerMethodField()
     available_request_authorization = serializers.SerializerMethodField()
+    votes_sum = serializers.ReadOnlyField(source='stats.votes_sum')
+    ready_for_train = serializers.SerializerMethodField()
+    requirements_to_train = serializers.SerializerMethodField()
+    languages_ready_for_train = serializers.SerializerMethodField()
+    languages_warnings = serializers.SerializerMethodField()
+
+    def get_training_readiness(self, obj):
+        if not hasattr(self, '_training_readiness'):
+            self._training_readiness = {}
+        if obj.pk not in self._training_readiness:
+            self._training_readiness[obj.pk] = obj.get_training_readiness()
+        return self._training_readiness[obj.pk]
+
+    def get_ready_for_train(self, obj):
+        return self.get_training_readiness(obj).ready_for_train
+
+    def get_requirements_to_train(self, obj):
+        return self.get_training_readiness(obj).requirements_to_train
+
+    def get_languages_ready_for_train(self, obj):
+        return self.get_training_readiness(obj).languages_ready_for_train
+
+    def get_languages_warnings(self, obj):
+        return self.get_training_readiness(obj).languages_warnings
+
+    def get_labels(self, obj):
+        labels = list(obj.labels.prefetch_related('entities'))
+        # every label is of this repository, its owner is already loaded
+        for label in labels:
+            label.repository = obj
+        return RepositoryEntityLabelSerializer(labels, many=True).data
 
     def get_categories_list(self, obj):
         return RepositoryCategorySerializer(obj.categories, many=True).data
 
-    def get_entities(self, obj):
-        return list(obj.entities_list)
-
-    def get_labels_list(self, obj):
-        return list(obj.labels_list)
-
     def get_authorization(self, obj):
         request = self.context.get('request')
         if not request:
             return None  # pragma: no cover
-        return RepositoryAuthorizationSerializer(
-            obj.get_user_authorization(request.user)).data
+        authorization = get_user_authorization(request, obj)
+        # users without a role have no stored authorization nor token
+        if authorization.uuid is None:
+            return None
+        return RepositoryAuthorizationSerializer(authorization).data
 
     def get_examples__count(self, obj):
-        return obj.examples().count()
+        return obj.stats.examples_count
 
     def get_available_request_authorization(self, obj):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        authorization = obj.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, obj)
         if authorization.role is not RepositoryAuthorization.ROLE_NOT_SETTED:
             return False
         if authorization.is_owner:
@@ -180,6 +213,24 @@ class AnalyzeTextSerializer(serializers.Serializer):
     text = serializers.CharField(allow_blank=False)
 
 
+class AnalyzeTextBatchSerializer(serializers.Serializer):
+    language = serializers.ChoiceField(LANGUAGE_CHOICES, required=True)
+    texts = serializers.ListField(
+        child=serializers.CharField(allow_blank=False),
+        min_length=1,
+        max_length=settings.BOTHUB_NLP_ANALYZE_BATCH_MAX_TEXTS)
+
+
+class ExportExamplesSerializer(serializers.Serializer):
+    FORMAT_NDJSON = 'ndjson'
+    FORMAT_CSV = 'csv'
+
+    language = serializers.ChoiceField(LANGUAGE_CHOICES, required=False)
+    file_format = serializers.ChoiceField(
+        [FORMAT_NDJSON, FORMAT_CSV],
+        default=FORMAT_NDJSON)
+
+
 class VoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = RepositoryVote
@@ -1,11 +1,14 @@
 from rest_framework import serializers
 
 from django.utils.translation import gettext as _
+from django.conf import settings
 
 from bothub.common.models import RepositoryTranslatedExampleEntity
 from bothub.common.models import RepositoryTranslatedExample
 from bothub.common.models import RepositoryExample
+from bothub.common.models import RepositoryEntity
 from bothub.common.languages import LANGUAGE_CHOICES
+from bothub.common.importer import TranslationsImporter
 
 from ..fields import EntityValueField
 from ..validators import CanContributeInRepositoryTranslatedExampleValidator
@@ -127,8 +130,95 @@ class NewRepositoryTranslatedExampleSerializer(serializers.ModelSerializer):
         entities_data = validated_data.pop('entities')
 
         translated = self.Meta.model.objects.create(**validated_data)
+        RepositoryEntity.objects.resolve_many(
+            translated.repository_update.repository_id,
+            map(lambda x: x.get('entity'), entities_data))
         for entity_data in entities_data:
             RepositoryTranslatedExampleEntity.objects.create(
                 repository_translated_example=translated,
                 **entity_data)
         return translated
+
+
+class ImportTranslationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RepositoryTranslatedExample
+        fields = [
+            'original_example',
+            'language',
+            'text',
+            'entities',
+        ]
+        # uniqueness is checked for the whole batch with one query
+        validators = []
+
+    original_example = serializers.IntegerField(
+        help_text=_('Example\'s ID'))
+    language = serializers.ChoiceField(
+        LANGUAGE_CHOICES,
+        label=_('Language'))
+    entities = NewRepositoryTranslatedExampleEntitySeralizer(
+        many=True,
+        required=False)
+
+    def validate(self, attrs):
+        text = attrs.get('text')
+        attrs.setdefault('entities', [])
+        for entity in attrs.get('entities'):
+            if not entity.get('start') <= entity.get('end') <= len(text):
+                raise serializers.ValidationError({'entities': _(
+                    'Entity {} is out of the text bounds.').format(
+                        entity.get('entity'))})
+        return attrs
+
+
+class ImportTranslationsSerializer(serializers.Serializer):
+    translations = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=settings.BOTHUB_IMPORT_TRANSLATIONS_MAX)
+
+    def validate_translations(self, value):
+        errors = {}
+        validated = {}
+        for index, translation in enumerate(value):
+            serializer = ImportTranslationSerializer(data=translation)
+            if serializer.is_valid():
+                validated[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        importer = TranslationsImporter(self.context.get('repository'))
+        original_examples = importer.get_original_examples(set(map(
+            lambda attrs: attrs.get('original_example'),
+            validated.values())))
+        translated = importer.get_translated(original_examples.keys())
+        for index, attrs in validated.items():
+            original_example = original_examples.get(
+                attrs.get('original_example'))
+            if original_example is None:
+                errors[index] = {'original_example': [_(
+                    'Example {} does not exist in this repository.').format(
+                        attrs.get('original_example'))]}
+                continue
+            attrs['original_example'] = original_example
+            key = (original_example.pk, attrs.get('language'),)
+            if key in translated:
+                errors[index] = {'non_field_errors': [_(
+                    'Example {} is already translated to {}.').format(
+                        *key)]}
+                continue
+            translated.add(key)
+            try:
+                TranslatedExampleLanguageValidator()(attrs)
+                TranslatedExampleEntitiesValidator()(attrs)
+            except serializers.ValidationError as e:
+                errors[index] = e.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+        return list(map(lambda x: x[1], sorted(validated.items())))
+
+    def create(self, validated_data):
+        repository = self.context.get('repository')
+        return TranslationsImporter(repository).import_translations(
+            validated_data.get('translations'))
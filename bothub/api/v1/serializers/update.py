@@ -22,3 +22,20 @@ class RepositoryUpdateSerializer(serializers.ModelSerializer):
         source='by',
         slug_field='nickname',
         read_only=True)
+
+
+class RepositoryUpdateTrainingSerializer(RepositoryUpdateSerializer):
+    class Meta(RepositoryUpdateSerializer.Meta):
+        fields = RepositoryUpdateSerializer.Meta.fields + [
+            'training_log',
+        ]
+
+
+class TrainingJobSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    status = serializers.CharField()
+    error = serializers.CharField()
+    created_at = serializers.DateTimeField()
+    updates = RepositoryUpdateTrainingSerializer(
+        source='repository_updates',
+        many=True)
@@ -39,7 +39,7 @@ class AuthorizationTestCase(TestCase):
     def request(self, repository, token):
         authorization_header = {
             'HTTP_AUTHORIZATION': 'Token {}'.format(token.key),
-        }
+        } if token else {}
         request = self.factory.get(
             '/api/repository/{}/{}/'.format(
                 repository.owner.nickname,
@@ -95,6 +95,23 @@ class AuthorizationTestCase(TestCase):
             response.status_code,
             status.HTTP_403_FORBIDDEN)
 
+    def test_anonymous_not_authenticated(self):
+        response, content_data = self.request(self.repository, None)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_401_UNAUTHORIZED)
+
+    def test_owner_stored_with_repository(self):
+        authorization = RepositoryAuthorization.objects.get(
+            user=self.owner,
+            repository=self.repository)
+        response, content_data = self.request(
+            self.repository,
+            self.owner_token)
+        self.assertEqual(
+            content_data.get('uuid'),
+            str(authorization.uuid))
+
 
 class ListAuthorizationTestCase(TestCase):
     def setUp(self):
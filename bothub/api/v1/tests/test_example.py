@@ -3,6 +3,8 @@ import uuid
 
 from django.test import TestCase
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from rest_framework import status
 
 from bothub.common import languages
@@ -10,10 +12,12 @@ from bothub.common.models import Repository
 from bothub.common.models import RepositoryExample
 from bothub.common.models import RepositoryExampleEntity
 from bothub.common.models import RepositoryUpdate
+from bothub.common.models import RepositoryEntity
 
 from ..views import NewRepositoryExampleViewSet
 from ..views import RepositoryExampleViewSet
 from ..views import RepositoryEntitiesViewSet
+from ..views import RepositoryViewSet
 
 from .utils import create_user_and_token
 
@@ -303,6 +307,132 @@ class NewRepositoryExampleTestCase(TestCase):
             1)
 
 
+class ImportExamplesTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+        self.owner, self.owner_token = create_user_and_token('owner')
+        self.user, self.user_token = create_user_and_token()
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Testing',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+
+    def request(self, token, data):
+        authorization_header = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(token.key),
+        }
+        request = self.factory.post(
+            '/api/repository/{}/{}/import-examples/'.format(
+                self.repository.owner.nickname,
+                self.repository.slug),
+            json.dumps(data),
+            content_type='application/json',
+            **authorization_header)
+        response = RepositoryViewSet.as_view(
+            {'post': 'import_examples'})(
+                request,
+                owner__nickname=self.repository.owner.nickname,
+                slug=self.repository.slug)
+        response.render()
+        content_data = json.loads(response.content)
+        return (response, content_data,)
+
+    def get_examples(self, count):
+        return [
+            {
+                'text': 'my name is user{}'.format(i),
+                'intent': 'greet',
+                'entities': [
+                    {
+                        'start': 11,
+                        'end': 15 + len(str(i)),
+                        'entity': 'name',
+                        'label': 'subject',
+                    },
+                    {
+                        'start': 0,
+                        'end': 2,
+                        'entity': 'owner',
+                    },
+                ],
+            }
+            for i in range(count)
+        ]
+
+    def test_okay(self):
+        examples = self.get_examples(10) + [{
+            'text': 'oi',
+            'language': languages.LANGUAGE_PT,
+            'intent': 'greet',
+        }]
+        response, content_data = self.request(
+            self.owner_token,
+            {'examples': examples})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED)
+        self.assertEqual(content_data.get('created'), 11)
+        self.assertEqual(self.repository.examples().count(), 11)
+        self.assertEqual(
+            self.repository.examples(languages.LANGUAGE_PT).count(),
+            1)
+        self.assertEqual(
+            RepositoryExampleEntity.objects.filter(
+                repository_example__repository_update__repository=(
+                    self.repository)).count(),
+            20)
+        name = RepositoryEntity.objects.get(
+            repository=self.repository,
+            value='name')
+        self.assertEqual(name.label.value, 'subject')
+        self.assertIsNone(RepositoryEntity.objects.get(
+            repository=self.repository,
+            value='owner').label)
+        self.repository.stats.refresh_from_db()
+        self.assertEqual(self.repository.stats.examples_count, 11)
+        self.assertListEqual(self.repository.stats.labels, ['subject'])
+
+    def test_queries_count_independent_of_size(self):
+        with CaptureQueriesContext(connection) as context:
+            self.request(self.owner_token, {
+                'examples': self.get_examples(5)})
+        small = len(context.captured_queries)
+        with CaptureQueriesContext(connection) as context:
+            self.request(self.owner_token, {
+                'examples': self.get_examples(50)})
+        if connection.features.can_return_ids_from_bulk_insert:
+            self.assertEqual(len(context.captured_queries), small)
+        else:
+            self.assertLess(len(context.captured_queries), small * 50)
+
+    def test_row_errors(self):
+        examples = self.get_examples(3)
+        examples[1]['entities'][0]['end'] = 100
+        examples[2]['intent'] = 'invalid intent'
+        response, content_data = self.request(
+            self.owner_token,
+            {'examples': examples})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST)
+        errors = content_data.get('examples')
+        self.assertEqual(sorted(errors.keys()), ['1', '2'])
+        self.assertIn('entities', errors.get('1'))
+        self.assertIn('intent', errors.get('2'))
+        self.assertEqual(self.repository.examples().count(), 0)
+
+    def test_permission_denied(self):
+        response, content_data = self.request(
+            self.user_token,
+            {'examples': self.get_examples(1)})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN)
+
+
 class RepositoryExampleRetrieveTestCase(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
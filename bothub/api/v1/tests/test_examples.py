@@ -1,14 +1,20 @@
 import json
 import uuid
+from urllib.parse import parse_qsl
+from urllib.parse import urlparse
 
 from django.test import TestCase
 from django.test import RequestFactory
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from bothub.common import languages
 from bothub.common.models import Repository
 from bothub.common.models import RepositoryExample
 from bothub.common.models import RepositoryTranslatedExample
+from bothub.common.models import RepositoryExampleEntity
+from bothub.common.models import RepositoryTranslatedExampleEntity
 
 from ..views import RepositoryExamplesViewSet
 
@@ -69,6 +75,42 @@ class ExamplesTestCase(TestCase):
             response.status_code,
             status.HTTP_200_OK)
 
+    def test_queries_count_independent_of_page_size(self):
+        for i in range(200):
+            example = RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='my name is user{}'.format(i),
+                intent='greet')
+            entity = RepositoryExampleEntity.objects.create(
+                repository_example=example,
+                start=11,
+                end=15,
+                entity='name')
+            translated = RepositoryTranslatedExample.objects.create(
+                original_example=example,
+                text='meu nome é user{}'.format(i),
+                language=languages.LANGUAGE_PT)
+            RepositoryTranslatedExampleEntity.objects.create(
+                repository_translated_example=translated,
+                start=11,
+                end=15,
+                entity='name')
+        entity.entity.set_label('subject')
+        entity.entity.save()
+
+        queries_count = {}
+        for limit in [20, 200]:
+            with CaptureQueriesContext(connection) as context:
+                response, content_data = self.request(
+                    {
+                        'repository_uuid': self.repository.uuid,
+                        'limit': limit,
+                    },
+                    self.owner_token)
+            self.assertEqual(len(content_data.get('results')), limit)
+            queries_count[limit] = len(context.captured_queries)
+        self.assertEqual(queries_count[20], queries_count[200])
+
     def test_repository_uuid_required(self):
         response, content_data = self.request(
             {},
@@ -270,3 +312,71 @@ class ExamplesTestCase(TestCase):
         self.assertEqual(
             content_data.get('results')[0].get('id'),
             example_2.id)
+
+    def walk_cursor(self, data):
+        ids = []
+        data = dict(data, cursor='', limit=2)
+        while data:
+            response, content_data = self.request(data, self.owner_token)
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_200_OK)
+            self.assertNotIn('count', content_data)
+            ids += list(map(
+                lambda x: x.get('id'),
+                content_data.get('results')))
+            next_link = content_data.get('next')
+            data = next_link and dict(parse_qsl(urlparse(next_link).query))
+        return ids
+
+    def test_cursor_pagination(self):
+        for i in range(4):
+            RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='hello {}'.format(i))
+        data = {
+            'repository_uuid': self.repository.uuid,
+        }
+        response, content_data = self.request(
+            dict(data, limit=100),
+            self.owner_token)
+        self.assertEqual(
+            self.walk_cursor(data),
+            list(map(
+                lambda x: x.get('id'),
+                content_data.get('results'))))
+        self.assertEqual(len(self.walk_cursor(data)), 5)
+
+    def test_cursor_pagination_ascending(self):
+        for i in range(4):
+            RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='hello {}'.format(i))
+        ids = self.walk_cursor({
+            'repository_uuid': self.repository.uuid,
+            'ordering': 'created_at',
+        })
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(ids, sorted(ids))
+
+    def test_cursor_estimated_count(self):
+        response, content_data = self.request(
+            {
+                'repository_uuid': self.repository.uuid,
+                'cursor': '',
+                'count': 'estimated',
+            },
+            self.owner_token)
+        self.assertEqual(content_data.get('count'), 1)
+        self.assertIsNone(content_data.get('next'))
+
+    def test_invalid_cursor(self):
+        response, content_data = self.request(
+            {
+                'repository_uuid': self.repository.uuid,
+                'cursor': 'invalid',
+            },
+            self.owner_token)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_404_NOT_FOUND)
@@ -1,9 +1,20 @@
+import csv
 import json
+import os
+import subprocess
 import uuid
+from datetime import timedelta
+from unittest.mock import Mock
+from unittest.mock import patch
 
 from django.test import TestCase
 from django.test import RequestFactory
 from django.test.client import MULTIPART_CONTENT
+from django.conf import settings
+from django.db import connection
+from django.db import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 
 from bothub.common import languages
@@ -11,9 +22,15 @@ from bothub.common.models import RepositoryCategory
 from bothub.common.models import Repository
 from bothub.common.models import RepositoryExample
 from bothub.common.models import RepositoryExampleEntity
+from bothub.common.models import RepositoryEntity
+from bothub.common.models import RepositoryTranslatedExample
+from bothub.common.models import RepositoryTranslatedExampleEntity
 from bothub.common.models import RepositoryVote
 from bothub.common.models import RepositoryAuthorization
 from bothub.common.models import RequestRepositoryAuthorization
+from bothub.common.models import TrainingJob
+from bothub.common.jobs import run_training_job
+from bothub.common.exceptions import NLPServiceUnavailable
 
 from ..views import NewRepositoryViewSet
 from ..views import RepositoryViewSet
@@ -208,6 +225,28 @@ class RetrieveRepositoryTestCase(TestCase):
             response.status_code,
             status.HTTP_403_FORBIDDEN)
 
+    def create_labels(self, start, stop):
+        for i in range(start, stop):
+            entity = RepositoryEntity.objects.create(
+                repository=self.repository,
+                value='entity{}'.format(i))
+            entity.set_label('label{}'.format(i))
+            entity.save(update_fields=['label'])
+
+    def test_queries_count_independent_of_labels(self):
+        self.create_labels(0, 1)
+        with CaptureQueriesContext(connection) as context:
+            self.request(self.repository, self.owner_token)
+        self.create_labels(1, 6)
+        with self.assertNumQueries(len(context.captured_queries)):
+            response, content_data = self.request(
+                self.repository,
+                self.owner_token)
+        self.assertEqual(len(content_data.get('labels')), 6)
+        self.assertEqual(
+            content_data.get('labels')[5].get('entities'),
+            ['entity5'])
+
     def test_languages_status(self):
         authorization_header = {
             'HTTP_AUTHORIZATION': 'Token {}'.format(self.user_token.key),
@@ -591,6 +630,188 @@ class TrainRepositoryTestCase(TestCase):
         self.assertEqual(
             response.status_code,
             status.HTTP_403_FORBIDDEN)
+        self.assertFalse(RepositoryAuthorization.objects.filter(
+            user=self.user).exists())
+
+    def create_examples(self):
+        for i in range(2):
+            RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='hi {}'.format(i),
+                intent='greet')
+
+    def request_status(self, job_id, token):
+        authorization_header = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(token.key),
+        }
+        request = self.factory.get(
+            '/api/repository/{}/{}/train/{}/'.format(
+                self.repository.owner.nickname,
+                self.repository.slug,
+                job_id),
+            **authorization_header)
+        response = RepositoryViewSet.as_view({'get': 'train_status'})(
+            request,
+            owner__nickname=self.repository.owner.nickname,
+            slug=self.repository.slug,
+            job_id=job_id)
+        response.render()
+        content_data = json.loads(response.content)
+        return (response, content_data,)
+
+    @patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+    @patch('bothub.common.jobs.executor')
+    def test_queue_job(self, executor, on_commit):
+        self.create_examples()
+        response, content_data = self.request(
+            self.repository,
+            self.owner_token)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_202_ACCEPTED)
+        self.assertEqual(content_data.get('status'), TrainingJob.STATUS_QUEUED)
+        self.assertEqual(
+            list(map(lambda u: u.get('id'), content_data.get('updates'))),
+            [self.repository.current_update().pk])
+        executor.submit.assert_called_once_with(
+            run_training_job,
+            uuid.UUID(content_data.get('id')))
+
+    @patch('django.db.transaction.on_commit', side_effect=lambda fn: fn())
+    @patch('bothub.common.jobs.executor')
+    def test_coalesce_jobs(self, executor, on_commit):
+        response, first = self.request(self.repository, self.owner_token)
+        response, second = self.request(self.repository, self.owner_token)
+        self.assertEqual(first.get('id'), second.get('id'))
+        self.assertEqual(executor.submit.call_count, 1)
+
+    def test_one_active_job(self):
+        TrainingJob.objects.create(
+            repository=self.repository,
+            active_repository=self.repository,
+            authorization=self.repository.get_or_create_user_authorization(
+                self.owner))
+        with self.assertRaises(IntegrityError):
+            TrainingJob.objects.create(
+                repository=self.repository,
+                active_repository=self.repository,
+                authorization=self.repository
+                .get_or_create_user_authorization(self.owner))
+
+    @patch('bothub.common.jobs.executor')
+    def test_stale_job_failed(self, executor):
+        response, first = self.request(self.repository, self.owner_token)
+        TrainingJob.objects.filter(pk=first.get('id')).update(
+            created_at=timezone.now() - timedelta(
+                seconds=settings.BOTHUB_TRAINING_JOB_TIMEOUT + 1))
+        response, second = self.request(self.repository, self.owner_token)
+        self.assertNotEqual(first.get('id'), second.get('id'))
+        self.assertEqual(
+            TrainingJob.objects.get(pk=first.get('id')).status,
+            TrainingJob.STATUS_FAILED)
+
+    def test_orphaned_jobs_failed(self):
+        stopped = subprocess.Popen(['true'])
+        stopped.wait()
+        jobs = {}
+        for name, pid in [
+                ('stopped', stopped.pid),
+                ('current', os.getpid()),
+                ('alive', os.getppid())]:
+            repository = Repository.objects.create(
+                owner=self.owner,
+                name=name,
+                slug=name,
+                language=languages.LANGUAGE_EN)
+            jobs[name] = TrainingJob.objects.create(
+                repository=repository,
+                active_repository=repository,
+                authorization=repository.get_or_create_user_authorization(
+                    self.owner),
+                status=TrainingJob.STATUS_RUNNING,
+                worker=TrainingJob.get_worker(pid))
+        TrainingJob.fail_orphaned()
+        self.assertEqual(
+            dict(map(
+                lambda x: (
+                    x[0],
+                    TrainingJob.objects.get(pk=x[1].pk).status,),
+                jobs.items())),
+            {
+                'stopped': TrainingJob.STATUS_FAILED,
+                'current': TrainingJob.STATUS_FAILED,
+                'alive': TrainingJob.STATUS_RUNNING,
+            })
+
+    @patch('bothub.common.models.get_nlp_client')
+    def test_job_run_once(self, get_nlp_client):
+        get_nlp_client.return_value.train.return_value = Mock(
+            status_code=200)
+        job = TrainingJob.submit(
+            self.repository.get_or_create_user_authorization(self.owner))
+        job.run()
+        TrainingJob.objects.filter(pk=job.pk).update(
+            status=TrainingJob.STATUS_RUNNING)
+        job.run()
+        self.assertEqual(get_nlp_client.return_value.train.call_count, 1)
+
+    @patch('bothub.common.models.get_nlp_client')
+    @patch('bothub.common.jobs.executor')
+    def test_job_status(self, executor, get_nlp_client):
+        self.create_examples()
+        response, content_data = self.request(
+            self.repository,
+            self.owner_token)
+        job_id = content_data.get('id')
+
+        def train(user_authorization):
+            update = self.repository.current_update()
+            update.start_training(user_authorization.user)
+            update.save_training(b'bot')
+            return Mock(status_code=200)
+
+        get_nlp_client.return_value.train.side_effect = train
+        TrainingJob.objects.get(pk=job_id).run()
+
+        response, content_data = self.request_status(job_id, self.owner_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            content_data.get('status'),
+            TrainingJob.STATUS_FINISHED)
+        self.assertIsNotNone(content_data.get('updates')[0].get('trained_at'))
+
+        response, content_data = self.request(
+            self.repository,
+            self.owner_token)
+        self.assertNotEqual(content_data.get('id'), job_id)
+
+    @patch('bothub.common.jobs.executor')
+    def test_queue_job_after_failed_training(self, executor):
+        self.create_examples()
+        update = self.repository.current_update()
+        update.start_training(self.owner)
+        update.train_fail()
+        response, content_data = self.request(
+            self.repository,
+            self.owner_token)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_202_ACCEPTED)
+        current_update = self.repository.current_update()
+        self.assertNotEqual(current_update.pk, update.pk)
+        self.assertEqual(
+            list(map(lambda u: u.get('id'), content_data.get('updates'))),
+            [current_update.pk])
+
+    def test_job_status_not_found(self):
+        response, content_data = self.request_status(
+            uuid.uuid4(),
+            self.owner_token)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response, content_data = self.request_status(
+            'invalid',
+            self.owner_token)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
 class AnalyzeRepositoryTestCase(TestCase):
@@ -615,17 +836,20 @@ class AnalyzeRepositoryTestCase(TestCase):
     def request(self, repository, token, data):
         authorization_header = {
             'HTTP_AUTHORIZATION': 'Token {}'.format(token.key),
-        }
+        } if token else {}
         request = self.factory.post(
             '/api/repository/{}/{}/analyze/'.format(
                 repository.owner.nickname,
                 repository.slug),
             data,
             **authorization_header)
-        response = RepositoryViewSet.as_view({'post': 'analyze'})(
-            request,
-            owner__nickname=repository.owner.nickname,
-            slug=repository.slug)
+        # with the route permissions, as registered by the router
+        response = RepositoryViewSet.as_view(
+            {'post': 'analyze'},
+            **RepositoryViewSet.analyze.kwargs)(
+                request,
+                owner__nickname=repository.owner.nickname,
+                slug=repository.slug)
         response.render()
         content_data = json.loads(response.content)
         return (response, content_data,)
@@ -642,6 +866,50 @@ class AnalyzeRepositoryTestCase(TestCase):
             response.status_code,
             status.HTTP_403_FORBIDDEN)
 
+    @patch('bothub.common.models.get_nlp_client')
+    def test_cached_result_denied_to_anonymous(self, get_nlp_client):
+        get_nlp_client.return_value.parse.return_value = Mock(
+            status_code=200,
+            json=lambda: {'intent': {'name': 'secret'}})
+        data = {
+            'language': 'en',
+            'text': 'hi',
+        }
+        response, content_data = self.request(
+            self.private_repository,
+            self.owner_token,
+            data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response, content_data = self.request(
+            self.private_repository,
+            None,
+            data)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN)
+        self.assertNotIn('intent', content_data)
+        self.assertEqual(get_nlp_client.return_value.parse.call_count, 1)
+
+    @patch('bothub.common.models.get_nlp_client')
+    def test_anonymous_analyzes_with_owner_token(self, get_nlp_client):
+        parse = get_nlp_client.return_value.parse
+        parse.return_value = Mock(
+            status_code=200,
+            json=lambda: {'intent': {'name': 'greet'}})
+        response, content_data = self.request(
+            self.repository,
+            None,
+            {
+                'language': 'en',
+                'text': 'hi',
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            parse.call_args[0][0],
+            RepositoryAuthorization.objects.get(
+                user=self.owner,
+                repository=self.repository))
+
     def test_language_required(self):
         response, content_data = self.request(
             self.repository,
@@ -669,6 +937,293 @@ class AnalyzeRepositoryTestCase(TestCase):
         self.assertIn('text', content_data.keys())
 
 
+class AnalyzeBatchRepositoryTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+        self.owner, self.owner_token = create_user_and_token('owner')
+        self.user, self.user_token = create_user_and_token()
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Testing',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+        self.private_repository = Repository.objects.create(
+            owner=self.owner,
+            name='Testing',
+            slug='private',
+            language=languages.LANGUAGE_EN,
+            is_private=True)
+
+    def request(self, repository, token, data):
+        authorization_header = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(token.key),
+        }
+        request = self.factory.post(
+            '/api/repository/{}/{}/analyze-batch/'.format(
+                repository.owner.nickname,
+                repository.slug),
+            json.dumps(data),
+            content_type='application/json',
+            **authorization_header)
+        # with the route permissions, as registered by the router
+        response = RepositoryViewSet.as_view(
+            {'post': 'analyze_batch'},
+            **RepositoryViewSet.analyze_batch.kwargs)(
+                request,
+                owner__nickname=repository.owner.nickname,
+                slug=repository.slug)
+        if hasattr(response, 'render'):
+            response.render()
+        content = b''.join(response.streaming_content) \
+            if response.streaming else response.content
+        content_data = json.loads(content)
+        return (response, content_data,)
+
+    def test_permission_denied_in_private_repository(self):
+        response, content_data = self.request(
+            self.private_repository,
+            self.user_token,
+            {
+                'language': 'en',
+                'texts': ['hi'],
+            })
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN)
+        self.assertFalse(RepositoryAuthorization.objects.filter(
+            user=self.user,
+            repository=self.private_repository).exists())
+
+    def test_texts_required(self):
+        response, content_data = self.request(
+            self.repository,
+            self.owner_token,
+            {
+                'language': 'en',
+                'texts': [],
+            })
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST)
+        self.assertIn('texts', content_data.keys())
+
+    @patch('bothub.common.models.get_nlp_client')
+    def test_streamed_in_order(self, get_nlp_client):
+        texts = ['hi', 'bye', 'fail', 'down']
+
+        def parse_many(user_authorization, texts, language):
+            for text in texts:
+                if text == 'down':
+                    yield text, NLPServiceUnavailable()
+                elif text == 'fail':
+                    yield text, Mock(
+                        status_code=400,
+                        json=lambda: {'error': {'message': 'invalid'}})
+                else:
+                    yield text, Mock(
+                        status_code=200,
+                        json=lambda: {'intent': 'greet'})
+
+        get_nlp_client.return_value.parse_many.side_effect = parse_many
+        response, content_data = self.request(
+            self.repository,
+            self.owner_token,
+            {
+                'language': 'en',
+                'texts': texts,
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(map(lambda r: r.get('text'), content_data)),
+                         texts)
+        self.assertEqual(
+            list(map(lambda r: r.get('status_code'), content_data)),
+            [200, 200, 400, 503])
+        self.assertEqual(content_data[0].get('result'), {'intent': 'greet'})
+        self.assertEqual(
+            content_data[2].get('error'),
+            {'message': 'invalid'})
+
+
+class ExportExamplesTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+        self.owner, self.owner_token = create_user_and_token('owner')
+        self.user, self.user_token = create_user_and_token()
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Testing',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+        self.private_repository = Repository.objects.create(
+            owner=self.owner,
+            name='Testing',
+            slug='private',
+            language=languages.LANGUAGE_EN,
+            is_private=True)
+
+        self.example = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='my name is douglas',
+            intent='greet')
+        example_entity = RepositoryExampleEntity.objects.create(
+            repository_example=self.example,
+            start=11,
+            end=18,
+            entity='name')
+        example_entity.entity.set_label('subject')
+        example_entity.entity.save()
+        self.translation = RepositoryTranslatedExample.objects.create(
+            original_example=self.example,
+            language=languages.LANGUAGE_PT,
+            text='meu nome é douglas')
+        RepositoryTranslatedExampleEntity.objects.create(
+            repository_translated_example=self.translation,
+            start=11,
+            end=18,
+            entity='name')
+        for i in range(2):
+            RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='hi {}'.format(i),
+                intent='greet')
+        RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='bye',
+            intent='bye').delete()
+
+    def request(self, repository, token, params={}):
+        authorization_header = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(token.key),
+        }
+        request = self.factory.get(
+            '/api/repository/{}/{}/export-examples/'.format(
+                repository.owner.nickname,
+                repository.slug),
+            params,
+            **authorization_header)
+        response = RepositoryViewSet.as_view({'get': 'export_examples'})(
+            request,
+            owner__nickname=repository.owner.nickname,
+            slug=repository.slug)
+        if hasattr(response, 'render'):
+            response.render()
+        content = b''.join(response.streaming_content) \
+            if response.streaming else response.content
+        return (response, content.decode('utf-8'),)
+
+    def test_ndjson(self):
+        response, content = self.request(
+            self.repository,
+            self.owner_token)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK)
+        self.assertEqual(
+            response['Content-Type'],
+            'application/x-ndjson')
+        examples = list(map(json.loads, content.splitlines()))
+        self.assertEqual(len(examples), 3)
+        example = examples[0]
+        self.assertEqual(example.get('id'), self.example.id)
+        self.assertEqual(example.get('language'), languages.LANGUAGE_EN)
+        self.assertEqual(
+            example.get('entities'),
+            [{
+                'start': 11,
+                'end': 18,
+                'entity': 'name',
+                'label': 'subject',
+            }])
+        translations = example.get('translations')
+        self.assertEqual(len(translations), 1)
+        self.assertEqual(
+            translations[0].get('language'),
+            languages.LANGUAGE_PT)
+        self.assertEqual(
+            translations[0].get('text'),
+            self.translation.text)
+        self.assertEqual(len(translations[0].get('entities')), 1)
+        self.assertEqual(examples[1].get('translations'), [])
+
+    def test_language(self):
+        response, content = self.request(
+            self.repository,
+            self.owner_token,
+            {
+                'language': languages.LANGUAGE_PT,
+            })
+        examples = list(map(json.loads, content.splitlines()))
+        self.assertEqual(
+            list(map(lambda x: x.get('id'), examples)),
+            [self.example.id])
+
+    def test_csv(self):
+        response, content = self.request(
+            self.repository,
+            self.owner_token,
+            {
+                'file_format': 'csv',
+            })
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(
+            rows[0],
+            ['id', 'language', 'intent', 'text', 'entities'])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[2][1], languages.LANGUAGE_PT)
+        self.assertEqual(rows[2][3], self.translation.text)
+
+    def test_chunks(self):
+        with self.settings(BOTHUB_EXPORT_CHUNK_SIZE=2):
+            response, content = self.request(
+                self.repository,
+                self.owner_token)
+        examples = list(map(json.loads, content.splitlines()))
+        self.assertEqual(len(examples), 3)
+        self.assertEqual(
+            len(set(map(lambda x: x.get('id'), examples))),
+            3)
+
+    def test_no_update_created(self):
+        response, content = self.request(
+            self.private_repository,
+            self.owner_token,
+            {
+                'language': languages.LANGUAGE_PT,
+            })
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK)
+        self.assertEqual(content, '')
+        self.assertFalse(self.private_repository.updates.exists())
+
+    def test_invalid_file_format(self):
+        response, content = self.request(
+            self.repository,
+            self.owner_token,
+            {
+                'file_format': 'xml',
+            })
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST)
+
+    def test_permission_denied_in_private_repository(self):
+        response, content = self.request(
+            self.private_repository,
+            self.user_token)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN)
+
+
 class LanguagesStatusTestCase(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
@@ -3,6 +3,8 @@ import uuid
 
 from django.test import TestCase
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from rest_framework import status
 
 from bothub.common import languages
@@ -10,10 +12,12 @@ from bothub.common.models import Repository
 from bothub.common.models import RepositoryExample
 from bothub.common.models import RepositoryTranslatedExample
 from bothub.common.models import RepositoryExampleEntity
+from bothub.common.models import RepositoryTranslatedExampleEntity
 
 from ..views import NewRepositoryTranslatedExampleViewSet
 from ..views import RepositoryTranslatedExampleViewSet
 from ..views import TranslationsViewSet
+from ..views import RepositoryViewSet
 
 from .utils import create_user_and_token
 
@@ -383,6 +387,41 @@ class TranslationsViewTest(TestCase):
             content_data.get('count'),
             1)
 
+    def test_entities_queries(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response, content_data = self.request({
+                    'repository_uuid': self.repository.uuid,
+                })
+            self.assertTrue(all(map(
+                lambda t: t.get('has_valid_entities'),
+                content_data.get('results'))))
+            return len(context.captured_queries)
+
+        queries_count = count_queries()
+        for i, language in enumerate([
+                languages.LANGUAGE_ES,
+                languages.LANGUAGE_DE,
+                languages.LANGUAGE_FR]):
+            example = RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='hi {}'.format(i))
+            RepositoryExampleEntity.objects.create(
+                repository_example=example,
+                start=0,
+                end=2,
+                entity='greet')
+            translated = RepositoryTranslatedExample.objects.create(
+                original_example=example,
+                language=language,
+                text='hi {}'.format(i))
+            RepositoryTranslatedExampleEntity.objects.create(
+                repository_translated_example=translated,
+                start=0,
+                end=2,
+                entity='greet')
+        self.assertEqual(count_queries(), queries_count)
+
     def test_repository_not_found(self):
         response, content_data = self.request({
             'repository_uuid': uuid.uuid4(),
@@ -493,3 +532,148 @@ class TranslationsViewTest(TestCase):
         self.assertEqual(
             content_data.get('count'),
             0)
+
+
+class ImportTranslationsTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+        self.owner, self.owner_token = create_user_and_token('owner')
+        self.user, self.user_token = create_user_and_token()
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Testing',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+        self.examples = []
+        for i in range(50):
+            example = RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='my name is user{}'.format(i))
+            RepositoryExampleEntity.objects.create(
+                repository_example=example,
+                start=11,
+                end=15 + len(str(i)),
+                entity='name')
+            self.examples.append(example)
+
+    def request(self, token, data):
+        authorization_header = {
+            'HTTP_AUTHORIZATION': 'Token {}'.format(token.key),
+        }
+        request = self.factory.post(
+            '/api/repository/{}/{}/import-translations/'.format(
+                self.repository.owner.nickname,
+                self.repository.slug),
+            json.dumps(data),
+            content_type='application/json',
+            **authorization_header)
+        response = RepositoryViewSet.as_view(
+            {'post': 'import_translations'})(
+                request,
+                owner__nickname=self.repository.owner.nickname,
+                slug=self.repository.slug)
+        response.render()
+        content_data = json.loads(response.content)
+        return (response, content_data,)
+
+    def get_translations(self, start, stop):
+        return [
+            {
+                'original_example': self.examples[i].pk,
+                'language': languages.LANGUAGE_PT,
+                'text': 'meu nome é user{}'.format(i),
+                'entities': [
+                    {
+                        'start': 11,
+                        'end': 15 + len(str(i)),
+                        'entity': 'name',
+                    },
+                ],
+            }
+            for i in range(start, stop)
+        ]
+
+    def get_translated(self):
+        return RepositoryTranslatedExample.objects.filter(
+            original_example__repository_update__repository=self.repository)
+
+    def test_okay(self):
+        response, content_data = self.request(
+            self.owner_token,
+            {'translations': self.get_translations(0, 10)})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED)
+        self.assertEqual(content_data.get('created'), 10)
+        translated = self.get_translated()
+        self.assertEqual(translated.count(), 10)
+        self.assertEqual(
+            RepositoryTranslatedExampleEntity.objects.filter(
+                repository_translated_example__in=translated).count(),
+            10)
+        self.assertTrue(all(map(
+            lambda t: t.has_valid_entities,
+            translated.with_entities())))
+        self.assertEqual(
+            self.repository.current_update(languages.LANGUAGE_PT).examples
+            .count(),
+            10)
+
+    def test_queries_count_independent_of_size(self):
+        with CaptureQueriesContext(connection) as context:
+            self.request(self.owner_token, {
+                'translations': self.get_translations(0, 5)})
+        small = len(context.captured_queries)
+        with CaptureQueriesContext(connection) as context:
+            self.request(self.owner_token, {
+                'translations': self.get_translations(5, 50)})
+        if connection.features.can_return_ids_from_bulk_insert:
+            self.assertEqual(len(context.captured_queries), small)
+        else:
+            self.assertLess(len(context.captured_queries), small * 50)
+
+    def test_row_errors(self):
+        RepositoryTranslatedExample.objects.create(
+            original_example=self.examples[0],
+            language=languages.LANGUAGE_PT,
+            text='meu nome é user0')
+        other_example = RepositoryExample.objects.create(
+            repository_update=Repository.objects.create(
+                owner=self.owner,
+                name='Other',
+                slug='other',
+                language=languages.LANGUAGE_EN).current_update(),
+            text='hi')
+        translations = self.get_translations(0, 7)
+        translations[2]['original_example'] = other_example.pk
+        translations[3]['language'] = languages.LANGUAGE_EN
+        translations[4]['entities'] = []
+        translations[5]['entities'][0]['end'] = 100
+        translations[6]['original_example'] = self.examples[1].pk
+        response, content_data = self.request(
+            self.owner_token,
+            {'translations': translations})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST)
+        errors = content_data.get('translations')
+        self.assertEqual(
+            sorted(errors.keys()),
+            ['0', '2', '3', '4', '5', '6'])
+        self.assertIn('non_field_errors', errors.get('0'))
+        self.assertIn('original_example', errors.get('2'))
+        self.assertIn('language', errors.get('3'))
+        self.assertIn('entities', errors.get('4'))
+        self.assertIn('entities', errors.get('5'))
+        self.assertIn('non_field_errors', errors.get('6'))
+        self.assertEqual(self.get_translated().count(), 1)
+
+    def test_permission_denied(self):
+        response, content_data = self.request(
+            self.user_token,
+            {'translations': self.get_translations(0, 1)})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_403_FORBIDDEN)
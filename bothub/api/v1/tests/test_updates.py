@@ -60,6 +60,20 @@ class UpdatesTestCase(TestCase):
             content_data.get('count'),
             1)
 
+    def test_cursor_pagination(self):
+        response, content_data = self.request(
+            {
+                'repository_uuid': str(self.repository.uuid),
+                'cursor': '',
+            },
+            self.owner_token)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK)
+        self.assertNotIn('count', content_data)
+        self.assertIsNone(content_data.get('next'))
+        self.assertEqual(len(content_data.get('results')), 1)
+
     def test_not_authenticated(self):
         response, content_data = self.request(
             {
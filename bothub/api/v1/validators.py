@@ -3,12 +3,12 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework.exceptions import ValidationError
 
 from bothub.common.models import RepositoryTranslatedExample
+from bothub.api.authorization import get_user_authorization
 
 
 class CanContributeInRepositoryValidator(object):
     def __call__(self, value):
-        user_authorization = value.get_user_authorization(
-            self.request.user)
+        user_authorization = get_user_authorization(self.request, value)
         if not user_authorization.can_contribute:
             raise PermissionDenied(
                 _('You can\'t contribute in this repository'))
@@ -20,8 +20,9 @@ class CanContributeInRepositoryValidator(object):
 class CanContributeInRepositoryExampleValidator(object):
     def __call__(self, value):
         repository = value.repository_update.repository
-        user_authorization = repository.get_user_authorization(
-            self.request.user)
+        user_authorization = get_user_authorization(
+            self.request,
+            repository)
         if not user_authorization.can_contribute:
             raise PermissionDenied(
                 _('You can\'t contribute in this repository'))
@@ -33,8 +34,9 @@ class CanContributeInRepositoryExampleValidator(object):
 class CanContributeInRepositoryTranslatedExampleValidator(object):
     def __call__(self, value):
         repository = value.original_example.repository_update.repository
-        user_authorization = repository.get_user_authorization(
-            self.request.user)
+        user_authorization = get_user_authorization(
+            self.request,
+            repository)
         if not user_authorization.can_contribute:
             raise PermissionDenied(
                 _('You can\'t contribute in this repository'))
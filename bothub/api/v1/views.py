@@ -1,9 +1,12 @@
+import json
+
 from rest_framework.viewsets import GenericViewSet
 from rest_framework import mixins
 from rest_framework import permissions
 from rest_framework.decorators import detail_route
 from rest_framework.response import Response
 from rest_framework.exceptions import APIException
+from rest_framework.exceptions import NotAuthenticated
 from rest_framework.exceptions import NotFound
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.exceptions import ValidationError
@@ -18,6 +21,7 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from django.db.models import Q
 
 from bothub.common.models import Repository
@@ -29,7 +33,13 @@ from bothub.common.models import RepositoryAuthorization
 from bothub.common.models import RequestRepositoryAuthorization
 from bothub.common.models import RepositoryEntity
 from bothub.common.models import RepositoryUpdate
+from bothub.common.models import TrainingJob
+from bothub.common.exceptions import NLPServiceUnavailable
+from bothub.common.exporter import ExamplesExporter
 from bothub.authentication.models import User
+from bothub.api.authorization import get_user_authorization
+from bothub.api.pagination import OptionalCursorPagination
+from bothub.api.search import FullTextSearchFilter
 
 from .serializers import RepositorySerializer
 from .serializers import NewRepositorySerializer
@@ -45,6 +55,8 @@ from .serializers import LoginSerializer
 from .serializers import RepositoryCategorySerializer
 from .serializers import NewRepositoryExampleSerializer
 from .serializers import AnalyzeTextSerializer
+from .serializers import AnalyzeTextBatchSerializer
+from .serializers import ExportExamplesSerializer
 from .serializers import EditRepositorySerializer
 from .serializers import NewRepositoryTranslatedExampleSerializer
 from .serializers import VoteSerializer
@@ -54,6 +66,9 @@ from .serializers import RequestRepositoryAuthorizationSerializer
 from .serializers import ReviewAuthorizationRequestSerializer
 from .serializers import RepositoryEntitySerializer
 from .serializers import RepositoryUpdateSerializer
+from .serializers import TrainingJobSerializer
+from .serializers import ImportExamplesSerializer
+from .serializers import ImportTranslationsSerializer
 
 
 # Permisions
@@ -65,7 +80,7 @@ ADMIN_METHODS = ['DELETE']
 
 class RepositoryPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        authorization = obj.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, obj)
         if request.method in READ_METHODS:
             return authorization.can_read
         if request.user.is_authenticated:
@@ -77,8 +92,9 @@ class RepositoryPermission(permissions.BasePermission):
 
 class RepositoryExamplePermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        authorization = obj.repository_update.repository \
-            .get_user_authorization(request.user)
+        authorization = get_user_authorization(
+            request,
+            obj.repository_update.repository)
         if request.method in READ_METHODS:
             return authorization.can_read
         return authorization.can_contribute
@@ -87,7 +103,7 @@ class RepositoryExamplePermission(permissions.BasePermission):
 class RepositoryTranslatedExamplePermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         repository = obj.original_example.repository_update.repository
-        authorization = repository.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, repository)
         if request.method in READ_METHODS:
             return authorization.can_read
         return authorization.can_contribute
@@ -95,13 +111,13 @@ class RepositoryTranslatedExamplePermission(permissions.BasePermission):
 
 class RepositoryAdminManagerAuthorization(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        authorization = obj.repository.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, obj.repository)
         return authorization.is_admin
 
 
 class RepositoryEntityHasPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        authorization = obj.repository.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, obj.repository)
         if request.method in READ_METHODS:
             return authorization.can_read
         if request.user.is_authenticated:
@@ -113,7 +129,7 @@ class RepositoryEntityHasPermission(permissions.BasePermission):
 
 class RepositoryUpdateHasPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        authorization = obj.repository.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, obj.repository)
         if request.method in READ_METHODS:
             return authorization.can_read
         if request.user.is_authenticated:
@@ -158,7 +174,7 @@ class ExamplesFilter(filters.FilterSet):
         request = self.request
         try:
             repository = Repository.objects.get(uuid=value)
-            authorization = repository.get_user_authorization(request.user)
+            authorization = get_user_authorization(request, repository)
             if not authorization.can_read:
                 raise PermissionDenied()
             return repository.examples(queryset=queryset)
@@ -232,10 +248,10 @@ class TranslationsFilter(filters.FilterSet):
         request = self.request
         try:
             repository = Repository.objects.get(uuid=value)
-            authorization = repository.get_user_authorization(request.user)
+            authorization = get_user_authorization(request, repository)
             if not authorization.can_read:
                 raise PermissionDenied()
-            return RepositoryTranslatedExample.objects.filter(
+            return queryset.filter(
                 original_example__repository_update__repository=repository)
         except Repository.DoesNotExist:
             raise NotFound(
@@ -265,7 +281,7 @@ class RepositoryAuthorizationFilter(filters.FilterSet):
         request = self.request
         try:
             repository = Repository.objects.get(uuid=value)
-            authorization = repository.get_user_authorization(request.user)
+            authorization = get_user_authorization(request, repository)
             if not authorization.is_admin:
                 raise PermissionDenied()
             return queryset.filter(repository=repository)
@@ -291,7 +307,7 @@ class RepositoryAuthorizationRequestsFilter(filters.FilterSet):
         request = self.request
         try:
             repository = Repository.objects.get(uuid=value)
-            authorization = repository.get_user_authorization(request.user)
+            authorization = get_user_authorization(request, repository)
             if not authorization.is_admin:
                 raise PermissionDenied()
             return queryset.filter(repository=repository)
@@ -320,7 +336,7 @@ class RepositoryEntitiesFilter(filters.FilterSet):
         request = self.request
         try:
             repository = Repository.objects.get(uuid=value)
-            authorization = repository.get_user_authorization(request.user)
+            authorization = get_user_authorization(request, repository)
             if not authorization.is_admin:
                 raise PermissionDenied()
             return queryset.filter(repository=repository)
@@ -348,7 +364,7 @@ class RepositoryUpdatesFilter(filters.FilterSet):
         request = self.request
         try:
             repository = Repository.objects.get(uuid=value)
-            authorization = repository.get_user_authorization(request.user)
+            authorization = get_user_authorization(request, repository)
             if not authorization.can_read:
                 raise PermissionDenied()
             return queryset.filter(repository=repository)
@@ -409,7 +425,7 @@ class MyRepositoriesViewSet(
     """
     List all user's repositories
     """
-    queryset = Repository.objects
+    queryset = Repository.objects.select_related('stats')
     serializer_class = RepositorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -438,7 +454,7 @@ class RepositoryViewSet(
     delete:
     Delete your repository.
     """
-    queryset = Repository.objects
+    queryset = Repository.objects.select_related('owner', 'stats')
     lookup_field = 'slug'
     lookup_fields = ['owner__nickname', 'slug']
     serializer_class = RepositorySerializer
@@ -469,7 +485,10 @@ class RepositoryViewSet(
         messages.
         """
         repository = self.get_object()
-        user_authorization = repository.get_user_authorization(request.user)
+        if request.user.is_anonymous:
+            raise NotAuthenticated()
+        user_authorization = repository.get_or_create_user_authorization(
+            request.user)
         serializer = RepositoryAuthorizationSerializer(user_authorization)
         return Response(serializer.data)
 
@@ -478,19 +497,36 @@ class RepositoryViewSet(
         url_name='repository-train')
     def train(self, request, **kwargs):
         """
-        Train current update using Bothub NLP service
+        Queue a training of the current update using Bothub NLP service,
+        follow it in train status.
         """
         repository = self.get_object()
-        user_authorization = repository.get_user_authorization(request.user)
-        if not user_authorization.can_write:
+        authorization = get_user_authorization(request, repository)
+        if not authorization.can_write:
             raise PermissionDenied()
-        request = Repository.request_nlp_train(  # pragma: no cover
-            user_authorization)
-        if request.status_code != status.HTTP_200_OK:  # pragma: no cover
-            raise APIException(  # pragma: no cover
-                {'status_code': request.status_code},
-                code=request.status_code)
-        return Response(request.json())  # pragma: no cover
+        user_authorization = repository.get_nlp_authorization(request.user)
+        job = TrainingJob.submit(user_authorization)
+        return Response(
+            TrainingJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED)
+
+    @detail_route(
+        methods=['GET'],
+        url_name='repository-train-status',
+        url_path=r'train/(?P<job_id>[^/.]+)')
+    def train_status(self, request, job_id=None, **kwargs):
+        """
+        Get a training job status and its repository updates progress.
+        """
+        repository = self.get_object()
+        authorization = get_user_authorization(request, repository)
+        if not authorization.can_write:
+            raise PermissionDenied()
+        try:
+            job = repository.training_jobs.get(pk=job_id)
+        except (TrainingJob.DoesNotExist, DjangoValidationError):
+            raise NotFound(_('Training job {} does not exist').format(job_id))
+        return Response(TrainingJobSerializer(job).data)
 
     @detail_route(
         methods=['POST'],
@@ -498,13 +534,22 @@ class RepositoryViewSet(
         permission_classes=[])
     def analyze(self, request, **kwargs):
         repository = self.get_object()
-        user_authorization = repository.get_user_authorization(request.user)
+        # checked before the analyze cache is read
+        authorization = get_user_authorization(request, repository)
+        if not authorization.can_read:
+            raise PermissionDenied()
+        user_authorization = repository.get_nlp_authorization(request.user)
         serializer = AnalyzeTextSerializer(
             data=request.data)  # pragma: no cover
         serializer.is_valid(raise_exception=True)  # pragma: no cover
-        request = Repository.request_nlp_analyze(
-            user_authorization,
-            serializer.data)  # pragma: no cover
+        try:
+            request = Repository.request_nlp_analyze(
+                user_authorization,
+                serializer.data)
+        except NLPServiceUnavailable:
+            return Response(
+                {'detail': _('Bothub NLP service is unavailable.')},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
         if request.status_code == status.HTTP_200_OK:  # pragma: no cover
             return Response(request.json())  # pragma: no cover
@@ -523,6 +568,142 @@ class RepositoryViewSet(
         message = error.get('message')  # pragma: no cover
         raise APIException(detail=message)  # pragma: no cover
 
+    @detail_route(
+        methods=['POST'],
+        url_name='repository-analyze-batch',
+        url_path='analyze-batch',
+        permission_classes=[])
+    def analyze_batch(self, request, **kwargs):
+        """
+        Analyze many texts, the results are streamed in the texts order.
+        """
+        repository = self.get_object()
+        authorization = get_user_authorization(request, repository)
+        if not authorization.can_read:
+            raise PermissionDenied()
+        user_authorization = repository.get_nlp_authorization(request.user)
+        serializer = AnalyzeTextBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = Repository.request_nlp_analyze_batch(
+            user_authorization,
+            serializer.data)
+        return StreamingHttpResponse(
+            self.stream_analyze_batch(results),
+            content_type='application/json')
+
+    def stream_analyze_batch(self, results):
+        yield '['
+        for i, (text, response) in enumerate(results):
+            if isinstance(response, NLPServiceUnavailable):
+                r = {
+                    'status_code': status.HTTP_503_SERVICE_UNAVAILABLE,
+                    'error': {
+                        'message': _('Bothub NLP service is unavailable.'),
+                    },
+                }
+            else:
+                try:
+                    content = response.json()
+                except ValueError:
+                    content = None
+                r = {'status_code': response.status_code}
+                if response.status_code == status.HTTP_200_OK:
+                    r['result'] = content
+                else:
+                    r['error'] = content and content.get('error')
+            r['text'] = text
+            yield '{}{}'.format(',' if i else '', json.dumps(r))
+        yield ']'
+
+    @detail_route(
+        methods=['GET'],
+        url_name='repository-export-examples',
+        url_path='export-examples')
+    def export_examples(self, request, **kwargs):
+        """
+        Stream the examples of a language with entities and translations,
+        as NDJSON or CSV.
+        """
+        repository = self.get_object()
+        authorization = get_user_authorization(request, repository)
+        if not authorization.can_read:
+            raise PermissionDenied()
+        serializer = ExportExamplesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        language = serializer.data.get('language') or repository.language
+        # the live examples of the language, read through an unsaved update
+        # so an export never creates the current one
+        exporter = ExamplesExporter(RepositoryUpdate(
+            repository=repository,
+            language=language))
+        if serializer.data.get('file_format') == \
+                ExportExamplesSerializer.FORMAT_CSV:
+            response = StreamingHttpResponse(
+                exporter.to_csv(),
+                content_type='text/csv')
+            extension = 'csv'
+        else:
+            response = StreamingHttpResponse(
+                exporter.to_ndjson(),
+                content_type='application/x-ndjson')
+            extension = 'ndjson'
+        response['Content-Disposition'] = \
+            'attachment; filename={}-{}.{}'.format(
+                repository.slug,
+                language,
+                extension)
+        return response
+
+    @detail_route(
+        methods=['POST'],
+        url_name='repository-import-examples',
+        url_path='import-examples',
+        permission_classes=[
+            IsAuthenticated,
+        ])
+    def import_examples(self, request, **kwargs):
+        """
+        Import many examples in one transaction, any invalid example
+        cancels the import and is reported by its index.
+        """
+        repository = self.get_object()
+        authorization = get_user_authorization(request, repository)
+        if not authorization.can_contribute:
+            raise PermissionDenied()
+        serializer = ImportExamplesSerializer(
+            data=request.data,
+            context={'repository': repository})
+        serializer.is_valid(raise_exception=True)
+        examples = serializer.save()
+        return Response(
+            {'created': len(examples)},
+            status=status.HTTP_201_CREATED)
+
+    @detail_route(
+        methods=['POST'],
+        url_name='repository-import-translations',
+        url_path='import-translations',
+        permission_classes=[
+            IsAuthenticated,
+        ])
+    def import_translations(self, request, **kwargs):
+        """
+        Import many translations in one transaction, any invalid
+        translation cancels the import and is reported by its index.
+        """
+        repository = self.get_object()
+        authorization = get_user_authorization(request, repository)
+        if not authorization.can_contribute:
+            raise PermissionDenied()
+        serializer = ImportTranslationsSerializer(
+            data=request.data,
+            context={'repository': repository})
+        serializer.is_valid(raise_exception=True)
+        translations = serializer.save()
+        return Response(
+            {'created': len(translations)},
+            status=status.HTTP_201_CREATED)
+
     @detail_route(
         methods=['POST'],
         url_name='repository-vote',
@@ -645,7 +826,7 @@ class RepositoryTranslatedExampleViewSet(
     delete:
     Delete example translation.
     """
-    queryset = RepositoryTranslatedExample.objects
+    queryset = RepositoryTranslatedExample.objects.with_entities()
     serializer_class = RepositoryTranslatedExampleSerializer
     permission_classes = [
         permissions.IsAuthenticated,
@@ -656,9 +837,10 @@ class RepositoryTranslatedExampleViewSet(
 class RepositoryExamplesViewSet(
         mixins.ListModelMixin,
         GenericViewSet):
-    queryset = RepositoryExample.objects
+    queryset = RepositoryExample.objects.with_entities_and_translations()
     serializer_class = RepositoryExampleSerializer
     filter_class = ExamplesFilter
+    pagination_class = OptionalCursorPagination
     filter_backends = [
         DjangoFilterBackend,
         OrderingFilter,
@@ -836,16 +1018,12 @@ class RepositoriesViewSet(
     List all public repositories.
     """
     serializer_class = RepositorySerializer
-    queryset = Repository.objects.all().publics().order_by_relevance()
+    queryset = Repository.objects.all().publics().order_by_relevance() \
+        .select_related('stats')
     filter_class = RepositoriesFilter
     filter_backends = [
         DjangoFilterBackend,
-        SearchFilter,
-    ]
-    search_fields = [
-        '$name',
-        '^name',
-        '=name',
+        FullTextSearchFilter,
     ]
 
 
@@ -856,8 +1034,9 @@ class TranslationsViewSet(
     List repository translations.
     """
     serializer_class = RepositoryTranslatedExampleSerializer
-    queryset = RepositoryTranslatedExample.objects.all()
+    queryset = RepositoryTranslatedExample.objects.with_entities()
     filter_class = TranslationsFilter
+    pagination_class = OptionalCursorPagination
 
 
 class RepositoryAuthorizationViewSet(
@@ -893,7 +1072,7 @@ class RepositoryAuthorizationRoleViewSet(
         repository = get_object_or_404(Repository, uuid=repository_uuid)
         user = get_object_or_404(User, nickname=user_nickname)
 
-        obj = repository.get_user_authorization(user)
+        obj = repository.get_or_create_user_authorization(user)
 
         self.check_object_permissions(self.request, obj)
         return obj
@@ -992,6 +1171,7 @@ class RepositoryUpdatesViewSet(
         training_started_at__isnull=False)
     serializer_class = RepositoryUpdateSerializer
     filter_class = RepositoryUpdatesFilter
+    pagination_class = OptionalCursorPagination
     permission_classes = [
         IsAuthenticated,
         RepositoryUpdateHasPermission,
@@ -1,12 +1,15 @@
 from rest_framework import permissions
 
+from bothub.api.authorization import get_user_authorization
+
 from .. import READ_METHODS
 
 
 class RepositoryExamplePermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        authorization = obj.repository_update.repository \
-            .get_user_authorization(request.user)
+        authorization = get_user_authorization(
+            request,
+            obj.repository_update.repository)
         if request.method in READ_METHODS:
             return authorization.can_read
         return authorization.can_contribute
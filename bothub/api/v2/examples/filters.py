@@ -8,6 +8,7 @@ from django_filters import rest_framework as filters
 
 from bothub.common.models import Repository
 from bothub.common.models import RepositoryExample
+from bothub.api.authorization import get_user_authorization
 
 
 class ExamplesFilter(filters.FilterSet):
@@ -52,7 +53,7 @@ class ExamplesFilter(filters.FilterSet):
         request = self.request
         try:
             repository = Repository.objects.get(uuid=value)
-            authorization = repository.get_user_authorization(request.user)
+            authorization = get_user_authorization(request, repository)
             if not authorization.can_read:
                 raise PermissionDenied()
             return repository.examples(queryset=queryset)
@@ -2,6 +2,8 @@ import json
 
 from django.test import TestCase
 from django.test import RequestFactory
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from bothub.common.models import Repository
@@ -104,6 +106,35 @@ class ListExamplesAPITestCase(TestCase):
             content_data.get('count'),
             2)
 
+    def test_queries_count_independent_of_page_size(self):
+        for i in range(200):
+            example = RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='my name is user{}'.format(i),
+                intent='greet')
+            RepositoryExampleEntity.objects.create(
+                repository_example=example,
+                start=11,
+                end=15,
+                entity='hi')
+            RepositoryTranslatedExample.objects.create(
+                original_example=example,
+                language=languages.LANGUAGE_PT,
+                text='meu nome é user{}'.format(i))
+
+        queries_count = {}
+        for limit in [20, 200]:
+            with CaptureQueriesContext(connection) as context:
+                response, content_data = self.request(
+                    {
+                        'repository_uuid': self.repository.uuid,
+                        'limit': limit,
+                    },
+                    self.owner_token)
+            self.assertEqual(len(content_data.get('results')), limit)
+            queries_count[limit] = len(context.captured_queries)
+        self.assertEqual(queries_count[20], queries_count[200])
+
     def test_deleted(self):
         self.example_1.delete()
         response, content_data = self.request({
@@ -149,6 +180,20 @@ class ListExamplesAPITestCase(TestCase):
             content_data.get('count'),
             2)
 
+    def test_search_ranked(self):
+        response, content_data = self.request({
+            'repository_uuid': self.repository.uuid,
+            'search': 'bye',
+        })
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_200_OK)
+        self.assertEqual(
+            list(map(
+                lambda x: x.get('id'),
+                content_data.get('results'))),
+            [self.example_4.id, self.example_3.id])
+
     def test_filter_language(self):
         response, content_data = self.request({
             'repository_uuid': self.repository_2.uuid,
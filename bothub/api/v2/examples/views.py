@@ -1,10 +1,11 @@
 from rest_framework import mixins
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.filters import OrderingFilter
-from rest_framework.filters import SearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
 from bothub.common.models import RepositoryExample
+from bothub.api.pagination import OptionalCursorPagination
+from bothub.api.search import FullTextSearchFilter
 
 from ..example.serializers import RepositoryExampleSerializer
 from ..example.permissions import RepositoryExamplePermission
@@ -14,19 +15,15 @@ from .filters import ExamplesFilter
 class ExamplesViewSet(
         mixins.ListModelMixin,
         GenericViewSet):
-    queryset = RepositoryExample.objects
+    queryset = RepositoryExample.objects.with_entities_and_translations()
     serializer_class = RepositoryExampleSerializer
     filter_class = ExamplesFilter
+    pagination_class = OptionalCursorPagination
     filter_backends = [
         OrderingFilter,
-        SearchFilter,
+        FullTextSearchFilter,
         DjangoFilterBackend,
     ]
-    search_fields = [
-        '$text',
-        '^text',
-        '=text',
-    ]
     ordering_fields = [
         'created_at',
     ]
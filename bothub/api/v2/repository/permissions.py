@@ -1,12 +1,14 @@
 from rest_framework import permissions
 
+from bothub.api.authorization import get_user_authorization
+
 from .. import READ_METHODS
 from .. import WRITE_METHODS
 
 
 class RepositoryPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        authorization = obj.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, obj)
         if request.method in READ_METHODS:
             return authorization.can_read
         if request.user.is_authenticated:
@@ -6,6 +6,7 @@ from bothub.common.models import RepositoryEntityLabel
 from bothub.common.models import RepositoryAuthorization
 from bothub.common.models import RequestRepositoryAuthorization
 from bothub.common.languages import LANGUAGE_CHOICES
+from bothub.api.authorization import get_user_authorization
 from ..request.serializers import RequestRepositoryAuthorizationSerializer
 
 
@@ -31,18 +32,20 @@ class RepositoryEntityLabelSerializer(serializers.ModelSerializer):
     entities = serializers.SerializerMethodField()
     examples__count = serializers.SerializerMethodField()
 
+    def get_labels_status(self, obj):
+        # shared by every label serialized with the same context
+        labels_status = self.context.setdefault('labels_status', {})
+        if obj.repository_id not in labels_status:
+            labels_status[obj.repository_id] = \
+                obj.repository.get_labels_status()
+        return labels_status[obj.repository_id]
+
     def get_entities(self, obj):
-        entities = obj.repository.other_entities \
-            if obj.value == 'other' else obj.entities.all()
-        return map(lambda e: e.value, entities)
+        return self.get_labels_status(obj).get(obj.value).get('entities')
 
     def get_examples__count(self, obj):
-        if obj.value == 'other':
-            return obj.repository.examples(
-                exclude_deleted=True).filter(
-                    entities__entity__in=obj.repository.other_entities) \
-                    .count()
-        return obj.examples().count()
+        return self.get_labels_status(obj).get(obj.value).get(
+            'examples_count')
 
 
 class IntentSerializer(serializers.Serializer):
@@ -133,8 +136,12 @@ class RepositorySerializer(serializers.ModelSerializer):
         source='owner',
         slug_field='nickname',
         read_only=True)
+    available_languages = serializers.ReadOnlyField(
+        source='stats.available_languages')
+    entities_list = serializers.ReadOnlyField(source='stats.entities')
+    labels_list = serializers.ReadOnlyField(source='stats.labels')
     intents = serializers.SerializerMethodField()
-    intents_list = serializers.SerializerMethodField()
+    intents_list = serializers.ReadOnlyField(source='stats.intents')
     categories = RepositoryCategorySerializer(
         many=True,
         read_only=True)
@@ -153,6 +160,10 @@ class RepositorySerializer(serializers.ModelSerializer):
     authorization = serializers.SerializerMethodField()
     request_authorization = serializers.SerializerMethodField()
     available_request_authorization = serializers.SerializerMethodField()
+    ready_for_train = serializers.SerializerMethodField()
+    requirements_to_train = serializers.SerializerMethodField()
+    languages_ready_for_train = serializers.SerializerMethodField()
+    languages_warnings = serializers.SerializerMethodField()
 
     def create(self, validated_data):
         validated_data.update({
@@ -160,29 +171,45 @@ class RepositorySerializer(serializers.ModelSerializer):
         })
         return super().create(validated_data)
 
+    def get_training_readiness(self, obj):
+        if not hasattr(self, '_training_readiness'):
+            self._training_readiness = {}
+        if obj.pk not in self._training_readiness:
+            self._training_readiness[obj.pk] = obj.get_training_readiness()
+        return self._training_readiness[obj.pk]
+
+    def get_ready_for_train(self, obj):
+        return self.get_training_readiness(obj).ready_for_train
+
+    def get_requirements_to_train(self, obj):
+        return self.get_training_readiness(obj).requirements_to_train
+
+    def get_languages_ready_for_train(self, obj):
+        return self.get_training_readiness(obj).languages_ready_for_train
+
+    def get_languages_warnings(self, obj):
+        return self.get_training_readiness(obj).languages_warnings
+
     def get_intents(self, obj):
+        intents_count = obj.intents_count
         return IntentSerializer(
             map(
                 lambda intent: {
                     'value': intent,
-                    'examples__count': obj.examples(
-                        exclude_deleted=True).filter(
-                            intent=intent).count(),
+                    'examples__count': intents_count.get(intent),
                 },
-                obj.intents),
+                sorted(filter(None, intents_count.keys()))),
             many=True).data
 
-    def get_intents_list(self, obj):
-        return obj.intents
-
     def get_other_label(self, obj):
         return RepositoryEntityLabelSerializer(
             RepositoryEntityLabel(
                 repository=obj,
-                value='other')).data
+                value='other'),
+            context=self.context).data
 
     def get_examples__count(self, obj):
-        return obj.examples().count()
+        return obj.stats.examples_count
 
     def get_absolute_url(self, obj):
         return obj.get_absolute_url()
@@ -191,8 +218,11 @@ class RepositorySerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return None
-        return RepositoryAuthorizationSerializer(
-            obj.get_user_authorization(request.user)).data
+        authorization = get_user_authorization(request, obj)
+        # users without a role have no stored authorization nor token
+        if authorization.uuid is None:
+            return None
+        return RepositoryAuthorizationSerializer(authorization).data
 
     def get_request_authorization(self, obj):
         request = self.context.get('request')
@@ -211,7 +241,7 @@ class RepositorySerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        authorization = obj.get_user_authorization(request.user)
+        authorization = get_user_authorization(request, obj)
         if authorization.role is not RepositoryAuthorization.ROLE_NOT_SETTED:
             return False
         if authorization.is_owner:
@@ -253,6 +283,8 @@ class ShortRepositorySerializer(serializers.ModelSerializer):
         slug_field='name',
         many=True,
         read_only=True)
+    available_languages = serializers.ReadOnlyField(
+        source='stats.available_languages')
     owner__nickname = serializers.SlugRelatedField(
         source='owner',
         slug_field='nickname',
@@ -3,12 +3,16 @@ import json
 from django.test import TestCase
 from django.test import RequestFactory
 from django.test.client import MULTIPART_CONTENT
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from rest_framework import status
 
 from bothub.common.models import RepositoryCategory
 from bothub.common.models import Repository
 from bothub.common.models import RequestRepositoryAuthorization
 from bothub.common.models import RepositoryExample
+from bothub.common.models import RepositoryExampleEntity
+from bothub.common.models import RepositoryAuthorization
 from bothub.common.models import RepositoryTranslatedExample
 from bothub.common import languages
 
@@ -302,12 +306,34 @@ class RepositoryAuthorizationTestCase(TestCase):
         for repository in self.repositories:
             user, user_token = (self.owner, self.owner_token) \
                 if repository.is_private else (self.user, self.user_token)
+            stored = repository.get_or_create_user_authorization(user)
             response, content_data = self.request(repository, user_token)
             authorization = content_data.get('authorization')
             self.assertIsNotNone(authorization)
             self.assertEqual(
                 authorization.get('uuid'),
-                str(repository.get_user_authorization(user).uuid))
+                str(stored.uuid))
+
+    def test_authorization_not_stored_on_read(self):
+        repository = self.repositories[1]
+        response, content_data = self.request(repository, self.user_token)
+        self.assertIsNone(content_data.get('authorization'))
+        self.assertFalse(RepositoryAuthorization.objects.filter(
+            user=self.user,
+            repository=repository).exists())
+
+    def test_authorization_resolved_once(self):
+        repository = self.repositories[1]
+        with CaptureQueriesContext(connection) as context:
+            with self.assertNumQueries(17):
+                response, content_data = self.request(
+                    repository,
+                    self.user_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        authorization_queries = list(filter(
+            lambda q: 'common_repositoryauthorization' in q.get('sql'),
+            context.captured_queries))
+        self.assertEqual(len(authorization_queries), 1)
 
 
 class RepositoryAvailableRequestAuthorizationTestCase(TestCase):
@@ -400,6 +426,68 @@ class IntentsInRepositorySerializerTestCase(TestCase):
         intent = repository_data.get('intents')[0]
         self.assertEqual(intent.get('examples__count'), 1)
 
+    def test_many_intents(self):
+        for intent in ['bye', 'bye', 'thanks']:
+            RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text=intent,
+                intent=intent)
+        with self.assertNumQueries(1):
+            intents = RepositorySerializer().get_intents(self.repository)
+        self.assertDictEqual(
+            dict(map(
+                lambda intent: (
+                    intent.get('value'),
+                    intent.get('examples__count'),),
+                intents)),
+            {'bye': 2, 'greet': 1, 'thanks': 1})
+
+
+class LabelsInRepositorySerializerTestCase(TestCase):
+    def setUp(self):
+        self.owner, self.owner_token = create_user_and_token('owner')
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Testing',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+        example = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='my name is douglas and I live in recife')
+        for i, (value, label) in enumerate([
+                ('name', 'person'),
+                ('nickname', 'person'),
+                ('city', 'place'),
+                ('country', 'place'),
+                ('object', None)]):
+            entity = RepositoryExampleEntity.objects.create(
+                repository_example=example,
+                start=i,
+                end=i + 1,
+                entity=value).entity
+            entity.set_label(label)
+            entity.save()
+
+    def test_labels(self):
+        serializer = RepositorySerializer(self.repository)
+        with self.assertNumQueries(2):
+            labels = serializer.fields['labels'].to_representation(
+                self.repository.current_labels)
+            other_label = serializer.get_other_label(self.repository)
+        self.assertDictEqual(
+            dict(map(
+                lambda label: (
+                    label.get('value'),
+                    (sorted(label.get('entities')),
+                     label.get('examples__count'),),),
+                labels + [other_label])),
+            {
+                'person': (['name', 'nickname'], 2,),
+                'place': (['city', 'country'], 2,),
+                'other': (['object'], 1,),
+            })
+
 
 class RepositoriesViewSetTestCase(TestCase):
     def setUp(self):
@@ -2,9 +2,9 @@ from rest_framework.viewsets import GenericViewSet
 from rest_framework import mixins
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter
 
 from bothub.common.models import Repository
+from bothub.api.search import FullTextSearchFilter
 
 from ..metadata import Metadata
 from .serializers import RepositorySerializer
@@ -22,7 +22,7 @@ class RepositoryViewSet(
     """
     Manager repository (bot).
     """
-    queryset = Repository.objects
+    queryset = Repository.objects.select_related('owner', 'stats')
     lookup_field = 'uuid'
     serializer_class = RepositorySerializer
     permission_classes = [
@@ -39,14 +39,10 @@ class RepositoriesViewSet(
     List all public repositories.
     """
     serializer_class = ShortRepositorySerializer
-    queryset = Repository.objects.all().publics().order_by_relevance()
+    queryset = Repository.objects.all().publics().order_by_relevance() \
+        .select_related('stats')
     filter_class = RepositoriesFilter
     filter_backends = [
         DjangoFilterBackend,
-        SearchFilter,
-    ]
-    search_fields = [
-        '$name',
-        '^name',
-        '=name',
+        FullTextSearchFilter,
     ]
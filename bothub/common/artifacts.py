@@ -0,0 +1,116 @@
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from django.db.models.functions import Length
+
+
+class MemoryViewReader(io.RawIOBase):
+    """
+    Read a bytes-like value in place, as BytesIO would copy it.
+    """
+
+    def __init__(self, data):
+        self.view = memoryview(data).cast('B')
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self.view[self.position:self.position + len(b)]
+        b[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        self.position = max(offset, 0)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class DatabaseArtifactStore(object):
+    """
+    Keep trained bot data in RepositoryUpdate.bot_data binary column.
+    """
+
+    name = 'database'
+
+    def save(self, update, data):
+        update.bot_data = data
+        update.bot_data_file = ''
+        return ['bot_data', 'bot_data_file']
+
+    def open(self, update):
+        return MemoryViewReader(update.bot_data)
+
+    def size(self, update):
+        # measured by the database, the deferred column isn't loaded
+        return type(update).objects.filter(pk=update.pk).values_list(
+            Length('bot_data'),
+            flat=True).get()
+
+
+class FileSystemArtifactStore(object):
+    """
+    Keep trained bot data as files in BOTHUB_ARTIFACTS_ROOT, storing only
+    the relative path in RepositoryUpdate.bot_data_file.
+    """
+
+    name = 'filesystem'
+
+    def __init__(self, root=None):
+        self.root = root or settings.BOTHUB_ARTIFACTS_ROOT
+
+    def get_name(self, update):
+        return os.path.join(
+            str(update.repository.uuid),
+            '{}.tar.gz'.format(update.pk))
+
+    def path(self, update):
+        return os.path.join(self.root, update.bot_data_file)
+
+    def save(self, update, data):
+        name = self.get_name(update)
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write aside and rename, readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        update.bot_data = b''
+        update.bot_data_file = name
+        return ['bot_data', 'bot_data_file']
+
+    def open(self, update):
+        return open(self.path(update), 'rb')
+
+    def size(self, update):
+        return os.path.getsize(self.path(update))
+
+
+ARTIFACT_STORES = {
+    DatabaseArtifactStore.name: DatabaseArtifactStore,
+    FileSystemArtifactStore.name: FileSystemArtifactStore,
+}
+
+
+def get_artifact_store(name=None):
+    return ARTIFACT_STORES[name or settings.BOTHUB_ARTIFACT_STORE]()
+
+
+def get_update_artifact_store(update):
+    if update.bot_data_file:
+        return get_artifact_store(FileSystemArtifactStore.name)
+    return get_artifact_store(DatabaseArtifactStore.name)
@@ -0,0 +1,156 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class CachedResponse(object):
+    """
+    Bothub NLP service parse response answered from the analyze cache.
+    """
+
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class AnalyzeCache(object):
+    """
+    In-process LRU cache of analyze results with a time to live. Keys carry
+    the last trained update id, so a new training never reads old results.
+    """
+
+    def __init__(self, max_size=None, ttl=None, clock=None):
+        self.max_size = settings.BOTHUB_ANALYZE_CACHE_SIZE \
+            if max_size is None else max_size
+        self.ttl = ttl or settings.BOTHUB_ANALYZE_CACHE_TTL
+        self.clock = clock or time.monotonic
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def normalize_text(cls, text):
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @classmethod
+    def get_key(cls, repository, language, update, text):
+        return (
+            repository.pk,
+            language,
+            update and update.pk,
+            cls.normalize_text(text),
+        )
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < self.clock():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, value,)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, repository_pk, language):
+        with self.lock:
+            for key in list(self.entries.keys()):
+                if key[0] == repository_pk and key[1] == language:
+                    del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def metrics(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+        }
+
+
+analyze_cache = AnalyzeCache()
+
+
+class ValuesCache(object):
+    """
+    In-process LRU cache of the primary keys of repository values, such
+    as entities and labels. A value keeps its primary key until deleted.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = settings.BOTHUB_VALUES_CACHE_SIZE \
+            if max_size is None else max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, repository_pk, values):
+        r = {}
+        with self.lock:
+            for value in values:
+                key = (repository_pk, value,)
+                pk = self.entries.get(key)
+                if pk is None:
+                    self.misses += 1
+                    continue
+                self.entries.move_to_end(key)
+                self.hits += 1
+                r[value] = pk
+        return r
+
+    def set_many(self, repository_pk, pks):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            for value, pk in pks.items():
+                key = (repository_pk, value,)
+                self.entries[key] = pk
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def discard(self, repository_pk, value):
+        with self.lock:
+            self.entries.pop((repository_pk, value,), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def metrics(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+        }
+
+
+entities_cache = ValuesCache()
+labels_cache = ValuesCache()
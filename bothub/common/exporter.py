@@ -0,0 +1,116 @@
+import csv
+import json
+
+from django.conf import settings
+
+from .models import RepositoryExampleEntity
+from .models import RepositoryTranslatedExample
+from .models import RepositoryTranslatedExampleEntity
+
+
+class Echo(object):
+    """
+    File-like object returning what is written, lets csv.writer build
+    lines to stream.
+    """
+
+    def write(self, value):
+        return value
+
+
+class ExamplesExporter(object):
+    """
+    Stream the examples of a repository update with their entities and
+    translations. Examples are read with a server-side cursor and related
+    rows are loaded per chunk, so memory does not grow with the repository.
+    """
+
+    CSV_HEADER = ['id', 'language', 'intent', 'text', 'entities']
+
+    def __init__(self, update, chunk_size=None):
+        self.update = update
+        self.chunk_size = chunk_size or settings.BOTHUB_EXPORT_CHUNK_SIZE
+
+    def __iter__(self):
+        for chunk in self.get_chunks():
+            yield from self.get_examples_data(chunk)
+
+    def get_chunks(self):
+        examples = self.update.examples.distinct().order_by('id').values(
+            'id',
+            'text',
+            'intent',
+            'repository_update__language')
+        chunk = []
+        for example in examples.iterator(chunk_size=self.chunk_size):
+            chunk.append(example)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def get_entity_data(self, entity):
+        data = entity.get_rasa_nlu_data()
+        data['label'] = entity.entity.label and entity.entity.label.value
+        return data
+
+    def group_entities(self, queryset, key):
+        r = {}
+        for entity in queryset.select_related('entity__label'):
+            r.setdefault(getattr(entity, key), []).append(
+                self.get_entity_data(entity))
+        return r
+
+    def get_examples_data(self, chunk):
+        ids = list(map(lambda x: x.get('id'), chunk))
+        entities = self.group_entities(
+            RepositoryExampleEntity.objects.filter(
+                repository_example__in=ids),
+            'repository_example_id')
+        translated_entities = self.group_entities(
+            RepositoryTranslatedExampleEntity.objects.filter(
+                repository_translated_example__original_example__in=ids),
+            'repository_translated_example_id')
+        translations = {}
+        for translation in RepositoryTranslatedExample.objects.filter(
+                original_example__in=ids).order_by('language').values(
+                    'id', 'original_example', 'language', 'text'):
+            translations.setdefault(
+                translation.get('original_example'),
+                []).append({
+                    'language': translation.get('language'),
+                    'text': translation.get('text'),
+                    'entities': translated_entities.get(
+                        translation.get('id'), []),
+                })
+        for example in chunk:
+            yield {
+                'id': example.get('id'),
+                'language': example.get('repository_update__language'),
+                'intent': example.get('intent'),
+                'text': example.get('text'),
+                'entities': entities.get(example.get('id'), []),
+                'translations': translations.get(example.get('id'), []),
+            }
+
+    def to_ndjson(self):
+        for example in self:
+            yield '{}\n'.format(json.dumps(example))
+
+    def to_csv(self):
+        """
+        One line for each example and one for each of its translations,
+        entities are JSON encoded.
+        """
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.CSV_HEADER)
+        for example in self:
+            for row in [example] + example.get('translations'):
+                yield writer.writerow([
+                    example.get('id'),
+                    row.get('language'),
+                    example.get('intent'),
+                    row.get('text'),
+                    json.dumps(row.get('entities')),
+                ])
@@ -0,0 +1,168 @@
+from django.db import connection
+from django.db import models
+from django.db import transaction
+
+from .models import RepositoryExample
+from .models import RepositoryExampleEntity
+from .models import RepositoryTranslatedExample
+from .models import RepositoryTranslatedExampleEntity
+from .models import RepositoryEntity
+from .models import RepositoryEntityLabel
+from .models import RepositoryStats
+from .search import get_search_backend
+
+
+class ExamplesImporter(object):
+    """
+    Import many validated examples into a repository in one transaction,
+    resolving entities and labels with set-based queries.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def import_examples(self, examples):
+        with transaction.atomic(), RepositoryStats.deferred():
+            updates = self.get_updates(examples)
+            entities = RepositoryEntity.objects.resolve_many(
+                self.repository,
+                self.get_values(examples, 'entity'))
+            self.set_labels(examples, entities)
+
+            instances = list(map(
+                lambda example: RepositoryExample(
+                    repository_update=updates[self.get_language(example)],
+                    **dict(filter(
+                        lambda x: x[0] in ['text', 'intent'],
+                        example.items()))),
+                examples))
+            self.create_examples(instances)
+
+            RepositoryExampleEntity.objects.bulk_create([
+                RepositoryExampleEntity(
+                    repository_example=instance,
+                    start=entity.get('start'),
+                    end=entity.get('end'),
+                    entity_id=entities[entity.get('entity')])
+                for instance, example in zip(instances, examples)
+                for entity in example.get('entities', [])
+            ])
+            RepositoryStats.schedule_refresh(self.repository)
+        return instances
+
+    def get_language(self, example):
+        return example.get('language') or self.repository.language
+
+    def get_updates(self, examples):
+        return dict(map(
+            lambda language: (
+                language,
+                self.repository.current_update(language),),
+            set(map(self.get_language, examples))))
+
+    def get_values(self, examples, key):
+        return set(
+            entity.get(key)
+            for example in examples
+            for entity in example.get('entities', [])
+            if entity.get(key))
+
+    def set_labels(self, examples, entities):
+        labels = RepositoryEntityLabel.objects.resolve_many(
+            self.repository,
+            self.get_values(examples, 'label'))
+        # the last label given to an entity wins, as in sequential writes
+        entity_labels = {}
+        for example in examples:
+            for entity in example.get('entities', []):
+                if 'label' in entity:
+                    entity_labels[entity.get('entity')] = labels.get(
+                        entity.get('label'))
+        label_entities = {}
+        for value, label in entity_labels.items():
+            label_entities.setdefault(label, []).append(entities[value])
+        for label, pks in label_entities.items():
+            RepositoryEntity.objects.filter(pk__in=pks).update(label_id=label)
+
+    def create_examples(self, instances):
+        if connection.features.can_return_ids_from_bulk_insert:
+            RepositoryExample.objects.bulk_create(instances)
+            get_search_backend().index(instances)
+            return
+        for instance in instances:
+            instance.save()
+
+
+class TranslationsImporter(object):
+    """
+    Import many validated translations of examples of a repository in one
+    transaction, resolving the current update of each language once.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def get_original_examples(self, pks):
+        """
+        Examples of the repository by primary key, with what the
+        translation validators read loaded in a fixed number of queries.
+        """
+        return dict(map(
+            lambda example: (example.pk, example,),
+            self.repository.examples().filter(
+                pk__in=pks).select_related('repository_update').defer(
+                    'repository_update__bot_data').prefetch_related(
+                        models.Prefetch(
+                            'entities',
+                            queryset=RepositoryExampleEntity.objects
+                            .select_related('entity')))))
+
+    def get_translated(self, pks):
+        return set(RepositoryTranslatedExample.objects.filter(
+            original_example__in=pks).values_list(
+                'original_example',
+                'language'))
+
+    def import_translations(self, translations):
+        with transaction.atomic(), RepositoryStats.deferred():
+            updates = dict(map(
+                lambda language: (
+                    language,
+                    self.repository.current_update(language),),
+                set(map(lambda t: t.get('language'), translations))))
+            entities = RepositoryEntity.objects.resolve_many(
+                self.repository,
+                set(
+                    entity.get('entity')
+                    for translation in translations
+                    for entity in translation.get('entities', [])))
+
+            instances = list(map(
+                lambda translation: RepositoryTranslatedExample(
+                    repository_update=updates[translation.get('language')],
+                    original_example=translation.get('original_example'),
+                    language=translation.get('language'),
+                    text=translation.get('text')),
+                translations))
+            self.create_translations(instances)
+
+            RepositoryTranslatedExampleEntity.objects.bulk_create([
+                RepositoryTranslatedExampleEntity(
+                    repository_translated_example=instance,
+                    start=entity.get('start'),
+                    end=entity.get('end'),
+                    entity_id=entities[entity.get('entity')])
+                for instance, translation in zip(instances, translations)
+                for entity in translation.get('entities', [])
+            ])
+            # bulk created translations don't add to the languages
+            # counts, they are recounted
+            RepositoryStats.schedule_refresh(self.repository)
+        return instances
+
+    def create_translations(self, instances):
+        if connection.features.can_return_ids_from_bulk_insert:
+            RepositoryTranslatedExample.objects.bulk_create(instances)
+            return
+        for instance in instances:
+            instance.save()
@@ -0,0 +1,39 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from .models import TrainingJob
+
+
+logger = logging.getLogger('bothub.common.jobs')
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            # jobs left running by a stopped process never finish
+            TrainingJob.fail_orphaned()
+            executor = ThreadPoolExecutor(
+                max_workers=settings.BOTHUB_TRAINING_WORKERS)
+    return executor
+
+
+def run_training_job(job_id):
+    try:
+        job = TrainingJob.objects.filter(pk=job_id).first()
+        if not job:
+            return
+        try:
+            job.run()
+        except Exception as e:
+            logger.exception('training job {} failed'.format(job_id))
+            job.finish(TrainingJob.STATUS_FAILED, str(e))
+    finally:
+        connection.close()
@@ -0,0 +1,65 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.conf import settings
+from django.db import connection
+from django.db import reset_queries
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+
+from bothub.authentication.models import User
+from bothub.common.models import Repository
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Create the data of a benchmark and time it in a transaction rolled
+    back at the end. Subclasses implement benchmark().
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **kwargs):
+        if not settings.DEBUG:
+            raise CommandError('Don\'t run this command in production')
+
+        with transaction.atomic():
+            self.benchmark(**kwargs)
+            transaction.set_rollback(True)
+
+    def benchmark(self, **kwargs):
+        raise NotImplementedError()
+
+    def measure(self, fn, runs):
+        durations = []
+        for i in range(runs):
+            # the queries log is bounded, the first runs may fill it
+            reset_queries()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                fn()
+                durations.append((time.perf_counter() - start) * 1000)
+        return '{:.1f} ms in {} queries'.format(
+            statistics.median(durations),
+            len(context.captured_queries))
+
+    def create_users(self, count):
+        # bulk created, no welcome emails are sent
+        User.objects.bulk_create(map(
+            lambda i: User(
+                email='benchmark{}@bothub.it'.format(i),
+                nickname='benchmark{}'.format(i)),
+            range(count)))
+        return list(User.objects.filter(
+            email__startswith='benchmark').order_by('email'))
+
+    def create_repository(self, language):
+        owner, = self.create_users(1)
+        return Repository.objects.create(
+            owner=owner,
+            name='Benchmark',
+            slug='benchmark',
+            language=language)
@@ -0,0 +1,108 @@
+import random
+
+from django.db import models
+
+from bothub.common.management.benchmark import BenchmarkCommand
+from bothub.common.models import RepositoryEntity
+from bothub.common.models import RepositoryEntityLabel
+from bothub.common.models import RepositoryExample
+from bothub.common.models import RepositoryExampleEntity
+from bothub.common import languages
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare the entities and labels in use of a repository read ' + \
+        'with subqueries over its examples against the entities examples ' + \
+        'count. The data created is rolled back.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--examples', type=int, default=10000)
+        parser.add_argument('--entities', type=int, default=50)
+        parser.add_argument('--labels', type=int, default=10)
+
+    def benchmark(self, **kwargs):
+        repository = self.create_data(
+            kwargs.get('examples'),
+            kwargs.get('entities'),
+            kwargs.get('labels'))
+        for name, subqueries, index in [
+                ('entities', self.get_entities_list,
+                 lambda: list(repository.entities_list)),
+                ('labels', self.get_labels_list,
+                 lambda: list(repository.labels_list)),
+                ('other examples count', self.get_other_count,
+                 lambda: repository.other_entities.aggregate(
+                     examples_count=models.Sum('examples_count')))]:
+            self.stdout.write('{}: subqueries {}, counted {}'.format(
+                name,
+                self.measure(
+                    lambda: subqueries(repository),
+                    kwargs.get('runs')),
+                self.measure(index, kwargs.get('runs'))))
+
+    # entities and labels in use, as read before the examples count
+
+    def get_current_entities(self, repository):
+        return repository.entities.filter(value__in=repository.examples(
+            exclude_deleted=True).exclude(
+                entities__entity__value__isnull=True).values_list(
+                    'entities__entity__value',
+                    flat=True).distinct())
+
+    def get_entities_list(self, repository):
+        return list(self.get_current_entities(repository).values_list(
+            'value',
+            flat=True).distinct())
+
+    def get_labels_list(self, repository):
+        return list(repository.labels.filter(
+            entities__value__in=self.get_current_entities(
+                repository).values_list('value', flat=True)).distinct()
+            .values_list('value', flat=True).distinct())
+
+    def get_other_count(self, repository):
+        return repository.examples(exclude_deleted=True).filter(
+            entities__entity__in=self.get_current_entities(
+                repository).filter(label__isnull=True)).count()
+
+    def create_data(self, examples_count, entities_count, labels_count):
+        r = random.Random(0)
+        repository = self.create_repository(languages.LANGUAGE_EN)
+
+        self.stdout.write('Creating {} examples...'.format(examples_count))
+        labels = RepositoryEntityLabel.objects.resolve_many(
+            repository,
+            map(lambda i: 'label{}'.format(i), range(labels_count)))
+        entities = RepositoryEntity.objects.resolve_many(
+            repository,
+            map(lambda i: 'entity{}'.format(i), range(entities_count)))
+        for value, pk in entities.items():
+            # about a third of the entities are left in the other label
+            if r.random() > 1 / 3:
+                RepositoryEntity.objects.filter(pk=pk).update(
+                    label_id=r.choice(list(labels.values())))
+
+        update = repository.current_update()
+        RepositoryExample.objects.bulk_create(
+            map(
+                lambda i: RepositoryExample(
+                    repository_update=update,
+                    text='example {}'.format(i),
+                    intent='intent {}'.format(i % 10)),
+                range(examples_count)),
+            batch_size=500)
+        examples = list(repository.examples())
+        RepositoryExampleEntity.objects.bulk_create(
+            [
+                RepositoryExampleEntity(
+                    repository_example=example,
+                    start=0,
+                    end=7,
+                    entity_id=pk)
+                for example in examples
+                for pk in r.sample(list(entities.values()), r.randint(0, 3))
+            ],
+            batch_size=500)
+        RepositoryEntity.refresh_examples_count(repository)
+        return repository
@@ -0,0 +1,116 @@
+from bothub.common.management.benchmark import BenchmarkCommand
+from bothub.common.models import RepositoryExample
+from bothub.common.models import RepositoryEntity
+from bothub.common.models import RepositoryExampleEntity
+from bothub.common.models import RepositoryTranslatedExample
+from bothub.common.status import LanguagesStatus
+from bothub.common import languages
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare the languages status computed one language at a ' + \
+        'time against the grouped one, growing the languages list. The ' + \
+        'data created is rolled back.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--examples', type=int, default=200)
+
+    def benchmark(self, **kwargs):
+        all_languages = list(languages.VERBOSE_LANGUAGES.keys())
+        repository = self.create_data(all_languages, kwargs.get('examples'))
+        for i in range(1, len(all_languages) + 1):
+            selected = all_languages[:i]
+            self.stdout.write(
+                '{} languages: per language {}, grouped {}'.format(
+                    i,
+                    self.measure(
+                        lambda: dict(map(
+                            lambda language: (
+                                language,
+                                self.language_status(
+                                    repository,
+                                    language),),
+                            selected)),
+                        kwargs.get('runs')),
+                    self.measure(
+                        lambda: LanguagesStatus(
+                            repository,
+                            selected).languages,
+                        kwargs.get('runs'))))
+
+    def language_status(self, repository, language):
+        # the status of one language, as computed before LanguagesStatus
+        examples = repository.examples(language)
+        base_examples = repository.examples(repository.language)
+        base_translations = RepositoryTranslatedExample.objects.filter(
+            original_example__in=base_examples,
+            language=language)
+        base_examples_count = base_examples.count()
+        base_translations_count = base_translations.count()
+        return {
+            'is_base_language': repository.language == language,
+            'examples': {
+                'count': examples.count(),
+                'entities': list(set(filter(
+                    lambda x: x,
+                    examples.values_list(
+                        'entities__entity',
+                        flat=True).distinct()))),
+            },
+            'base_translations': {
+                'count': base_translations_count,
+                'percentage': (base_translations_count / (
+                    base_examples_count if base_examples_count > 0
+                    else 1)) * 100,
+            },
+        }
+
+    def create_data(self, all_languages, examples_count):
+        repository = self.create_repository(all_languages[0])
+
+        self.stdout.write('Creating {} examples in {} languages...'.format(
+            examples_count,
+            len(all_languages)))
+        updates = dict(map(
+            lambda language: (
+                language,
+                repository.current_update(language),),
+            all_languages))
+        RepositoryExample.objects.bulk_create(
+            [
+                RepositoryExample(
+                    repository_update=updates[language],
+                    text='example {}'.format(i),
+                    intent='intent {}'.format(i % 10))
+                for language in all_languages
+                for i in range(examples_count)
+            ],
+            batch_size=500)
+        entities = RepositoryEntity.objects.resolve_many(
+            repository,
+            map(lambda i: 'entity{}'.format(i), range(5)))
+        examples = list(repository.examples())
+        RepositoryExampleEntity.objects.bulk_create(
+            map(
+                lambda x: RepositoryExampleEntity(
+                    repository_example=x[1],
+                    start=0,
+                    end=7,
+                    entity_id=entities['entity{}'.format(x[0] % 5)]),
+                enumerate(examples)),
+            batch_size=500)
+        RepositoryTranslatedExample.objects.bulk_create(
+            [
+                RepositoryTranslatedExample(
+                    repository_update=updates[language],
+                    original_example=example,
+                    language=language,
+                    text=example.text)
+                for example in examples
+                if example.repository_update_id ==
+                updates[all_languages[0]].pk
+                for language in all_languages[1:]
+            ],
+            batch_size=500)
+        return repository
@@ -0,0 +1,101 @@
+import random
+
+from django.db import models
+
+from bothub.common.management.benchmark import BenchmarkCommand
+from bothub.common.models import Repository
+from bothub.common.models import RepositoryExample
+from bothub.common.models import RepositoryStats
+from bothub.common.models import RepositoryUpdate
+from bothub.common.models import RepositoryVote
+from bothub.common import languages
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare the public repositories listing ordered by votes and ' + \
+        'examples summed over joins against the stored relevance. The ' + \
+        'data created is rolled back.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--repositories', type=int, default=100000)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def benchmark(self, **kwargs):
+        self.create_data(kwargs.get('repositories'))
+        summed = Repository.objects.all().publics() \
+            .annotate(votes_summ=models.Sum('votes__vote')) \
+            .annotate(examples_sum=models.Sum('updates__added')) \
+            .order_by('-votes_summ', '-examples_sum', '-created_at') \
+            .select_related('stats')
+        stored = Repository.objects.all().publics() \
+            .order_by_relevance() \
+            .select_related('stats')
+        for name, queryset in [('summed', summed), ('stored', stored)]:
+            self.stdout.write('{}: count {}, page {}'.format(
+                name,
+                self.measure(
+                    lambda: queryset.count(),
+                    kwargs.get('runs')),
+                self.measure(
+                    lambda: list(queryset[:kwargs.get('page_size')]),
+                    kwargs.get('runs'))))
+
+    def create_data(self, repositories_count):
+        r = random.Random(0)
+        owner, *voters = self.create_users(6)
+
+        self.stdout.write('Creating {} repositories...'.format(
+            repositories_count))
+        repositories = list(map(
+            lambda i: Repository(
+                owner=owner,
+                name='Repository {}'.format(i),
+                slug='repository-{}'.format(i),
+                language=languages.LANGUAGE_EN,
+                is_private=i % 10 == 0),
+            range(repositories_count)))
+        Repository.objects.bulk_create(repositories, batch_size=500)
+        RepositoryUpdate.objects.bulk_create(
+            map(
+                lambda repository: RepositoryUpdate(
+                    repository=repository,
+                    language=languages.LANGUAGE_EN),
+                repositories),
+            batch_size=500)
+        updates = dict(RepositoryUpdate.objects.filter(
+            repository__owner=owner).values_list('repository', 'id'))
+
+        votes = []
+        examples = []
+        stats = []
+        for repository in repositories:
+            repository_votes = list(map(
+                lambda voter: RepositoryVote(
+                    user=voter,
+                    repository=repository,
+                    vote=r.choice([
+                        RepositoryVote.UP_VOTE,
+                        RepositoryVote.UP_VOTE,
+                        RepositoryVote.DOWN_VOTE,
+                    ])),
+                r.sample(voters, r.randint(0, 3))))
+            examples_count = r.randint(0, 5)
+            examples += list(map(
+                lambda i: RepositoryExample(
+                    repository_update_id=updates[repository.pk],
+                    text='example {}'.format(i),
+                    intent='greet'),
+                range(examples_count)))
+            votes += repository_votes
+            votes_sum = sum(map(lambda v: v.vote, repository_votes))
+            stats.append(RepositoryStats(
+                repository=repository,
+                votes_sum=votes_sum,
+                examples_count=examples_count,
+                relevance=RepositoryStats.get_relevance(
+                    votes_sum,
+                    examples_count)))
+        RepositoryVote.objects.bulk_create(votes, batch_size=500)
+        RepositoryExample.objects.bulk_create(examples, batch_size=500)
+        RepositoryStats.objects.bulk_create(stats, batch_size=500)
@@ -0,0 +1,79 @@
+# Generated by Django 2.1.3 on 2026-10-18 05:24
+
+import bothub.common.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_repository_stats(apps, *args):
+    Repository = apps.get_model('common', 'Repository')
+    RepositoryStats = apps.get_model('common', 'RepositoryStats')
+    RepositoryExample = apps.get_model('common', 'RepositoryExample')
+    RepositoryTranslatedExample = apps.get_model(
+        'common', 'RepositoryTranslatedExample')
+    RepositoryEntity = apps.get_model('common', 'RepositoryEntity')
+    RepositoryEntityLabel = apps.get_model('common', 'RepositoryEntityLabel')
+    RepositoryVote = apps.get_model('common', 'RepositoryVote')
+
+    for repository in Repository.objects.all():
+        examples = RepositoryExample.objects.filter(
+            repository_update__repository=repository,
+            deleted_in__isnull=True)
+        entities = set(RepositoryEntity.objects.filter(
+            repository=repository,
+            value__in=examples.exclude(
+                entities__entity__value__isnull=True).values_list(
+                    'entities__entity__value', flat=True)).values_list(
+                        'value', flat=True))
+        labels = set(RepositoryEntityLabel.objects.filter(
+            repository=repository,
+            entities__value__in=entities).values_list('value', flat=True))
+        available_languages = set(
+            [repository.language] +
+            list(examples.values_list(
+                'repository_update__language', flat=True)) +
+            list(RepositoryTranslatedExample.objects.filter(
+                original_example__in=examples).values_list(
+                    'language', flat=True)))
+        votes_sum = RepositoryVote.objects.filter(
+            repository=repository).aggregate(
+                votes_sum=models.Sum('vote')).get('votes_sum')
+        RepositoryStats.objects.create(
+            repository=repository,
+            examples_count=examples.count(),
+            votes_sum=votes_sum or 0,
+            intents=sorted(set(examples.exclude(intent='').values_list(
+                'intent', flat=True))),
+            entities=sorted(entities),
+            labels=sorted(labels),
+            available_languages=sorted(available_languages))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0026_auto_20181010_1704'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryStats',
+            fields=[
+                ('repository', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='common.Repository')),
+                ('examples_count', models.PositiveIntegerField(default=0, verbose_name='examples count')),
+                ('votes_sum', models.IntegerField(default=0, verbose_name='votes sum')),
+                ('intents', bothub.common.fields.JSONTextField(default=list, verbose_name='intents')),
+                ('entities', bothub.common.fields.JSONTextField(default=list, verbose_name='entities')),
+                ('labels', bothub.common.fields.JSONTextField(default=list, verbose_name='labels')),
+                ('available_languages', bothub.common.fields.JSONTextField(default=list, verbose_name='available languages')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'repository stats',
+                'verbose_name_plural': 'repository stats',
+            },
+        ),
+        migrations.RunPython(
+            populate_repository_stats,
+            migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 2.1.3 on 2026-10-18 05:43
+
+import base64
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def decode_bot_data(apps, *args):
+    RepositoryUpdate = apps.get_model('common', 'RepositoryUpdate')
+    updates = RepositoryUpdate.objects.exclude(bot_data='').only('id')
+    for update in updates.iterator():
+        bot_data = RepositoryUpdate.objects.filter(
+            pk=update.pk).values_list('bot_data', flat=True).get()
+        RepositoryUpdate.objects.filter(pk=update.pk).update(
+            bot_data_binary=base64.b64decode(bot_data))
+
+
+def encode_bot_data(apps, *args):
+    RepositoryUpdate = apps.get_model('common', 'RepositoryUpdate')
+    updates = RepositoryUpdate.objects.exclude(
+        bot_data_binary=b'',
+        bot_data_file='').only('id')
+    for update in updates.iterator():
+        bot_data, bot_data_file = RepositoryUpdate.objects.filter(
+            pk=update.pk).values_list(
+                'bot_data_binary',
+                'bot_data_file').get()
+        if bot_data_file:
+            # kept by the filesystem artifact store
+            path = os.path.join(
+                settings.BOTHUB_ARTIFACTS_ROOT,
+                bot_data_file)
+            with open(path, 'rb') as f:
+                bot_data = f.read()
+        RepositoryUpdate.objects.filter(pk=update.pk).update(
+            bot_data=base64.b64encode(bytes(bot_data)).decode('utf-8'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0027_repositorystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositoryupdate',
+            name='bot_data_file',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='bot data file'),
+        ),
+        migrations.AddField(
+            model_name='repositoryupdate',
+            name='bot_data_binary',
+            field=models.BinaryField(blank=True, verbose_name='bot data'),
+        ),
+        migrations.RunPython(decode_bot_data, encode_bot_data),
+        migrations.RemoveField(
+            model_name='repositoryupdate',
+            name='bot_data',
+        ),
+        migrations.RenameField(
+            model_name='repositoryupdate',
+            old_name='bot_data_binary',
+            new_name='bot_data',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.1.3 on 2026-10-18 05:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0028_repositoryupdate_bot_data_binary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryUpdateSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(editable=False, max_length=64, unique=True, verbose_name='digest')),
+                ('data', models.BinaryField(verbose_name='data')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'repository update snapshot',
+                'verbose_name_plural': 'repository update snapshots',
+            },
+        ),
+        migrations.AddField(
+            model_name='repositoryupdate',
+            name='snapshot',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='updates', to='common.RepositoryUpdateSnapshot'),
+        ),
+    ]
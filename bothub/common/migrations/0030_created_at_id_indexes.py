@@ -0,0 +1,25 @@
+# Generated by Django 2.1.3 on 2026-10-18 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0029_repositoryupdatesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='repositoryexample',
+            index=models.Index(fields=['created_at', 'id'], name='common_repo_created_7c50fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repositorytranslatedexample',
+            index=models.Index(fields=['created_at', 'id'], name='common_repo_created_835680_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repositoryupdate',
+            index=models.Index(fields=['created_at', 'id'], name='common_repo_created_70c95f_idx'),
+        ),
+    ]
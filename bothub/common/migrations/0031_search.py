@@ -0,0 +1,40 @@
+# Generated by Django 2.1.3 on 2026-10-18 06:10
+
+from django.db import migrations
+
+from bothub.common.search import get_search_backend
+
+
+SEARCH_FIELDS = {
+    'Repository': ['name', 'description'],
+    'RepositoryExample': ['text'],
+}
+
+
+def install_search(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    for model_name, fields in SEARCH_FIELDS.items():
+        backend.install(
+            schema_editor,
+            apps.get_model('common', model_name),
+            fields)
+
+
+def uninstall_search(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    for model_name, fields in SEARCH_FIELDS.items():
+        backend.uninstall(
+            schema_editor,
+            apps.get_model('common', model_name),
+            fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0030_created_at_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
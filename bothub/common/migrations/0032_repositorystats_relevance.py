@@ -0,0 +1,31 @@
+# Generated by Django 2.1.3 on 2026-10-18 06:11
+
+from django.db import migrations, models
+from django.db.models.functions import Least
+
+
+RELEVANCE_VOTES_WEIGHT = 1000000
+
+
+def fill_relevance(apps, *args):
+    RepositoryStats = apps.get_model('common', 'RepositoryStats')
+    RepositoryStats.objects.update(
+        relevance=models.F('votes_sum') * RELEVANCE_VOTES_WEIGHT + Least(
+            models.F('examples_count'),
+            RELEVANCE_VOTES_WEIGHT - 1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0031_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositorystats',
+            name='relevance',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='relevance'),
+        ),
+        migrations.RunPython(fill_relevance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 2.1.3 on 2026-10-18 06:15
+
+import bothub.common.languages
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_languages(apps, *args):
+    RepositoryExample = apps.get_model('common', 'RepositoryExample')
+    RepositoryTranslatedExample = apps.get_model(
+        'common',
+        'RepositoryTranslatedExample')
+    RepositoryLanguage = apps.get_model('common', 'RepositoryLanguage')
+    counts = {}
+    for queryset, repository, language in [
+            (RepositoryExample.objects.filter(deleted_in__isnull=True),
+             'repository_update__repository',
+             'repository_update__language'),
+            (RepositoryTranslatedExample.objects.filter(
+                original_example__deleted_in__isnull=True),
+             'original_example__repository_update__repository',
+             'language')]:
+        for key in queryset.order_by().values(repository, language) \
+                .annotate(count=models.Count('pk')) \
+                .values_list(repository, language, 'count'):
+            counts[key[:2]] = counts.get(key[:2], 0) + key[2]
+    RepositoryLanguage.objects.bulk_create(
+        map(
+            lambda item: RepositoryLanguage(
+                repository_id=item[0][0],
+                language=item[0][1],
+                example_count=item[1]),
+            counts.items()),
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0032_repositorystats_relevance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryLanguage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=5, validators=[bothub.common.languages.validate_language], verbose_name='language')),
+                ('example_count', models.PositiveIntegerField(default=0, verbose_name='example count')),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supported_languages', to='common.Repository')),
+            ],
+            options={
+                'verbose_name': 'repository language',
+                'verbose_name_plural': 'repository languages',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='repositorylanguage',
+            unique_together={('repository', 'language')},
+        ),
+        migrations.RunPython(fill_languages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.1.3 on 2026-10-18 06:31
+
+from django.db import migrations, models
+
+
+def fill_examples_count(apps, *args):
+    RepositoryEntity = apps.get_model('common', 'RepositoryEntity')
+    RepositoryExampleEntity = apps.get_model(
+        'common',
+        'RepositoryExampleEntity')
+    counts = RepositoryExampleEntity.objects.filter(
+        repository_example__deleted_in__isnull=True).values(
+            'entity').annotate(
+                examples_count=models.Count('id')).order_by()
+    pks = {}
+    for x in counts:
+        pks.setdefault(x.get('examples_count'), []).append(x.get('entity'))
+    for examples_count, entities in pks.items():
+        RepositoryEntity.objects.filter(pk__in=entities).update(
+            examples_count=examples_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0033_repositorylanguage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositoryentity',
+            name='examples_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='examples count'),
+        ),
+        migrations.RunPython(fill_examples_count, migrations.RunPython.noop),
+    ]
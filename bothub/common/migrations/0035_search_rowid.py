@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from bothub.common.search import get_search_backend
+from bothub.common.search import SQLiteSearchBackend
+
+
+SEARCH_FIELDS = {
+    'RepositoryExample': ['text'],
+}
+
+
+def reinstall_search(apps, schema_editor):
+    # integer primary keys are the FTS5 rowid now
+    backend = get_search_backend(schema_editor.connection)
+    if not isinstance(backend, SQLiteSearchBackend):
+        return
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model('common', model_name)
+        backend.uninstall(schema_editor, model, fields)
+        backend.install(schema_editor, model, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0034_repositoryentity_examples_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+    ]
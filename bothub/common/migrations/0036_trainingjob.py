@@ -0,0 +1,32 @@
+# Generated by Django 2.1.3 on 2026-10-18 07:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0035_search_rowid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='queued', max_length=10, verbose_name='status')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('active_repository', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='active_training_job', to='common.Repository')),
+                ('authorization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='training_jobs', to='common.RepositoryAuthorization')),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='training_jobs', to='common.Repository')),
+                ('updates', models.ManyToManyField(related_name='training_jobs', to='common.RepositoryUpdate')),
+            ],
+            options={
+                'verbose_name': 'training job',
+                'verbose_name_plural': 'training jobs',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.3 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0036_trainingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingjob',
+            name='worker',
+            field=models.CharField(blank=True, help_text='Host and process id running the job', max_length=255, verbose_name='worker'),
+        ),
+    ]
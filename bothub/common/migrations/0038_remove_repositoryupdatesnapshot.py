@@ -0,0 +1,20 @@
+# Generated by Django 2.1.3 on 2026-10-18 08:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0037_trainingjob_worker'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='repositoryupdate',
+            name='snapshot',
+        ),
+        migrations.DeleteModel(
+            name='RepositoryUpdateSnapshot',
+        ),
+    ]
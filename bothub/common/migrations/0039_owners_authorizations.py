@@ -0,0 +1,31 @@
+# Generated by Django 2.1.3 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+def create_owners_authorizations(apps, *args):
+    Repository = apps.get_model('common', 'Repository')
+    RepositoryAuthorization = apps.get_model(
+        'common',
+        'RepositoryAuthorization')
+    RepositoryAuthorization.objects.bulk_create(map(
+        lambda repository: RepositoryAuthorization(
+            user_id=repository.get('owner'),
+            repository_id=repository.get('uuid')),
+        Repository.objects.exclude(
+            authorizations__user=models.F('owner')).values(
+                'uuid',
+                'owner')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0038_remove_repositoryupdatesnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_owners_authorizations,
+            migrations.RunPython.noop),
+    ]
@@ -1,9 +1,17 @@
+import os
+import socket
+import threading
 import uuid
-import base64
-import requests
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
 
-from functools import reduce
 from django.db import models
+from django.db.models.functions import Cast
+from django.db.models.functions import Least
+from django.db import transaction
+from django.db import IntegrityError
 from django.utils.translation import gettext as _
 from django.utils import timezone
 from django.conf import settings
@@ -16,12 +24,25 @@ from django.core.exceptions import ValidationError
 from bothub.authentication.models import User
 
 from . import languages
+from .fields import JSONTextField
+from .nlp import get_nlp_client
+from .cache import AnalyzeCache
+from .cache import CachedResponse
+from .cache import analyze_cache
+from .cache import entities_cache
+from .cache import labels_cache
+from .artifacts import get_artifact_store
+from .artifacts import get_update_artifact_store
+from .search import get_search_backend
 from .exceptions import RepositoryUpdateAlreadyStartedTraining
 from .exceptions import RepositoryUpdateAlreadyTrained
 from .exceptions import TrainingNotAllowed
 from .exceptions import DoesNotHaveTranslation
+from .exceptions import NLPServiceUnavailable
 
 
+deferred_refreshes = threading.local()
+
 item_key_regex = _lazy_re_compile(r'^[-a-z0-9_]+\Z')
 validate_item_key = RegexValidator(
     item_key_regex,
@@ -54,28 +75,13 @@ class RepositoryQuerySet(models.QuerySet):
         return self.filter(is_private=False)
 
     def order_by_relevance(self):
-        return self \
-            .annotate(votes_summ=models.Sum('votes__vote')) \
-            .annotate(examples_sum=models.Sum('updates__added')) \
-            .order_by('-votes_summ', '-examples_sum', '-created_at')
+        return self.order_by('-stats__relevance', '-created_at')
 
     def supported_language(self, language):
-        valid_examples = RepositoryExample.objects.filter(
-            deleted_in__isnull=True,
-        )
-        valid_updates = RepositoryUpdate.objects.filter(
-            added__in=valid_examples,
-        )
         return self.filter(
             models.Q(language=language)
-            | models.Q(
-                updates__in=valid_updates,
-                updates__language=language,
-            )
-            | models.Q(
-                updates__in=valid_updates,
-                updates__added__translations__language=language,
-            )
+            | models.Q(pk__in=RepositoryLanguage.objects.filter(
+                language=language).values('repository'))
         )
 
 
@@ -90,6 +96,8 @@ class Repository(models.Model):
         verbose_name_plural = _('repositories')
         unique_together = ['owner', 'slug']
 
+    SEARCH_FIELDS = ['name', 'description']
+
     CATEGORIES_HELP_TEXT = _('Categories for approaching repositories with ' +
                              'the same purpose')
     DESCRIPTION_HELP_TEXT = _('Tell what your bot do!')
@@ -149,55 +157,66 @@ class Repository(models.Model):
 
     objects = RepositoryManager()
 
-    nlp_train_url = '{}train/'.format(settings.BOTHUB_NLP_BASE_URL)
-    nlp_analyze_url = '{}parse/'.format(settings.BOTHUB_NLP_BASE_URL)
-
     @classmethod
     def request_nlp_train(cls, user_authorization):
-        r = requests.post(  # pragma: no cover
-            cls.nlp_train_url,
-            data={},
-            headers={'Authorization': 'Bearer {}'.format(
-                user_authorization.uuid)})
-        return r  # pragma: no cover
+        return get_nlp_client().train(user_authorization)
 
     @classmethod
     def request_nlp_analyze(cls, user_authorization, data):
-        r = requests.post(  # pragma: no cover
-            cls.nlp_analyze_url,
-            data={
-                'text': data.get('text'),
-                'language': data.get('language'),
-            },
-            headers={'Authorization': 'Bearer {}'.format(
-                user_authorization.uuid)})
-        return r  # pragma: no cover
+        # the key normalizes the text, NLP gets the original text, entities
+        # offsets are in it
+        text = data.get('text')
+        language = data.get('language')
+        key = AnalyzeCache.get_key(
+            user_authorization.repository,
+            language,
+            user_authorization.repository.last_trained_update(language),
+            text)
+        cached = analyze_cache.get(key)
+        if cached is not None:
+            return CachedResponse(cached)
+        response = get_nlp_client().parse(user_authorization, text, language)
+        if response.status_code == 200:
+            analyze_cache.set(key, response.json())
+        return response
+
+    @classmethod
+    def request_nlp_analyze_batch(cls, user_authorization, data):
+        language = data.get('language')
+        update = user_authorization.repository.last_trained_update(language)
+        texts = data.get('texts')
+        keys = list(map(
+            lambda text: AnalyzeCache.get_key(
+                user_authorization.repository,
+                language,
+                update,
+                text),
+            texts))
+        cached = list(map(analyze_cache.get, keys))
+        results = get_nlp_client().parse_many(
+            user_authorization,
+            [text for text, c in zip(texts, cached) if c is None],
+            language)
+        for text, key, c in zip(texts, keys, cached):
+            if c is not None:
+                yield text, CachedResponse(c)
+                continue
+            text, response = next(results)
+            if getattr(response, 'status_code', None) == 200:
+                analyze_cache.set(key, response.json())
+            yield text, response
 
     @property
     def available_languages(self):
-        examples = self.examples()
-        examples_languages = examples.values_list(
-            'repository_update__language',
-            flat=True)
-        translations_languages = examples.annotate(
-            translations_count=models.Count('translations')).filter(
-                translations_count__gt=0).values_list(
-                    'translations__language',
-                    flat=True)
         return list(set(
             [self.language] +
-            list(examples_languages) +
-            list(translations_languages)))
+            list(self.supported_languages.values_list(
+                'language',
+                flat=True))))
 
     @property
     def languages_status(self):
-        return dict(
-            map(
-                lambda language: (
-                    language,
-                    self.language_status(language)),
-                settings.SUPPORTED_LANGUAGES.keys(),
-            ))
+        return self.get_languages_status()
 
     @property
     def current_updates(self):
@@ -207,32 +226,19 @@ class Repository(models.Model):
 
     @property
     def requirements_to_train(self):
-        return dict(filter(
-            lambda l: l[1],
-            map(
-                lambda u: (u.language, u.requirements_to_train,),
-                self.current_updates)))
+        return self.get_training_readiness().requirements_to_train
 
     @property
     def languages_ready_for_train(self):
-        return dict(map(
-                lambda u: (u.language, u.ready_for_train,),
-                self.current_updates))
+        return self.get_training_readiness().languages_ready_for_train
 
     @property
     def ready_for_train(self):
-        return reduce(
-            lambda current, u: u.ready_for_train or current,
-            self.current_updates,
-            False)
+        return self.get_training_readiness().ready_for_train
 
     @property
     def languages_warnings(self):
-        return dict(filter(
-                lambda w: len(w[1]) > 0,
-                map(
-                    lambda u: (u.language, u.warnings,),
-                    self.current_updates)))
+        return self.get_training_readiness().languages_warnings
 
     @property
     def votes_sum(self):
@@ -240,37 +246,41 @@ class Repository(models.Model):
             votes_sum=models.Sum('vote')).get('votes_sum')
 
     @property
-    def intents(self):
-        return list(set(self.examples(
-            exclude_deleted=True).exclude(
-                intent='').values_list(
+    def intents_count(self):
+        """
+        Examples count by intent, examples without intent are counted
+        under an empty intent.
+        """
+        return dict(self.examples(exclude_deleted=True).values(
+            'intent').annotate(
+                examples_count=models.Count('id')).order_by().values_list(
                     'intent',
-                    flat=True)))
+                    'examples_count'))
+
+    @property
+    def intents(self):
+        return list(filter(None, self.intents_count.keys()))
 
     @property
     def current_entities(self):
-        return self.entities.filter(value__in=self.examples(
-            exclude_deleted=True).exclude(
-                entities__entity__value__isnull=True).values_list(
-                    'entities__entity__value',
-                    flat=True).distinct())
+        return self.entities.filter(examples_count__gt=0)
 
     @property
     def entities_list(self):
         return self.current_entities.values_list(
             'value',
-            flat=True).distinct()
+            flat=True)
 
     @property
     def current_labels(self):
         return self.labels.filter(
-            entities__value__in=self.entities_list).distinct()
+            entities__examples_count__gt=0).distinct()
 
     @property
     def labels_list(self):
         return self.current_labels.values_list(
             'value',
-            flat=True).distinct()
+            flat=True)
 
     @property
     def other_entities(self):
@@ -304,37 +314,19 @@ class Repository(models.Model):
         return query
 
     def language_status(self, language):
-        is_base_language = self.language == language
-        examples = self.examples(language)
-        base_examples = self.examples(self.language)
-        base_translations = RepositoryTranslatedExample.objects.filter(
-            original_example__in=base_examples,
-            language=language)
-
-        examples_count = examples.count()
-        base_examples_count = base_examples.count()
-        base_translations_count = base_translations.count()
-        base_translations_percentage = (
-            base_translations_count / (
-                base_examples_count if base_examples_count > 0 else 1)) * 100
+        return self.get_languages_status([language]).get(language)
 
-        return {
-            'is_base_language': is_base_language,
-            'examples': {
-                'count': examples_count,
-                'entities': list(
-                    set(
-                        filter(
-                            lambda x: x,
-                            examples.values_list(
-                                'entities__entity',
-                                flat=True).distinct()))),
-            },
-            'base_translations': {
-                'count': base_translations_count,
-                'percentage': base_translations_percentage,
-            },
-        }
+    def get_languages_status(self, languages=None):
+        from .status import LanguagesStatus
+        return LanguagesStatus(self, languages).languages
+
+    def get_labels_status(self):
+        from .status import LabelsStatus
+        return LabelsStatus(self)
+
+    def get_training_readiness(self):
+        from .training import TrainingReadiness
+        return TrainingReadiness(self)
 
     def current_update(self, language=None):
         language = language or self.language
@@ -352,12 +344,37 @@ class Repository(models.Model):
 
     def get_user_authorization(self, user):
         if user.is_anonymous:
-            return RepositoryAuthorization(repository=self)
+            return RepositoryAuthorization(uuid=None, repository=self)
+        if user.pk == self.owner_id:
+            return self.get_or_create_user_authorization(user)
+        get = RepositoryAuthorization.objects.filter(
+            user=user,
+            repository=self).first()
+        if get:
+            get.repository = self
+            return get
+        # resolved in memory without a token, the token is only created
+        # with the row, by get_or_create_user_authorization
+        return RepositoryAuthorization(
+            uuid=None,
+            user=user,
+            repository=self)
+
+    def get_or_create_user_authorization(self, user):
         get, created = RepositoryAuthorization.objects.get_or_create(
             user=user,
             repository=self)
+        get.repository = self
         return get
 
+    def get_nlp_authorization(self, user):
+        """
+        Stored authorization whose token is sent to Bothub NLP service,
+        anonymous users of a public repository use the owner's.
+        """
+        return self.get_or_create_user_authorization(
+            self.owner if user.is_anonymous else user)
+
     def get_absolute_url(self):
         return '{}{}/{}/'.format(
             settings.BOTHUB_WEBAPP_BASE_URL,
@@ -365,11 +382,20 @@ class Repository(models.Model):
             self.slug)
 
 
+class RepositoryUpdateManager(models.Manager):
+    def get_queryset(self):
+        # trained bot data can take megabytes, load it only when used
+        return super().get_queryset().defer('bot_data')
+
+
 class RepositoryUpdate(models.Model):
     class Meta:
         verbose_name = _('repository update')
         verbose_name_plural = _('repository updates')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     MIN_EXAMPLES_PER_INTENT = 2
     MIN_EXAMPLES_PER_ENTITY = 2
@@ -390,10 +416,15 @@ class RepositoryUpdate(models.Model):
     created_at = models.DateTimeField(
         _('created at'),
         auto_now_add=True)
-    bot_data = models.TextField(
+    bot_data = models.BinaryField(
         _('bot data'),
         blank=True,
         editable=False)
+    bot_data_file = models.CharField(
+        _('bot data file'),
+        max_length=255,
+        blank=True,
+        editable=False)
     by = models.ForeignKey(
         User,
         models.CASCADE,
@@ -416,6 +447,8 @@ class RepositoryUpdate(models.Model):
         blank=True,
         editable=False)
 
+    objects = RepositoryUpdateManager()
+
     @property
     def examples(self):
         examples = self.repository.examples(exclude_deleted=False).filter(
@@ -433,80 +466,11 @@ class RepositoryUpdate(models.Model):
 
     @property
     def requirements_to_train(self):
-        try:
-            self.validate_init_train()
-        except RepositoryUpdateAlreadyTrained:
-            return [_('This bot version has already been trained.')]
-        except RepositoryUpdateAlreadyStartedTraining:
-            return [_('This bot version is being trained.')]
-
-        r = []
-
-        intents = self.examples.values_list('intent', flat=True)
-
-        if '' in intents:
-            r.append(_('All examples need have a intent.'))
-
-        weak_intents = self.examples.values('intent').annotate(
-            intent_count=models.Count('id')).order_by().exclude(
-                intent_count__gte=self.MIN_EXAMPLES_PER_INTENT)
-        if weak_intents.exists():
-            for i in weak_intents:
-                r.append(_('Intent "{}" has only {} examples. ' +
-                           'Minimum is {}.').format(
-                        i.get('intent'),
-                        i.get('intent_count'),
-                        self.MIN_EXAMPLES_PER_INTENT))
-
-        weak_entities = self.examples.annotate(
-            es_count=models.Count('entities')).filter(
-                es_count__gte=1).values(
-                    'entities__entity__value').annotate(
-                        entities_count=models.Count('id')).order_by().exclude(
-                            entities_count__gte=self.MIN_EXAMPLES_PER_ENTITY)
-        if weak_entities.exists():
-            for e in weak_entities:
-                r.append(_('Entity "{}" has only {} examples. ' +
-                           'Minimum is {}.').format(
-                        e.get('entities__entity__value'),
-                        e.get('entities_count'),
-                        self.MIN_EXAMPLES_PER_ENTITY))
-
-        return r
+        return self.get_training_readiness().requirements_to_train
 
     @property
     def ready_for_train(self):
-        if self.training_started_at:
-            return False
-
-        if len(self.requirements_to_train) > 0:
-            return False
-
-        previous_update = self.repository.updates.filter(
-            language=self.language,
-            by__isnull=False,
-            training_started_at__isnull=False,
-            created_at__lt=self.created_at).first()
-
-        if previous_update:
-            if previous_update.use_language_model_featurizer is not \
-               self.repository.use_language_model_featurizer:
-                return True
-            if previous_update.use_competing_intents is not \
-               self.repository.use_competing_intents:
-                return True
-            if previous_update.failed_at:
-                return True
-
-        if not self.added.exists() and \
-           not self.translated_added.exists() and \
-           not self.deleted.exists():
-            return False
-
-        if self.examples.count() == 0:
-            return False
-
-        return len(self.requirements_to_train) is 0
+        return self.get_training_readiness().ready_for_train
 
     @property
     def intents(self):
@@ -524,6 +488,12 @@ class RepositoryUpdate(models.Model):
     def __str__(self):
         return 'Repository Update #{}'.format(self.id)
 
+    def get_training_readiness(self):
+        from .training import TrainingReadiness
+        return TrainingReadiness(
+            self.repository,
+            updates=[self]).languages.get(self.language)
+
     def validate_init_train(self, by=None):
         if self.trained_at:
             raise RepositoryUpdateAlreadyTrained()
@@ -549,20 +519,28 @@ class RepositoryUpdate(models.Model):
                 'use_competing_intents',
             ])
 
+    def build_training_data(self):
+        from .training import TrainingDataBuilder
+        return TrainingDataBuilder(self).build()
+
     def save_training(self, bot_data):
         if self.trained_at:
             raise RepositoryUpdateAlreadyTrained()
 
         self.trained_at = timezone.now()
-        self.bot_data = base64.b64encode(bot_data).decode('utf8')
-        self.save(
-            update_fields=[
-                'trained_at',
-                'bot_data',
-            ])
+        update_fields = get_artifact_store().save(self, bot_data)
+        self.save(update_fields=['trained_at'] + update_fields)
+        analyze_cache.invalidate(self.repository_id, self.language)
 
     def get_bot_data(self):
-        return base64.b64decode(self.bot_data)
+        with self.open_bot_data() as f:
+            return f.read()
+
+    def open_bot_data(self):
+        return get_update_artifact_store(self).open(self)
+
+    def get_bot_data_size(self):
+        return get_update_artifact_store(self).size(self)
 
     def train_fail(self):
         self.failed_at = timezone.now()
@@ -572,11 +550,46 @@ class RepositoryUpdate(models.Model):
             ])
 
 
+class RepositoryExampleQueryset(models.QuerySet):
+    def with_entities_and_translations(self):
+        """
+        Load everything the examples serializers read, entities with their
+        labels and translations with their entities, in a fixed number of
+        queries.
+        """
+        return self.select_related('repository_update').defer(
+            'repository_update__bot_data').prefetch_related(
+                models.Prefetch(
+                    'entities',
+                    queryset=RepositoryExampleEntity.objects.select_related(
+                        'entity__label')),
+                models.Prefetch(
+                    'translations',
+                    queryset=RepositoryTranslatedExample.objects
+                    .prefetch_related(models.Prefetch(
+                        'entities',
+                        queryset=RepositoryTranslatedExampleEntity.objects
+                        .select_related('entity')))))
+
+
+class RepositoryExampleManager(models.Manager):
+    def get_queryset(self):
+        return RepositoryExampleQueryset(self.model, using=self._db)
+
+    def with_entities_and_translations(self):
+        return self.get_queryset().with_entities_and_translations()
+
+
 class RepositoryExample(models.Model):
     class Meta:
         verbose_name = _('repository example')
         verbose_name_plural = _('repository examples')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
+    SEARCH_FIELDS = ['text']
 
     repository_update = models.ForeignKey(
         RepositoryUpdate,
@@ -602,6 +615,8 @@ class RepositoryExample(models.Model):
         _('created at'),
         auto_now_add=True)
 
+    objects = RepositoryExampleManager()
+
     @property
     def language(self):
         return self.repository_update.language
@@ -628,12 +643,54 @@ class RepositoryExample(models.Model):
         return self.get_translation(language).entities.all()
 
     def delete(self):
-        self.deleted_in = self.repository_update.repository.current_update(
+        repository = self.repository_update.repository
+        if self.deleted_in_id is None:
+            RepositoryStats.add_counts(repository.pk, examples_count=-1)
+            RepositoryEntity.add_examples_count(
+                list(self.entities.values_list('entity', flat=True)),
+                delta=-1)
+            languages_changed = RepositoryLanguage.add_example_count(
+                repository.pk,
+                [self.repository_update.language] + list(
+                    self.translations.values_list('language', flat=True)),
+                delta=-1)
+            RepositoryStats.schedule_refresh(
+                repository,
+                fields=['entities', 'labels'] + (
+                    ['available_languages'] if languages_changed else []))
+        self.deleted_in = repository.current_update(
             self.repository_update.language)
         self.save(update_fields=['deleted_in'])
 
 
+class RepositoryTranslatedExampleQueryset(models.QuerySet):
+    def with_entities(self):
+        """
+        Load the original examples and the entities of the translations
+        and of their original examples, so has_valid_entities of a page of
+        translations is checked in a fixed number of queries.
+        """
+        return self.select_related(
+            'original_example__repository_update').defer(
+                'original_example__repository_update__bot_data'
+            ).prefetch_related(
+                models.Prefetch(
+                    'entities',
+                    queryset=RepositoryTranslatedExampleEntity.objects
+                    .select_related('entity')),
+                models.Prefetch(
+                    'original_example__entities',
+                    queryset=RepositoryExampleEntity.objects
+                    .select_related('entity')))
+
+
 class RepositoryTranslatedExampleManager(models.Manager):
+    def get_queryset(self):
+        return RepositoryTranslatedExampleQueryset(self.model, using=self._db)
+
+    def with_entities(self):
+        return self.get_queryset().with_entities()
+
     def create(self, *args, original_example=None, language=None, **kwargs):
         repository = original_example.repository_update.repository
         return super().create(
@@ -650,6 +707,9 @@ class RepositoryTranslatedExample(models.Model):
         verbose_name_plural = _('repository translated examples')
         unique_together = ['original_example', 'language']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     repository_update = models.ForeignKey(
         RepositoryUpdate,
@@ -678,30 +738,13 @@ class RepositoryTranslatedExample(models.Model):
 
     objects = RepositoryTranslatedExampleManager()
 
-    def entities_list_lambda_sort(item):
-        return item.get('entity')
-
     @classmethod
     def same_entities_validator(cls, a, b):
-        a_len = len(a)
-        if a_len != len(b):
-            return False
-        a_sorted = sorted(
-            a,
-            key=cls.entities_list_lambda_sort)
-        b_sorted = sorted(
-            b,
-            key=cls.entities_list_lambda_sort)
-        for i in range(a_len):
-            if a_sorted[i].get('entity') != b_sorted[i].get('entity'):
-                return False
-        return True
+        return cls.count_entities(a) == cls.count_entities(b)
 
     @classmethod
     def count_entities(cls, entities_list, to_str=False):
-        r = {}
-        for e in entities_list:
-            r.update({e.get('entity'): r.get('entity', 0) + 1})
+        r = Counter(map(lambda e: e.get('entity'), entities_list))
         if to_str:
             r = ', '.join(map(
                 lambda x: '{} {}'.format(x[1], x[0]),
@@ -716,20 +759,92 @@ class RepositoryTranslatedExample(models.Model):
             list(map(lambda x: x.to_dict, original_entities)),
             list(map(lambda x: x.to_dict, my_entities)))
 
+    def delete(self, *args, **kwargs):
+        original_example = self.original_example
+        repository = original_example.repository_update.repository
+        result = super().delete(*args, **kwargs)
+        # the translations of deleted examples were subtracted with them
+        if original_example.deleted_in_id is None and \
+                RepositoryLanguage.add_example_count(
+                    repository.pk,
+                    [self.language],
+                    delta=-1):
+            RepositoryStats.schedule_refresh(
+                repository,
+                fields=['available_languages'])
+        return result
+
+
+class RepositoryValueQueryset(models.QuerySet):
+    """
+    Resolve values of a repository, as entities or labels, to their
+    primary keys. Known values are read from an in-process cache, the
+    others with one query, and the missing ones are created together.
+    """
+
+    cache = None
 
-class RepositoryEntityLabelQueryset(models.QuerySet):
     def get(self, repository, value):
-        try:
-            return super().get(
-                repository=repository,
-                value=value)
-        except self.model.DoesNotExist:
-            return super().create(
-                repository=repository,
-                value=value)
-
+        return super().get(pk=self.resolve(repository, value))
+
+    def resolve(self, repository, value):
+        return self.resolve_many(repository, [value]).get(value)
+
+    def resolve_many(self, repository, values):
+        repository_pk = getattr(repository, 'pk', repository)
+        values = set(values)
+        r = self.cache.get_many(repository_pk, values)
+        missing = values - set(r.keys())
+        if not missing:
+            return r
+        found = dict(self.filter(
+            repository_id=repository_pk,
+            value__in=missing).values_list('value', 'pk'))
+        if missing - set(found.keys()):
+            found.update(self.create_many(
+                repository_pk,
+                missing - set(found.keys())))
+        # rows created by a transaction rolled back later must not be
+        # cached, on_commit runs at once out of a transaction
+        transaction.on_commit(
+            lambda: self.cache.set_many(repository_pk, found))
+        r.update(found)
+        return r
 
-class RepositoryEntityLabelManager(models.Manager):
+    def create_many(self, repository_pk, values):
+        try:
+            with transaction.atomic():
+                self.bulk_create(map(
+                    lambda value: self.model(
+                        repository_id=repository_pk,
+                        value=value),
+                    values))
+        except IntegrityError:
+            # some were created by a concurrent writer
+            for value in values:
+                try:
+                    with transaction.atomic():
+                        self.create(repository_id=repository_pk, value=value)
+                except IntegrityError:
+                    pass
+        return dict(self.filter(
+            repository_id=repository_pk,
+            value__in=values).values_list('value', 'pk'))
+
+
+class RepositoryValueManager(models.Manager):
+    def resolve(self, repository, value):
+        return self.get_queryset().resolve(repository, value)
+
+    def resolve_many(self, repository, values):
+        return self.get_queryset().resolve_many(repository, values)
+
+
+class RepositoryEntityLabelQueryset(RepositoryValueQueryset):
+    cache = labels_cache
+
+
+class RepositoryEntityLabelManager(RepositoryValueManager):
     def get_queryset(self):
         return RepositoryEntityLabelQueryset(self.model, using=self._db)
 
@@ -762,19 +877,11 @@ class RepositoryEntityLabel(models.Model):
                 entities__entity__label=self)
 
 
-class RepositoryEntityQueryset(models.QuerySet):
-    def get(self, repository, value):
-        try:
-            return super().get(
-                repository=repository,
-                value=value)
-        except self.model.DoesNotExist:
-            return super().create(
-                repository=repository,
-                value=value)
+class RepositoryEntityQueryset(RepositoryValueQueryset):
+    cache = entities_cache
 
 
-class RepositoryEntityManager(models.Manager):
+class RepositoryEntityManager(RepositoryValueManager):
     def get_queryset(self):
         return RepositoryEntityQueryset(self.model, using=self._db)
 
@@ -798,29 +905,97 @@ class RepositoryEntity(models.Model):
         related_name='entities',
         null=True,
         blank=True)
+    examples_count = models.PositiveIntegerField(
+        _('examples count'),
+        default=0,
+        editable=False)
     created_at = models.DateTimeField(
         _('created at'),
         auto_now_add=True)
 
     objects = RepositoryEntityManager()
 
+    @classmethod
+    def add_examples_count(cls, entities, delta=1):
+        """
+        Add delta to the examples count of each entity once for each of
+        its marks in entities, a list of entities pks.
+        """
+        pks_by_marks = {}
+        for pk, marks in Counter(entities).items():
+            pks_by_marks.setdefault(marks, []).append(pk)
+        for marks, pks in pks_by_marks.items():
+            cls.objects.filter(pk__in=pks).update(
+                examples_count=models.F('examples_count') + marks * delta)
+
+    @classmethod
+    def refresh_examples_count(cls, repository):
+        """
+        Count the marks of each entity in the examples not deleted, an
+        example marked twice with an entity counts twice. Returns the
+        counts of the entities in use by value.
+
+        Writes keep the counts with add_examples_count, the recount
+        repairs them, after bulk writes or in migrations.
+        """
+        counts = list(RepositoryExampleEntity.objects.filter(
+            repository_example__repository_update__repository=repository,
+            repository_example__deleted_in__isnull=True).values(
+                'entity',
+                'entity__value').annotate(
+                    examples_count=models.Count('id')).order_by())
+        examples_count_by_pk = dict(map(
+            lambda x: (x.get('entity'), x.get('examples_count'),),
+            counts))
+        changed = {}
+        for pk, examples_count in cls.objects.filter(
+                repository_id=repository.pk).values_list(
+                    'pk',
+                    'examples_count'):
+            new_examples_count = examples_count_by_pk.get(pk, 0)
+            if examples_count != new_examples_count:
+                changed.setdefault(new_examples_count, []).append(pk)
+        for examples_count, pks in changed.items():
+            cls.objects.filter(pk__in=pks).update(
+                examples_count=examples_count)
+        return dict(map(
+            lambda x: (x.get('entity__value'), x.get('examples_count'),),
+            counts))
+
+    def save(self, *args, **kwargs):
+        # examples_count is kept by add_examples_count, an instance
+        # read before the last example write must not overwrite it
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = list(map(
+                lambda field: field.name,
+                filter(
+                    lambda field: not field.primary_key and
+                    field.name != 'examples_count',
+                    self._meta.concrete_fields)))
+        super().save(*args, **kwargs)
+
     def set_label(self, value):
         if not value:
             self.label = None
-        else:
-            self.label = RepositoryEntityLabel.objects.get(
-                repository=self.repository,
-                value=value)
+            return
+        label_id = RepositoryEntityLabel.objects.resolve(
+            self.repository_id,
+            value)
+        if label_id != self.label_id:
+            if RepositoryEntity.label.is_cached(self):
+                RepositoryEntity.label.field.delete_cached_value(self)
+            self.label_id = label_id
 
 
 class EntityBaseQueryset(models.QuerySet):
     def create(self, entity, **kwargs):
         if type(entity) is not RepositoryEntity:
-            instance = self.model(**kwargs)
-            repository = instance.example.repository_update.repository
-            entity = RepositoryEntity.objects.get(
-                repository=repository,
-                value=entity)
+            example = kwargs.get(self.model.EXAMPLE_FIELD)
+            return super().create(
+                entity_id=RepositoryEntity.objects.resolve(
+                    example.repository_update.repository_id,
+                    entity),
+                **kwargs)
         return super().create(
             entity=entity,
             **kwargs)
@@ -886,6 +1061,8 @@ class EntityBase(models.Model):
 
 
 class RepositoryExampleEntity(EntityBase):
+    EXAMPLE_FIELD = 'repository_example'
+
     repository_example = models.ForeignKey(
         RepositoryExample,
         models.CASCADE,
@@ -898,6 +1075,8 @@ class RepositoryExampleEntity(EntityBase):
 
 
 class RepositoryTranslatedExampleEntity(EntityBase):
+    EXAMPLE_FIELD = 'repository_translated_example'
+
     repository_translated_example = models.ForeignKey(
         RepositoryTranslatedExample,
         models.CASCADE,
@@ -954,12 +1133,7 @@ class RepositoryAuthorization(models.Model):
 
     @property
     def level(self):
-        try:
-            user = self.user
-        except User.DoesNotExist:
-            user = None
-
-        if user and self.repository.owner == user:
+        if self.is_owner:
             return RepositoryAuthorization.LEVEL_ADMIN
 
         if self.role == RepositoryAuthorization.ROLE_NOT_SETTED:
@@ -1005,11 +1179,9 @@ class RepositoryAuthorization(models.Model):
 
     @property
     def is_owner(self):
-        try:
-            user = self.user
-        except User.DoesNotExist:
+        if self.user_id is None:
             return False
-        return self.repository.owner == user
+        return self.repository.owner_id == self.user_id
 
     @property
     def role_verbose(self):
@@ -1069,6 +1241,274 @@ class RepositoryVote(models.Model):
         _('vote'),
         choices=VOTE_CHOICES)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the votes sum adds the difference to the stored vote
+        instance._loaded_vote = instance.vote
+        return instance
+
+
+class RepositoryStats(models.Model):
+    class Meta:
+        verbose_name = _('repository stats')
+        verbose_name_plural = _('repository stats')
+
+    RELEVANCE_VOTES_WEIGHT = 1000000
+
+    EXAMPLES_FIELDS = [
+        'intents',
+    ]
+
+    repository = models.OneToOneField(
+        Repository,
+        models.CASCADE,
+        primary_key=True,
+        related_name='stats')
+    examples_count = models.PositiveIntegerField(
+        _('examples count'),
+        default=0)
+    votes_sum = models.IntegerField(
+        _('votes sum'),
+        default=0)
+    intents = JSONTextField(
+        _('intents'),
+        default=list)
+    entities = JSONTextField(
+        _('entities'),
+        default=list)
+    labels = JSONTextField(
+        _('labels'),
+        default=list)
+    available_languages = JSONTextField(
+        _('available languages'),
+        default=list)
+    relevance = models.BigIntegerField(
+        _('relevance'),
+        default=0,
+        db_index=True,
+        editable=False)
+    updated_at = models.DateTimeField(
+        _('updated at'),
+        auto_now=True)
+
+    @classmethod
+    def get_relevance(cls, votes_sum, examples_count):
+        """
+        Rank by votes and then by examples, a vote outweighs up to
+        RELEVANCE_VOTES_WEIGHT - 1 examples.
+        """
+        return votes_sum * cls.RELEVANCE_VOTES_WEIGHT + min(
+            examples_count,
+            cls.RELEVANCE_VOTES_WEIGHT - 1)
+
+    @classmethod
+    def add_counts(cls, repository_id, examples_count=0, votes_sum=0):
+        """
+        Add to the stored counters in a single UPDATE, the relevance is
+        computed from the new counters in the same statement.
+        """
+        new_examples_count = models.F('examples_count') + examples_count
+        new_votes_sum = models.F('votes_sum') + votes_sum
+        cls.objects.filter(repository_id=repository_id).update(
+            examples_count=new_examples_count,
+            votes_sum=new_votes_sum,
+            relevance=models.ExpressionWrapper(
+                Cast(new_votes_sum, models.BigIntegerField()) *
+                cls.RELEVANCE_VOTES_WEIGHT +
+                Least(new_examples_count, cls.RELEVANCE_VOTES_WEIGHT - 1),
+                output_field=models.BigIntegerField()),
+            updated_at=timezone.now())
+
+    def save(self, *args, **kwargs):
+        self.relevance = self.get_relevance(
+            self.votes_sum,
+            self.examples_count)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = list(update_fields) + ['relevance']
+        super().save(*args, **kwargs)
+
+    @classmethod
+    @contextmanager
+    def deferred(cls):
+        """
+        Refresh the stats of each repository written in the block once,
+        with the fields of every write, when the block ends.
+        """
+        if getattr(deferred_refreshes, 'pending', None) is not None:
+            yield
+            return
+        deferred_refreshes.pending = {}
+        try:
+            yield
+            pending = deferred_refreshes.pending
+        finally:
+            deferred_refreshes.pending = None
+        for repository, fields in pending.values():
+            cls.refresh(repository, fields)
+
+    @classmethod
+    def schedule_refresh(cls, repository, fields=None):
+        pending = getattr(deferred_refreshes, 'pending', None)
+        if pending is None:
+            return cls.refresh(repository, fields)
+        scheduled, scheduled_fields = pending.get(
+            repository.pk,
+            (repository, [],))
+        pending[repository.pk] = (
+            scheduled,
+            None if fields is None or scheduled_fields is None
+            else scheduled_fields + list(fields),)
+
+    @classmethod
+    def refresh(cls, repository, fields=None):
+        """
+        Write the lists of fields, read from the examples counts kept by
+        the writes. Without fields everything is recounted, to create
+        the stats or repair them after bulk writes.
+        """
+        if fields is None:
+            return cls.recount(repository)
+        getters = {
+            'intents': lambda: sorted(filter(
+                None,
+                repository.intents_count.keys())),
+            'entities': lambda: sorted(repository.entities_list),
+            'labels': lambda: sorted(repository.labels_list),
+            'available_languages': lambda: sorted(
+                repository.available_languages),
+        }
+        # the counters are added by other writes, only the lists are
+        # written and no row lock is taken
+        cls.objects.filter(repository_id=repository.pk).update(
+            updated_at=timezone.now(),
+            **dict(map(
+                lambda field: (field, getters[field](),),
+                filter(lambda field: field in fields, getters.keys()))))
+
+    @classmethod
+    def recount(cls, repository):
+        # examples_count and intents share one grouped query
+        intents_count = lru_cache(maxsize=None)(
+            lambda: repository.intents_count)
+        with transaction.atomic():
+            # computed under the row lock, concurrent recounts don't
+            # store stale values
+            stats, created = cls.objects.select_for_update().get_or_create(
+                repository_id=repository.pk)
+            stats.examples_count = sum(intents_count().values())
+            stats.votes_sum = repository.votes_sum or 0
+            stats.intents = sorted(filter(None, intents_count().keys()))
+            stats.entities = sorted(
+                RepositoryEntity.refresh_examples_count(repository).keys())
+            # labels read the entities counts
+            stats.labels = sorted(repository.labels_list)
+            stats.available_languages = sorted(set(
+                [repository.language] +
+                list(RepositoryLanguage.refresh(repository).keys())))
+            stats.save()
+        return stats
+
+
+class RepositoryLanguage(models.Model):
+    """
+    Languages a repository has examples in, written or translated, kept
+    by the examples writes with add_example_count.
+    """
+
+    class Meta:
+        verbose_name = _('repository language')
+        verbose_name_plural = _('repository languages')
+        unique_together = ['repository', 'language']
+
+    repository = models.ForeignKey(
+        Repository,
+        models.CASCADE,
+        related_name='supported_languages')
+    language = models.CharField(
+        _('language'),
+        max_length=5,
+        validators=[
+            languages.validate_language,
+        ])
+    example_count = models.PositiveIntegerField(
+        _('example count'),
+        default=0)
+
+    @classmethod
+    def count_examples(cls, examples, translations):
+        """
+        Examples and translations of examples not deleted by language.
+        """
+        counts = {}
+        for queryset, field in [
+                (examples, 'repository_update__language'),
+                (translations, 'language')]:
+            for language, count in queryset.order_by().values(field) \
+                    .annotate(count=models.Count('pk')) \
+                    .values_list(field, 'count'):
+                counts[language] = counts.get(language, 0) + count
+        return counts
+
+    @classmethod
+    def add_example_count(cls, repository_id, languages, delta=1):
+        """
+        Add delta to the example count of each language once for each
+        time it is in languages, creating the languages added and
+        deleting the languages left without examples. Returns whether
+        languages were created or deleted.
+        """
+        changed = False
+        for language, count in Counter(languages).items():
+            filters = {'repository_id': repository_id, 'language': language}
+            if cls.objects.filter(**filters).update(
+                    example_count=models.F('example_count') + count * delta):
+                continue
+            if delta < 0:
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(example_count=count * delta, **filters)
+                changed = True
+            except IntegrityError:
+                # created by a concurrent write
+                cls.objects.filter(**filters).update(
+                    example_count=models.F('example_count') + count * delta)
+        if delta < 0:
+            deleted, _rows = cls.objects.filter(
+                repository_id=repository_id,
+                language__in=languages,
+                example_count=0).delete()
+            changed = deleted > 0
+        return changed
+
+    @classmethod
+    def refresh(cls, repository):
+        """
+        Recount the examples of each language, to repair the counts or
+        after bulk writes.
+        """
+        examples = repository.examples()
+        counts = cls.count_examples(
+            examples,
+            RepositoryTranslatedExample.objects.filter(
+                original_example__in=examples))
+        current = dict(cls.objects.filter(
+            repository_id=repository.pk).values_list(
+                'language',
+                'example_count'))
+        cls.objects.filter(
+            repository_id=repository.pk,
+            language__in=set(current) - set(counts)).delete()
+        for language, count in counts.items():
+            if current.get(language) != count:
+                cls.objects.update_or_create(
+                    repository_id=repository.pk,
+                    language=language,
+                    defaults={'example_count': count})
+        return counts
+
 
 class RequestRepositoryAuthorization(models.Model):
     class Meta:
@@ -1155,6 +1595,183 @@ class RequestRepositoryAuthorization(models.Model):
                 context))
 
 
+class TrainingJob(models.Model):
+    """
+    Training request queued to Bothub NLP service, the training progress
+    is read from the repository updates. A job keeps its repository in
+    active_repository until it finishes, so the database allows one
+    active job per repository.
+    """
+
+    class Meta:
+        verbose_name = _('training job')
+        verbose_name_plural = _('training jobs')
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_FINISHED = 'finished'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, _('Queued'),),
+        (STATUS_RUNNING, _('Running'),),
+        (STATUS_FINISHED, _('Finished'),),
+        (STATUS_FAILED, _('Failed'),),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False)
+    repository = models.ForeignKey(
+        Repository,
+        models.CASCADE,
+        related_name='training_jobs')
+    active_repository = models.OneToOneField(
+        Repository,
+        models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='active_training_job')
+    authorization = models.ForeignKey(
+        RepositoryAuthorization,
+        models.CASCADE,
+        related_name='training_jobs')
+    updates = models.ManyToManyField(
+        RepositoryUpdate,
+        related_name='training_jobs')
+    status = models.CharField(
+        _('status'),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED)
+    error = models.TextField(
+        _('error'),
+        blank=True,
+        null=True)
+    created_at = models.DateTimeField(
+        _('created at'),
+        auto_now_add=True)
+    worker = models.CharField(
+        _('worker'),
+        max_length=255,
+        blank=True,
+        help_text=_('Host and process id running the job'))
+
+    @property
+    def finished(self):
+        return self.status in [
+            TrainingJob.STATUS_FINISHED,
+            TrainingJob.STATUS_FAILED,
+        ]
+
+    @property
+    def repository_updates(self):
+        return self.updates.order_by('language')
+
+    @classmethod
+    def submit(cls, user_authorization):
+        """
+        Queue a training job to the repository, submissions while a job is
+        not finished return the same job.
+        """
+        from .jobs import get_executor
+        from .jobs import run_training_job
+
+        repository = user_authorization.repository
+        # jobs of workers stopped before running them
+        cls.objects.filter(
+            active_repository=repository,
+            created_at__lt=timezone.now() - timedelta(
+                seconds=settings.BOTHUB_TRAINING_JOB_TIMEOUT)).update(
+                    status=cls.STATUS_FAILED,
+                    error='Training job timed out',
+                    active_repository=None)
+        while True:
+            job = cls.objects.filter(active_repository=repository).first()
+            if job:
+                return job
+            readiness = repository.get_training_readiness()
+            try:
+                with transaction.atomic():
+                    job = cls.objects.create(
+                        repository=repository,
+                        active_repository=repository,
+                        authorization=user_authorization)
+                    # a language ready without a current update, as after
+                    # a failed training, gets it created to be trained
+                    job.updates.set(map(
+                        lambda r: r.update if r.update.pk else
+                        repository.current_update(r.language),
+                        filter(
+                            lambda r: r.ready_for_train,
+                            readiness.languages.values())))
+            except IntegrityError:
+                # queued by a concurrent request
+                continue
+            transaction.on_commit(
+                lambda: get_executor().submit(run_training_job, job.pk))
+            return job
+
+    @classmethod
+    def get_worker(cls, pid=None):
+        return '{}:{}'.format(socket.gethostname(), pid or os.getpid())
+
+    @classmethod
+    def fail_orphaned(cls):
+        """
+        Fail the running jobs of stopped processes of this host, as this
+        process, whose jobs all started before it.
+        """
+        prefix = '{}:'.format(socket.gethostname())
+        for job in cls.objects.filter(
+                status=cls.STATUS_RUNNING,
+                worker__startswith=prefix):
+            pid = int(job.worker[len(prefix):])
+            if pid != os.getpid():
+                try:
+                    os.kill(pid, 0)
+                    continue
+                except ProcessLookupError:
+                    pass
+                except PermissionError:
+                    continue
+            job.finish(
+                cls.STATUS_FAILED,
+                'Training worker stopped')
+
+    def run(self):
+        # claimed, a job dispatched twice is run once
+        worker = TrainingJob.get_worker()
+        if not TrainingJob.objects.filter(
+                pk=self.pk,
+                status=TrainingJob.STATUS_QUEUED).update(
+                    status=TrainingJob.STATUS_RUNNING,
+                    worker=worker):
+            return
+        self.status = TrainingJob.STATUS_RUNNING
+        self.worker = worker
+        try:
+            response = Repository.request_nlp_train(self.authorization)
+        except NLPServiceUnavailable:
+            self.finish(
+                TrainingJob.STATUS_FAILED,
+                'Bothub NLP service is unavailable')
+            return
+        if response.status_code != 200:
+            self.finish(
+                TrainingJob.STATUS_FAILED,
+                'Bothub NLP service answered {}'.format(
+                    response.status_code))
+            return
+        self.finish(TrainingJob.STATUS_FINISHED)
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.active_repository = None
+        self.save(update_fields=['status', 'error', 'active_repository'])
+
+
 @receiver(models.signals.pre_save, sender=RequestRepositoryAuthorization)
 def set_user_role_on_approved(instance, **kwargs):
     current = None
@@ -1168,8 +1785,8 @@ def set_user_role_on_approved(instance, **kwargs):
 
     if current.approved_by is None and \
        current.approved_by is not instance.approved_by:
-        user_authorization = instance.repository.get_user_authorization(
-            instance.user)
+        user_authorization = instance.repository \
+            .get_or_create_user_authorization(instance.user)
         user_authorization.role = RepositoryAuthorization.ROLE_USER
         user_authorization.save(update_fields=['role'])
         instance.send_request_approved_email()
@@ -1187,3 +1804,125 @@ def send_new_request_email_to_admins_on_created(instance, created, **kwargs):
 @receiver(models.signals.post_delete, sender=RequestRepositoryAuthorization)
 def send_request_rejected_email(instance, **kwargs):
     instance.send_request_rejected_email()
+
+
+@receiver(models.signals.post_save, sender=Repository)
+def refresh_stats_on_repository_saved(instance, created, raw, **kwargs):
+    if raw:
+        return
+    RepositoryStats.schedule_refresh(
+        instance,
+        fields=None if created else ['available_languages'])
+
+
+@receiver(models.signals.post_save, sender=Repository)
+def create_owner_authorization(instance, created, raw, **kwargs):
+    if raw or not created:
+        return
+    # owners read their token, it is stored with the repository
+    instance.get_or_create_user_authorization(instance.owner)
+
+
+@receiver(models.signals.post_save, sender=RepositoryExample)
+def refresh_stats_on_example_saved(instance, created, raw, **kwargs):
+    if raw:
+        return
+    repository_update = instance.repository_update
+    fields = RepositoryStats.EXAMPLES_FIELDS
+    if created:
+        RepositoryStats.add_counts(
+            repository_update.repository_id,
+            examples_count=1)
+        if RepositoryLanguage.add_example_count(
+                repository_update.repository_id,
+                [repository_update.language]):
+            fields = fields + ['available_languages']
+    RepositoryStats.schedule_refresh(
+        repository_update.repository,
+        fields=fields)
+
+
+@receiver(models.signals.post_save, sender=Repository)
+@receiver(models.signals.post_save, sender=RepositoryExample)
+def index_search_fields_on_saved(sender, instance, raw, update_fields,
+                                 **kwargs):
+    if raw:
+        return
+    if update_fields and not set(update_fields) & set(sender.SEARCH_FIELDS):
+        return
+    get_search_backend().index([instance])
+
+
+@receiver(models.signals.post_delete, sender=Repository)
+@receiver(models.signals.post_delete, sender=RepositoryExample)
+def remove_search_fields_on_deleted(instance, **kwargs):
+    get_search_backend().remove([instance])
+
+
+@receiver(models.signals.post_save, sender=RepositoryExampleEntity)
+def refresh_stats_on_example_entity_saved(instance, created, raw, **kwargs):
+    if raw:
+        return
+    example = instance.repository_example
+    if created and example.deleted_in_id is None:
+        RepositoryEntity.add_examples_count([instance.entity_id])
+    RepositoryStats.schedule_refresh(
+        example.repository_update.repository,
+        fields=['entities', 'labels'])
+
+
+@receiver(models.signals.post_delete, sender=RepositoryExampleEntity)
+def count_examples_on_example_entity_deleted(instance, **kwargs):
+    # marks are deleted with their example or repository, the marks of
+    # deleted examples were subtracted when the example was deleted
+    if RepositoryExample.objects.filter(
+            pk=instance.repository_example_id,
+            deleted_in__isnull=True).exists():
+        RepositoryEntity.add_examples_count([instance.entity_id], delta=-1)
+
+
+@receiver(models.signals.post_delete, sender=RepositoryEntity)
+@receiver(models.signals.post_delete, sender=RepositoryEntityLabel)
+def forget_value_on_deleted(sender, instance, **kwargs):
+    sender.objects.get_queryset().cache.discard(
+        instance.repository_id,
+        instance.value)
+
+
+@receiver(models.signals.post_save, sender=RepositoryEntity)
+def refresh_stats_on_entity_saved(instance, created, raw, **kwargs):
+    if raw or created:
+        return
+    RepositoryStats.schedule_refresh(instance.repository, fields=['labels'])
+
+
+@receiver(models.signals.post_save, sender=RepositoryTranslatedExample)
+def refresh_stats_on_translated_example_saved(instance, created, raw,
+                                              **kwargs):
+    if raw or not created:
+        return
+    original_example = instance.original_example
+    if original_example.deleted_in_id is None and \
+            RepositoryLanguage.add_example_count(
+                original_example.repository_update.repository_id,
+                [instance.language]):
+        RepositoryStats.schedule_refresh(
+            original_example.repository_update.repository,
+            fields=['available_languages'])
+
+
+@receiver(models.signals.post_save, sender=RepositoryVote)
+def refresh_stats_on_vote_saved(instance, raw, **kwargs):
+    if raw:
+        return
+    RepositoryStats.add_counts(
+        instance.repository_id,
+        votes_sum=instance.vote - getattr(instance, '_loaded_vote', 0))
+    instance._loaded_vote = instance.vote
+
+
+@receiver(models.signals.post_delete, sender=RepositoryVote)
+def refresh_stats_on_vote_deleted(instance, **kwargs):
+    RepositoryStats.add_counts(
+        instance.repository_id,
+        votes_sum=-getattr(instance, '_loaded_vote', instance.vote))
@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+from .exceptions import NLPServiceUnavailable
+
+
+class CircuitBreaker(object):
+    """
+    Fail fast after `failure_threshold` consecutive failures, letting one
+    trial request through each `recovery_timeout` seconds until the
+    service recovers.
+    """
+
+    STATE_CLOSED = 'closed'
+    STATE_OPEN = 'open'
+    STATE_HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold, recovery_timeout, clock=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock or time.monotonic
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return CircuitBreaker.STATE_CLOSED
+        if self.clock() - self.opened_at >= self.recovery_timeout:
+            return CircuitBreaker.STATE_HALF_OPEN
+        return CircuitBreaker.STATE_OPEN
+
+    def allow_request(self):
+        with self.lock:
+            state = self.state
+            if state == CircuitBreaker.STATE_HALF_OPEN:
+                # only one trial request until it succeeds or fails
+                self.opened_at = self.clock()
+                return True
+            return state == CircuitBreaker.STATE_CLOSED
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class NLPClient(object):
+    """
+    HTTP client to Bothub NLP service sharing a keep-alive connection pool,
+    with timeouts, retries on connection errors and a circuit breaker.
+    """
+
+    def __init__(self, base_url=None, connect_timeout=None,
+                 read_timeout=None, train_read_timeout=None, retries=None,
+                 pool_size=None, failure_threshold=None,
+                 recovery_timeout=None):
+        self.base_url = base_url or settings.BOTHUB_NLP_BASE_URL
+        self.connect_timeout = connect_timeout or \
+            settings.BOTHUB_NLP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.BOTHUB_NLP_READ_TIMEOUT
+        self.train_read_timeout = train_read_timeout or \
+            settings.BOTHUB_NLP_TRAIN_READ_TIMEOUT
+        if retries is None:
+            retries = settings.BOTHUB_NLP_RETRIES
+        pool_size = pool_size or settings.BOTHUB_NLP_POOL_SIZE
+        self.pool_size = pool_size
+        self.executor = None
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold or settings.BOTHUB_NLP_CIRCUIT_FAILURES,
+            recovery_timeout or settings.BOTHUB_NLP_CIRCUIT_RECOVERY)
+
+        # only connection errors are retried, the request was not sent
+        # so it is safe for train and parse POSTs
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                connect=retries,
+                read=0,
+                status=0,
+                backoff_factor=0.1,
+                raise_on_status=False))
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @property
+    def train_url(self):
+        return '{}train/'.format(self.base_url)
+
+    @property
+    def parse_url(self):
+        return '{}parse/'.format(self.base_url)
+
+    def get_headers(self, user_authorization):
+        return {'Authorization': 'Bearer {}'.format(user_authorization.uuid)}
+
+    def request(self, method, url, read_timeout, **kwargs):
+        if not self.circuit_breaker.allow_request():
+            raise NLPServiceUnavailable()
+        try:
+            response = self.session.request(
+                method,
+                url,
+                timeout=(self.connect_timeout, read_timeout),
+                **kwargs)
+        except requests.RequestException as e:
+            self.circuit_breaker.record_failure()
+            raise NLPServiceUnavailable() from e
+        if response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        return response
+
+    def train(self, user_authorization):
+        return self.request(
+            'POST',
+            self.train_url,
+            self.train_read_timeout,
+            data={},
+            headers=self.get_headers(user_authorization))
+
+    def parse(self, user_authorization, text, language=None):
+        return self.request(
+            'POST',
+            self.parse_url,
+            self.read_timeout,
+            data={
+                'text': text,
+                'language': language,
+            },
+            headers=self.get_headers(user_authorization))
+
+    def parse_many(self, user_authorization, texts, language=None,
+                   concurrency=None):
+        """
+        Parse texts with at most `concurrency` requests in flight, yielding
+        (text, response or NLPServiceUnavailable) in the texts order.
+        """
+        concurrency = min(
+            concurrency or settings.BOTHUB_NLP_ANALYZE_BATCH_CONCURRENCY,
+            self.pool_size)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.pool_size)
+        texts = iter(texts)
+        pending = deque()
+
+        def submit():
+            for text in texts:
+                pending.append((text, self.executor.submit(
+                    self.parse,
+                    user_authorization,
+                    text,
+                    language),))
+                return True
+            return False
+
+        while len(pending) < concurrency and submit():
+            pass
+        while pending:
+            text, future = pending.popleft()
+            try:
+                result = future.result()
+            except NLPServiceUnavailable as e:
+                result = e
+            submit()
+            yield text, result
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_nlp_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = NLPClient()
+    return _client
@@ -0,0 +1,258 @@
+from functools import reduce
+
+from django.db import connection as default_connection
+from django.db import models
+from django.db.models.expressions import RawSQL
+
+
+class BasicSearchBackend(object):
+    """
+    Match every word with LIKE, for databases without full-text search.
+    Results are not ranked.
+    """
+
+    vendor = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @classmethod
+    def is_available(cls, connection):
+        return True
+
+    def get_terms(self, text):
+        return text.split()
+
+    def install(self, schema_editor, model, fields):
+        pass
+
+    def uninstall(self, schema_editor, model, fields):
+        pass
+
+    def index(self, instances):
+        pass
+
+    def remove(self, instances):
+        pass
+
+    def filter_pk_in(self, queryset, sql, params):
+        # a RawSQL in a pk__in lookup is wrapped as a scalar subquery
+        model = queryset.model
+        qn = self.connection.ops.quote_name
+        return queryset.extra(
+            where=['{}.{} IN ({})'.format(
+                qn(model._meta.db_table),
+                qn(model._meta.pk.column),
+                sql)],
+            params=params)
+
+    def search(self, queryset, text):
+        fields = queryset.model.SEARCH_FIELDS
+        for term in self.get_terms(text):
+            queryset = queryset.filter(reduce(
+                lambda a, b: a | b,
+                map(
+                    lambda field: models.Q(**{
+                        '{}__icontains'.format(field): term}),
+                    fields)))
+        return queryset.annotate(search_rank=models.Value(
+            0,
+            output_field=models.FloatField()))
+
+
+class PostgreSQLSearchBackend(BasicSearchBackend):
+    """
+    Match a tsvector of the search fields backed by a GIN expression
+    index, PostgreSQL keeps the index up to date on every write.
+    """
+
+    vendor = 'postgresql'
+    # examples are written in many languages, words are not stemmed
+    config = 'simple'
+
+    def get_index_name(self, model):
+        return self.connection.ops.quote_name(
+            '{}_search_idx'.format(model._meta.db_table))
+
+    def get_document(self, model, fields, table=None):
+        qn = self.connection.ops.quote_name
+        prefix = '{}.'.format(qn(table)) if table else ''
+        return "to_tsvector('{}', {})".format(
+            self.config,
+            " || ' ' || ".join(map(
+                lambda field: "coalesce({}{}, '')".format(
+                    prefix,
+                    qn(model._meta.get_field(field).column)),
+                fields)))
+
+    def install(self, schema_editor, model, fields):
+        schema_editor.execute('CREATE INDEX {} ON {} USING gin ({})'.format(
+            self.get_index_name(model),
+            self.connection.ops.quote_name(model._meta.db_table),
+            self.get_document(model, fields)))
+
+    def uninstall(self, schema_editor, model, fields):
+        schema_editor.execute('DROP INDEX IF EXISTS {}'.format(
+            self.get_index_name(model)))
+
+    def get_query(self, text):
+        # every quoted term matches words starting with it
+        return ' & '.join(map(
+            lambda term: "'{}':*".format(
+                term.replace('\\', '\\\\').replace("'", "''")),
+            self.get_terms(text)))
+
+    def search(self, queryset, text):
+        model = queryset.model
+        qn = self.connection.ops.quote_name
+        table = model._meta.db_table
+        document = self.get_document(model, model.SEARCH_FIELDS, table)
+        query = "to_tsquery('{}', %s)".format(self.config)
+        params = [self.get_query(text)]
+        return self.filter_pk_in(
+            queryset,
+            'SELECT {} FROM {} WHERE {} @@ {}'.format(
+                qn(model._meta.pk.column),
+                qn(table),
+                document,
+                query),
+            params).annotate(search_rank=RawSQL(
+                'ts_rank({}, {})'.format(document, query),
+                params,
+                output_field=models.FloatField()))
+
+
+class SQLiteSearchBackend(BasicSearchBackend):
+    """
+    Keep the search fields in an FTS5 table, with an integer primary key
+    as its rowid, synced on save and delete and ranked with bm25.
+    """
+
+    vendor = 'sqlite'
+    fts5 = None
+
+    @classmethod
+    def is_available(cls, connection):
+        if cls.fts5 is None:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA compile_options')
+                cls.fts5 = ('ENABLE_FTS5',) in cursor.fetchall()
+        return cls.fts5
+
+    def get_table(self, model):
+        return self.connection.ops.quote_name(
+            '{}_fts'.format(model._meta.db_table))
+
+    def get_columns(self, model, fields):
+        qn = self.connection.ops.quote_name
+        return ', '.join(map(
+            lambda field: qn(model._meta.get_field(field).column),
+            fields))
+
+    def get_key(self, model):
+        # other primary keys are kept in an unindexed, scanned column
+        if isinstance(model._meta.pk, models.AutoField):
+            return 'rowid'
+        return 'pk'
+
+    def get_pk(self, instance):
+        return instance._meta.pk.get_db_prep_value(
+            instance.pk,
+            self.connection)
+
+    def install(self, schema_editor, model, fields):
+        qn = self.connection.ops.quote_name
+        key = self.get_key(model)
+        columns = self.get_columns(model, fields)
+        schema_editor.execute('CREATE VIRTUAL TABLE {} USING fts5({})'.format(
+            self.get_table(model),
+            columns if key == 'rowid' else 'pk UNINDEXED, {}'.format(
+                columns)))
+        schema_editor.execute(
+            'INSERT INTO {} ({}, {}) SELECT {}, {} FROM {}'.format(
+                self.get_table(model),
+                key,
+                columns,
+                qn(model._meta.pk.column),
+                columns,
+                qn(model._meta.db_table)))
+
+    def uninstall(self, schema_editor, model, fields):
+        schema_editor.execute('DROP TABLE IF EXISTS {}'.format(
+            self.get_table(model)))
+
+    def index(self, instances):
+        if not instances:
+            return
+        model = type(instances[0])
+        fields = model.SEARCH_FIELDS
+        self.remove(instances)
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO {} ({}, {}) VALUES ({})'.format(
+                    self.get_table(model),
+                    self.get_key(model),
+                    self.get_columns(model, fields),
+                    ', '.join(['%s'] * (len(fields) + 1))),
+                list(map(
+                    lambda instance: [self.get_pk(instance)] + list(map(
+                        lambda field: getattr(instance, field),
+                        fields)),
+                    instances)))
+
+    def remove(self, instances):
+        if not instances:
+            return
+        model = type(instances[0])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                'DELETE FROM {} WHERE {} = %s'.format(
+                    self.get_table(model),
+                    self.get_key(model)),
+                list(map(
+                    lambda instance: [self.get_pk(instance)],
+                    instances)))
+
+    def get_match(self, text):
+        # quoted terms are plain words, not FTS5 syntax, matching words
+        # starting with them
+        return ' '.join(map(
+            lambda term: '"{}"*'.format(term.replace('"', '""')),
+            self.get_terms(text)))
+
+    def search(self, queryset, text):
+        model = queryset.model
+        qn = self.connection.ops.quote_name
+        table = self.get_table(model)
+        key = self.get_key(model)
+        match = self.get_match(text)
+        return self.filter_pk_in(
+            queryset,
+            'SELECT {} FROM {} WHERE {} MATCH %s'.format(key, table, table),
+            [match]).annotate(search_rank=RawSQL(
+                # a rowid seeks the matched row of every result
+                'SELECT -bm25({}) FROM {} WHERE {} MATCH %s '
+                'AND {} = {}.{}'.format(
+                    table,
+                    table,
+                    table,
+                    key,
+                    qn(model._meta.db_table),
+                    qn(model._meta.pk.column)),
+                [match],
+                output_field=models.FloatField()))
+
+
+SEARCH_BACKENDS = [
+    PostgreSQLSearchBackend,
+    SQLiteSearchBackend,
+]
+
+
+def get_search_backend(connection=None):
+    connection = connection or default_connection
+    for backend in SEARCH_BACKENDS:
+        if backend.vendor == connection.vendor and \
+                backend.is_available(connection):
+            return backend(connection)
+    return BasicSearchBackend(connection)
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db import models
+
+from .models import RepositoryExample
+from .models import RepositoryExampleEntity
+from .models import RepositoryTranslatedExample
+
+
+class LanguagesStatus(object):
+    """
+    Examples count, entities and base translations percentage of many
+    languages of a repository, with one grouped query for the counts and
+    one for the entities.
+    """
+
+    EXAMPLES = 'examples'
+    BASE_TRANSLATIONS = 'base_translations'
+
+    def __init__(self, repository, languages=None):
+        self.repository = repository
+        if languages is None:
+            languages = settings.SUPPORTED_LANGUAGES.keys()
+        self.languages = dict(self.evaluate(list(languages)))
+
+    def evaluate(self, languages):
+        base_language = self.repository.language
+        counts = self.get_counts(set(languages + [base_language]))
+        entities = self.get_entities(languages)
+        base_examples_count = counts[self.EXAMPLES].get(base_language, 0)
+
+        for language in languages:
+            base_translations_count = counts[self.BASE_TRANSLATIONS].get(
+                language,
+                0)
+            yield language, {
+                'is_base_language': language == base_language,
+                'examples': {
+                    'count': counts[self.EXAMPLES].get(language, 0),
+                    'entities': sorted(entities.get(language, set())),
+                },
+                'base_translations': {
+                    'count': base_translations_count,
+                    'percentage': (base_translations_count / (
+                        base_examples_count if base_examples_count > 0
+                        else 1)) * 100,
+                },
+            }
+
+    def get_counts(self, languages):
+        examples = self.get_examples()
+        examples_count = examples.filter(
+            repository_update__language__in=languages).values(
+                'repository_update__language').annotate(
+                    count=models.Count('id'),
+                    kind=models.Value(
+                        self.EXAMPLES,
+                        output_field=models.CharField())).order_by()
+        base_translations_count = RepositoryTranslatedExample.objects.filter(
+            original_example__in=examples.filter(
+                repository_update__language=self.repository.language),
+            language__in=languages).values(
+                'language').annotate(
+                    count=models.Count('id'),
+                    kind=models.Value(
+                        self.BASE_TRANSLATIONS,
+                        output_field=models.CharField())).order_by()
+        r = {self.EXAMPLES: {}, self.BASE_TRANSLATIONS: {}}
+        # rows of a union are named after the first query columns
+        for x in examples_count.union(base_translations_count, all=True):
+            r[x.get('kind')][x.get('repository_update__language')] = \
+                x.get('count')
+        return r
+
+    def get_entities(self, languages):
+        r = {}
+        for language, entity in RepositoryExampleEntity.objects.filter(
+                repository_example__in=self.get_examples(),
+                repository_example__repository_update__language__in=languages
+                ).values_list(
+                    'repository_example__repository_update__language',
+                    'entity').distinct().order_by():
+            r.setdefault(language, set()).add(entity)
+        return r
+
+    def get_examples(self):
+        return RepositoryExample.objects.filter(
+            repository_update__repository=self.repository,
+            deleted_in__isnull=True)
+
+
+class LabelsStatus(object):
+    """
+    Entities and examples count of every label of a repository, with the
+    entities in use without a label in the "other" label, read from the
+    entities examples count with one query.
+    """
+
+    OTHER = 'other'
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.labels = self.evaluate()
+
+    def evaluate(self):
+        r = {}
+        for label, entity, examples_count in \
+                self.repository.entities.values_list(
+                    'label__value',
+                    'value',
+                    'examples_count'):
+            if label is None:
+                if not examples_count:
+                    continue
+                label = self.OTHER
+            status = r.setdefault(label, self.get_empty())
+            status['entities'].append(entity)
+            status['examples_count'] += examples_count
+        return r
+
+    def get(self, label):
+        return self.labels.get(label, self.get_empty())
+
+    def get_empty(self):
+        return {
+            'entities': [],
+            'examples_count': 0,
+        }
@@ -1,7 +1,22 @@
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from unittest.mock import Mock
+from unittest.mock import patch
+
 from django.test import TestCase
+from django.test import RequestFactory
+from django.http import FileResponse
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from bothub.authentication.models import User
 
@@ -14,11 +29,25 @@ from .models import RepositoryAuthorization
 from .models import RequestRepositoryAuthorization
 from .models import RepositoryEntity
 from .models import RepositoryEntityLabel
+from .models import RepositoryStats
+from .models import RepositoryVote
+from .models import RepositoryUpdate
+from .training import TrainingReadiness
+from .nlp import CircuitBreaker
+from .nlp import NLPClient
+from .cache import AnalyzeCache
+from .cache import analyze_cache
+from .cache import entities_cache
+from .search import BasicSearchBackend
+from .search import SQLiteSearchBackend
+from .search import get_search_backend
+from .views import download_bot_data
 from . import languages
 from .exceptions import RepositoryUpdateAlreadyStartedTraining
 from .exceptions import RepositoryUpdateAlreadyTrained
 from .exceptions import TrainingNotAllowed
 from .exceptions import DoesNotHaveTranslation
+from .exceptions import NLPServiceUnavailable
 
 
 class RepositoryUpdateTestCase(TestCase):
@@ -50,13 +79,13 @@ class RepositoryUpdateTestCase(TestCase):
 
 class TranslateTestCase(TestCase):
     EXPECTED_RASA_NLU_DATA = {
-        'text': 'meu nome é Douglas',
+        'text': 'meu nome e Douglas',
         'intent': 'greet',
         'entities': [],
     }
 
     EXPECTED_RASA_NLU_DATA_WITH_ENTITIES = {
-        'text': 'meu nome é Douglas',
+        'text': 'meu nome e Douglas',
         'intent': 'greet',
         'entities': [
             {
@@ -85,7 +114,7 @@ class TranslateTestCase(TestCase):
         RepositoryTranslatedExample.objects.create(
             original_example=self.example,
             language=language,
-            text='meu nome é Douglas')
+            text='meu nome e Douglas')
         self.assertEqual(
             len(self.repository.current_update(language).examples),
             1)
@@ -101,7 +130,7 @@ class TranslateTestCase(TestCase):
         translate = RepositoryTranslatedExample.objects.create(
             original_example=self.example,
             language=language,
-            text='meu nome é Douglas')
+            text='meu nome e Douglas')
         RepositoryTranslatedExampleEntity.objects.create(
             repository_translated_example=translate,
             start=11,
@@ -119,7 +148,7 @@ class TranslateTestCase(TestCase):
         translate = RepositoryTranslatedExample.objects.create(
             original_example=self.example,
             language=language,
-            text='meu nome é Douglas')
+            text='meu nome e Douglas')
         RepositoryTranslatedExampleEntity.objects.create(
             repository_translated_example=translate,
             start=11,
@@ -141,7 +170,7 @@ class TranslateTestCase(TestCase):
         translate = RepositoryTranslatedExample.objects.create(
             original_example=self.example,
             language=language,
-            text='meu nome é Douglas')
+            text='meu nome e Douglas')
 
         self.assertEqual(
             translate.has_valid_entities,
@@ -174,7 +203,7 @@ class TranslateTestCase(TestCase):
         translate = RepositoryTranslatedExample.objects.create(
             original_example=self.example,
             language=language,
-            text='meu nome é Douglas')
+            text='meu nome e Douglas')
         RepositoryTranslatedExampleEntity.objects.create(
             repository_translated_example=translate,
             start=11,
@@ -206,7 +235,7 @@ class TranslateTestCase(TestCase):
         translate = RepositoryTranslatedExample.objects.create(
             original_example=self.example,
             language=language,
-            text='meu nome é Douglas')
+            text='meu nome e Douglas')
         RepositoryTranslatedExampleEntity.objects.create(
             repository_translated_example=translate,
             start=11,
@@ -227,6 +256,48 @@ class TranslateTestCase(TestCase):
             translate.has_valid_entities,
             False)
 
+    def test_count_entities(self):
+        entities = [{'entity': 'name'}, {'entity': 'name'}, {'entity': 'age'}]
+        self.assertDictEqual(
+            RepositoryTranslatedExample.count_entities(entities),
+            {'name': 2, 'age': 1})
+        self.assertEqual(
+            RepositoryTranslatedExample.count_entities(entities, to_str=True),
+            '2 name, 1 age')
+
+    def test_valid_entities_of_many(self):
+        for start in [11, 0]:
+            RepositoryExampleEntity.objects.create(
+                repository_example=self.example,
+                start=start,
+                end=start + 2,
+                entity='name')
+        translations = []
+        for language, entities in [
+                (languages.LANGUAGE_PT, ['name', 'name']),
+                (languages.LANGUAGE_ES, ['name']),
+                (languages.LANGUAGE_DE, ['name', 'age']),
+                (languages.LANGUAGE_FR, [])]:
+            translate = RepositoryTranslatedExample.objects.create(
+                original_example=self.example,
+                language=language,
+                text='meu nome e Douglas')
+            for entity in entities:
+                RepositoryTranslatedExampleEntity.objects.create(
+                    repository_translated_example=translate,
+                    start=0,
+                    end=2,
+                    entity=entity)
+            translations.append(translate)
+        with self.assertNumQueries(3):
+            valid_entities = dict(map(
+                lambda t: (t.pk, t.has_valid_entities,),
+                RepositoryTranslatedExample.objects.filter(
+                    original_example=self.example).with_entities()))
+        self.assertListEqual(
+            list(map(lambda t: valid_entities[t.pk], translations)),
+            [True, False, False, False])
+
     def test_does_not_have_translation(self):
         with self.assertRaises(DoesNotHaveTranslation):
             self.example.get_translation(languages.LANGUAGE_NL)
@@ -276,6 +347,41 @@ class RepositoryTestCase(TestCase):
         # TODO: Update test_languages_status test
         #       Create expeted result
 
+    def test_languages_status_values(self):
+        entity = RepositoryExampleEntity.objects.create(
+            repository_example=self.repository.examples(
+                languages.LANGUAGE_EN).get(),
+            start=0,
+            end=2,
+            entity='greeting').entity
+        with self.assertNumQueries(2):
+            languages_status = self.repository.get_languages_status([
+                languages.LANGUAGE_EN,
+                languages.LANGUAGE_PT,
+                languages.LANGUAGE_ES,
+            ])
+        self.assertDictEqual(
+            languages_status.get(languages.LANGUAGE_EN),
+            {
+                'is_base_language': True,
+                'examples': {'count': 1, 'entities': [entity.pk]},
+                'base_translations': {'count': 0, 'percentage': 0},
+            })
+        self.assertDictEqual(
+            languages_status.get(languages.LANGUAGE_PT),
+            {
+                'is_base_language': False,
+                'examples': {'count': 1, 'entities': []},
+                'base_translations': {'count': 1, 'percentage': 100},
+            })
+        self.assertDictEqual(
+            languages_status.get(languages.LANGUAGE_ES),
+            self.repository.language_status(languages.LANGUAGE_ES))
+        self.assertEqual(
+            languages_status.get(languages.LANGUAGE_ES).get(
+                'examples').get('count'),
+            0)
+
     def test_last_trained_update(self):
         self.assertFalse(self.repository.last_trained_update())
         update_1 = self.repository.current_update()
@@ -414,6 +520,25 @@ class RepositoryAuthorizationTestCase(TestCase):
             authorization.level,
             RepositoryAuthorization.LEVEL_NOTHING)
 
+    def test_resolve_without_writes(self):
+        authorization = self.repository.get_user_authorization(self.user)
+        self.assertFalse(RepositoryAuthorization.objects.filter(
+            repository=self.repository,
+            user=self.user).exists())
+        self.assertTrue(authorization.can_read)
+        self.assertIsNone(authorization.uuid)
+
+    def test_get_or_create_random_uuid(self):
+        created = self.repository.get_or_create_user_authorization(self.user)
+        self.assertIsNotNone(created.uuid)
+        self.assertEqual(
+            self.repository.get_user_authorization(self.user).pk,
+            created.pk)
+        self.assertNotEqual(
+            created.uuid,
+            self.private_repository.get_or_create_user_authorization(
+                self.user).uuid)
+
     def test_can_read(self):
         # repository owner
         authorization_owner = self.repository.get_user_authorization(
@@ -557,6 +682,30 @@ class RepositoryUpdateTrainingTestCase(TestCase):
         self.assertEqual(
             update.get_bot_data(),
             bot_data)
+        self.assertEqual(
+            RepositoryUpdate.objects.get(pk=update.pk).get_bot_data(),
+            bot_data)
+
+    def test_train_filesystem_store(self):
+        update = self.repository.current_update()
+        update.start_training(self.owner)
+        bot_data = b'bot_data__()\\//?(*)'
+
+        with tempfile.TemporaryDirectory() as root:
+            with self.settings(
+                    BOTHUB_ARTIFACT_STORE='filesystem',
+                    BOTHUB_ARTIFACTS_ROOT=root):
+                update.save_training(bot_data)
+                update = RepositoryUpdate.objects.get(pk=update.pk)
+                self.assertTrue(update.bot_data_file)
+                self.assertEqual(bytes(update.bot_data), b'')
+                self.assertEqual(update.get_bot_data(), bot_data)
+
+    def test_bot_data_deferred(self):
+        update = self.repository.current_update()
+        self.assertIn(
+            'bot_data',
+            self.repository.updates.get(pk=update.pk).get_deferred_fields())
 
     def test_already_started_trained(self):
         update = self.repository.current_update()
@@ -991,6 +1140,45 @@ class RepositoryEntityTestCase(TestCase):
             name_entity.pk,
             new_example_entity.entity.pk)
 
+    def test_resolve_many(self):
+        entities = RepositoryEntity.objects.resolve_many(
+            self.repository,
+            ['name', 'place', 'date'])
+        self.assertEqual(
+            entities.get('name'),
+            self.example_entity_1.entity.pk)
+        self.assertDictEqual(
+            entities,
+            dict(self.repository.entities.filter(
+                value__in=['name', 'place', 'date']).values_list(
+                    'value',
+                    'pk')))
+
+    def test_create_many_concurrent_writer(self):
+        # 'name' was created by another writer after the lookup
+        entities = RepositoryEntity.objects.get_queryset().create_many(
+            self.repository.pk,
+            {'name', 'place'})
+        self.assertEqual(
+            entities.get('name'),
+            self.example_entity_1.entity.pk)
+        self.assertEqual(
+            self.repository.entities.filter(value='place').count(),
+            1)
+
+    def test_resolve_cached(self):
+        entities_cache.set_many(
+            self.repository.pk,
+            {'name': self.example_entity_1.entity.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                RepositoryEntity.objects.resolve(self.repository, 'name'),
+                self.example_entity_1.entity.pk)
+        self.example_entity_1.entity.delete()
+        self.assertEqual(
+            entities_cache.get_many(self.repository.pk, ['name']),
+            {})
+
 
 class RepositoryEntityLabelTestCase(TestCase):
     def setUp(self):
@@ -1075,6 +1263,17 @@ class RepositoryEntityLabelTestCase(TestCase):
 
         self.assertIsNone(name_entity.label)
 
+    def test_change_label(self):
+        name_entity = RepositoryEntity.objects.get(
+            repository=self.repository,
+            value='name')
+        name_entity.set_label('subject')
+        self.assertEqual(name_entity.label.value, 'subject')
+
+        name_entity.set_label('person')
+
+        self.assertEqual(name_entity.label.value, 'person')
+
 
 class RepositoryOtherEntitiesTest(TestCase):
     def setUp(self):
@@ -1112,6 +1311,96 @@ class RepositoryOtherEntitiesTest(TestCase):
             1)
         self.assertIn(self.example_entity_2.entity, other_entities)
 
+    def test_examples_count(self):
+        example = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='object object')
+        for start in [0, 7]:
+            RepositoryExampleEntity.objects.create(
+                repository_example=example,
+                start=start,
+                end=start + 6,
+                entity='object')
+        self.assertDictEqual(
+            dict(self.repository.entities.values_list(
+                'value',
+                'examples_count')),
+            {'douglas': 1, 'object': 3})
+        self.example.delete()
+        self.assertDictEqual(
+            dict(self.repository.entities.values_list(
+                'value',
+                'examples_count')),
+            {'douglas': 0, 'object': 2})
+        self.assertListEqual(list(self.repository.entities_list), ['object'])
+        self.assertListEqual(list(self.repository.labels_list), [])
+
+    def test_examples_count_not_recounted(self):
+        with patch.object(
+                RepositoryEntity,
+                'refresh_examples_count') as refresh_examples_count:
+            RepositoryExampleEntity.objects.create(
+                repository_example=self.example,
+                start=3,
+                end=7,
+                entity='object')
+            self.assertDictEqual(
+                dict(self.repository.entities.values_list(
+                    'value',
+                    'examples_count')),
+                {'douglas': 1, 'object': 2})
+            self.example.delete()
+            refresh_examples_count.assert_not_called()
+        self.assertDictEqual(
+            dict(self.repository.entities.values_list(
+                'value',
+                'examples_count')),
+            {'douglas': 0, 'object': 0})
+
+    def test_examples_count_mark_deleted(self):
+        entity = self.example_entity_2.entity
+        self.example_entity_2.delete()
+        entity.refresh_from_db()
+        self.assertEqual(entity.examples_count, 0)
+
+        self.example.delete()
+        self.example_entity_1.delete()
+        entity = self.example_entity_1.entity
+        entity.refresh_from_db()
+        self.assertEqual(entity.examples_count, 0)
+
+    def test_stale_entity_saved(self):
+        entity = self.example_entity_2.entity
+        RepositoryExampleEntity.objects.create(
+            repository_example=self.example,
+            start=3,
+            end=7,
+            entity='object')
+        entity.save()
+        entity.refresh_from_db()
+        self.assertEqual(entity.examples_count, 2)
+
+    def test_labels_status(self):
+        RepositoryEntity.objects.create(
+            repository=self.repository,
+            value='unused')
+        RepositoryExampleEntity.objects.create(
+            repository_example=self.example,
+            start=3,
+            end=7,
+            entity='object')
+        with self.assertNumQueries(1):
+            labels_status = self.repository.get_labels_status()
+        self.assertDictEqual(
+            labels_status.labels,
+            {
+                'name': {'entities': ['douglas'], 'examples_count': 1},
+                'other': {'entities': ['object'], 'examples_count': 2},
+            })
+        self.assertDictEqual(
+            labels_status.get('place'),
+            {'entities': [], 'examples_count': 0})
+
 
 class UseLanguageModelFeaturizerTestCase(TestCase):
     def setUp(self):
@@ -1301,3 +1590,864 @@ class RepositorySupportedLanguageQueryTestCase(TestCase):
             q.count(),
             0,
         )
+
+    def test_no_duplicates(self):
+        language = languages.LANGUAGE_EN
+        t_language = languages.LANGUAGE_PT
+        repository_en = self._create_repository(language)
+        for text in ['hi', 'bye']:
+            example = RepositoryExample.objects.create(
+                repository_update=repository_en.current_update(),
+                text=text,
+                intent=text)
+            RepositoryTranslatedExample.objects.create(
+                original_example=example,
+                language=t_language,
+                text=text)
+            RepositoryExample.objects.create(
+                repository_update=repository_en.current_update(t_language),
+                text=text,
+                intent=text)
+        q = Repository.objects.all().supported_language(t_language)
+        self.assertEqual(list(q), [repository_en])
+
+    def test_languages_example_count(self):
+        language = languages.LANGUAGE_EN
+        t_language = languages.LANGUAGE_PT
+        repository_en = self._create_repository(language)
+        example = RepositoryExample.objects.create(
+            repository_update=repository_en.current_update(),
+            text='bye',
+            intent='bye')
+        translated = RepositoryTranslatedExample.objects.create(
+            original_example=example,
+            language=t_language,
+            text='tchau')
+        RepositoryExample.objects.create(
+            repository_update=repository_en.current_update(t_language),
+            text='oi',
+            intent='greet')
+        self.assertDictEqual(
+            dict(repository_en.supported_languages.values_list(
+                'language',
+                'example_count')),
+            {language: 1, t_language: 2})
+        translated.delete()
+        example.delete()
+        self.assertDictEqual(
+            dict(repository_en.supported_languages.values_list(
+                'language',
+                'example_count')),
+            {t_language: 1})
+
+
+class RepositoryStatsTestCase(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@user.com', 'owner')
+        self.user = User.objects.create_user('fake@user.com', 'user')
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Test',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+
+    def get_stats(self):
+        return RepositoryStats.objects.get(repository=self.repository)
+
+    def test_created_with_repository(self):
+        stats = self.get_stats()
+        self.assertEqual(stats.examples_count, 0)
+        self.assertEqual(stats.votes_sum, 0)
+        self.assertListEqual(stats.intents, [])
+        self.assertListEqual(
+            stats.available_languages,
+            [languages.LANGUAGE_EN])
+
+    def test_examples(self):
+        example = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(
+                languages.LANGUAGE_PT),
+            text='my name is Douglas',
+            intent='greet')
+        entity = RepositoryExampleEntity.objects.create(
+            repository_example=example,
+            start=11,
+            end=18,
+            entity='name').entity
+        entity.set_label('subject')
+        entity.save(update_fields=['label'])
+
+        stats = self.get_stats()
+        self.assertEqual(stats.examples_count, 1)
+        self.assertListEqual(stats.intents, ['greet'])
+        self.assertListEqual(stats.entities, ['name'])
+        self.assertListEqual(stats.labels, ['subject'])
+        self.assertListEqual(
+            stats.available_languages,
+            [languages.LANGUAGE_EN, languages.LANGUAGE_PT])
+
+        example.delete()
+
+        stats = self.get_stats()
+        self.assertEqual(stats.examples_count, 0)
+        self.assertListEqual(stats.intents, [])
+        self.assertListEqual(stats.entities, [])
+        self.assertListEqual(stats.labels, [])
+        self.assertListEqual(
+            stats.available_languages,
+            [languages.LANGUAGE_EN])
+
+    def test_deferred(self):
+        with patch.object(
+                RepositoryStats,
+                'refresh',
+                wraps=RepositoryStats.refresh) as refresh:
+            with RepositoryStats.deferred():
+                example = RepositoryExample.objects.create(
+                    repository_update=self.repository.current_update(),
+                    text='my name is Douglas',
+                    intent='greet')
+                RepositoryExampleEntity.objects.create(
+                    repository_example=example,
+                    start=11,
+                    end=18,
+                    entity='name')
+                self.assertEqual(refresh.call_count, 0)
+            self.assertEqual(refresh.call_count, 1)
+
+        stats = self.get_stats()
+        self.assertEqual(stats.examples_count, 1)
+        self.assertListEqual(stats.intents, ['greet'])
+        self.assertListEqual(stats.entities, ['name'])
+
+    def test_translations(self):
+        example = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='hi',
+            intent='greet')
+        translated = RepositoryTranslatedExample.objects.create(
+            original_example=example,
+            language=languages.LANGUAGE_PT,
+            text='oi')
+        self.assertIn(
+            languages.LANGUAGE_PT,
+            self.get_stats().available_languages)
+        translated.delete()
+        self.assertNotIn(
+            languages.LANGUAGE_PT,
+            self.get_stats().available_languages)
+
+    def test_writes_not_recounted(self):
+        with patch.object(RepositoryStats, 'recount') as recount:
+            example = RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='my name is Douglas',
+                intent='greet')
+            RepositoryExampleEntity.objects.create(
+                repository_example=example,
+                start=11,
+                end=18,
+                entity='name')
+            translated = RepositoryTranslatedExample.objects.create(
+                original_example=example,
+                language=languages.LANGUAGE_PT,
+                text='meu nome e Douglas')
+            stats = self.get_stats()
+            self.assertListEqual(stats.entities, ['name'])
+            self.assertListEqual(
+                stats.available_languages,
+                [languages.LANGUAGE_EN, languages.LANGUAGE_PT])
+
+            translated.delete()
+            self.assertListEqual(
+                self.get_stats().available_languages,
+                [languages.LANGUAGE_EN])
+            RepositoryTranslatedExample.objects.create(
+                original_example=example,
+                language=languages.LANGUAGE_PT,
+                text='meu nome e Douglas')
+            example.delete()
+            recount.assert_not_called()
+
+        stats = self.get_stats()
+        self.assertEqual(stats.examples_count, 0)
+        self.assertListEqual(stats.intents, [])
+        self.assertListEqual(stats.entities, [])
+        self.assertListEqual(
+            stats.available_languages,
+            [languages.LANGUAGE_EN])
+        self.assertFalse(self.repository.supported_languages.exists())
+
+    def test_votes(self):
+        vote = RepositoryVote.objects.create(
+            user=self.user,
+            repository=self.repository,
+            vote=RepositoryVote.UP_VOTE)
+        self.assertEqual(self.get_stats().votes_sum, 1)
+        vote.vote = RepositoryVote.DOWN_VOTE
+        vote.save()
+        self.assertEqual(self.get_stats().votes_sum, -1)
+        RepositoryVote.objects.get(pk=vote.pk).delete()
+        self.assertEqual(self.get_stats().votes_sum, 0)
+
+    def test_counters_not_recounted(self):
+        with patch.object(RepositoryStats, 'refresh') as refresh:
+            example = RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='hi',
+                intent='greet')
+            vote = RepositoryVote.objects.create(
+                user=self.user,
+                repository=self.repository,
+                vote=RepositoryVote.UP_VOTE)
+            vote = RepositoryVote.objects.get(pk=vote.pk)
+            vote.vote = RepositoryVote.DOWN_VOTE
+            vote.save()
+            # by the example, for the intents
+            refresh.assert_called_once()
+            stats = self.get_stats()
+            self.assertEqual(stats.examples_count, 1)
+            self.assertEqual(stats.votes_sum, -1)
+            self.assertEqual(
+                stats.relevance,
+                -RepositoryStats.RELEVANCE_VOTES_WEIGHT + 1)
+
+            example.delete()
+            self.assertEqual(self.get_stats().examples_count, 0)
+
+    def test_relevance(self):
+        self.assertEqual(self.get_stats().relevance, 0)
+        RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='hi',
+            intent='greet')
+        self.assertEqual(self.get_stats().relevance, 1)
+        RepositoryVote.objects.create(
+            user=self.user,
+            repository=self.repository,
+            vote=RepositoryVote.UP_VOTE)
+        self.assertEqual(
+            self.get_stats().relevance,
+            RepositoryStats.RELEVANCE_VOTES_WEIGHT + 1)
+
+    def test_order_by_relevance(self):
+        voted = Repository.objects.create(
+            owner=self.owner,
+            name='Voted',
+            slug='voted',
+            language=languages.LANGUAGE_EN)
+        RepositoryVote.objects.create(
+            user=self.user,
+            repository=voted,
+            vote=RepositoryVote.UP_VOTE)
+        for i in range(2):
+            RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='hi {}'.format(i),
+                intent='greet')
+        empty = Repository.objects.create(
+            owner=self.owner,
+            name='Empty',
+            slug='empty',
+            language=languages.LANGUAGE_EN)
+        self.assertListEqual(
+            list(Repository.objects.all().order_by_relevance()),
+            [voted, self.repository, empty])
+
+
+class TrainingReadinessTestCase(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@user.com', 'owner')
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Test',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+
+    def create_examples(self, language, intent, count=2):
+        for i in range(count):
+            RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(language),
+                text='{} {}'.format(intent, i),
+                intent=intent)
+
+    def evaluate(self):
+        with CaptureQueriesContext(connection) as context:
+            readiness = TrainingReadiness(self.repository)
+        return readiness, len(context.captured_queries)
+
+    def test_matches_updates(self):
+        self.create_examples(languages.LANGUAGE_EN, 'greet')
+        self.create_examples(languages.LANGUAGE_EN, 'bye', count=1)
+        self.create_examples(languages.LANGUAGE_PT, 'greet')
+
+        readiness, queries_count = self.evaluate()
+        for language in [languages.LANGUAGE_EN, languages.LANGUAGE_PT]:
+            update = self.repository.current_update(language)
+            r = readiness.languages.get(language)
+            self.assertEqual(r.update, update)
+            self.assertEqual(
+                r.requirements_to_train,
+                update.requirements_to_train)
+            self.assertEqual(r.ready_for_train, update.ready_for_train)
+            self.assertEqual(r.warnings, update.warnings)
+        self.assertFalse(
+            readiness.languages_ready_for_train.get(languages.LANGUAGE_EN))
+        self.assertTrue(
+            readiness.languages_ready_for_train.get(languages.LANGUAGE_PT))
+        self.assertTrue(readiness.ready_for_train)
+
+    def test_does_not_create_updates(self):
+        self.create_examples(languages.LANGUAGE_EN, 'greet')
+        self.repository.current_update(languages.LANGUAGE_EN).start_training(
+            self.owner)
+        updates_count = self.repository.updates.count()
+        readiness, queries_count = self.evaluate()
+        self.assertEqual(self.repository.updates.count(), updates_count)
+        self.assertFalse(readiness.ready_for_train)
+
+    def test_queries_count_independent_of_languages(self):
+        self.create_examples(languages.LANGUAGE_EN, 'greet')
+        readiness, one_language_queries = self.evaluate()
+        self.create_examples(languages.LANGUAGE_PT, 'greet')
+        self.create_examples(languages.LANGUAGE_ES, 'greet')
+        readiness, three_languages_queries = self.evaluate()
+        self.assertEqual(len(readiness.languages), 3)
+        self.assertEqual(one_language_queries, three_languages_queries)
+
+
+class TrainingDataBuilderTestCase(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@user.com', 'owner')
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Test',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+
+        self.example = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='my name is douglas',
+            intent='greet')
+        example_entity = RepositoryExampleEntity.objects.create(
+            repository_example=self.example,
+            start=11,
+            end=18,
+            entity='name')
+        example_entity.entity.set_label('subject')
+        example_entity.entity.save()
+        RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='hi',
+            intent='greet')
+        RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='bye',
+            intent='bye').delete()
+
+        translation = RepositoryTranslatedExample.objects.create(
+            original_example=self.example,
+            language=languages.LANGUAGE_PT,
+            text='meu nome é douglas')
+        RepositoryTranslatedExampleEntity.objects.create(
+            repository_translated_example=translation,
+            start=11,
+            end=18,
+            entity='name')
+        RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(
+                languages.LANGUAGE_PT),
+            text='oi',
+            intent='greet')
+
+    def get_rasa_nlu_data(self, update):
+        return {
+            'rasa_nlu_data': {
+                'common_examples': list(map(
+                    lambda example: {
+                        'text': example.get_text(update.language),
+                        'intent': example.intent,
+                        'entities': list(map(
+                            lambda e: e.rasa_nlu_data,
+                            example.get_entities(update.language))),
+                    },
+                    update.examples.order_by('id'))),
+            },
+            'label_rasa_nlu_data': {
+                'common_examples': list(map(
+                    lambda example: {
+                        'text': example.get_text(update.language),
+                        'entities': list(map(
+                            lambda e: e.get_rasa_nlu_data(
+                                label_as_entity=True),
+                            filter(
+                                lambda e: e.entity.label,
+                                example.get_entities(update.language)))),
+                    },
+                    update.examples.filter(
+                        entities__entity__label__isnull=False).order_by(
+                            'id'))),
+            },
+        }
+
+    def test_matches_examples(self):
+        for language in [languages.LANGUAGE_EN, languages.LANGUAGE_PT]:
+            update = self.repository.current_update(language)
+            self.assertEqual(
+                update.build_training_data(),
+                self.get_rasa_nlu_data(update))
+
+    def test_translated_language(self):
+        update = self.repository.current_update(languages.LANGUAGE_PT)
+        common_examples = update.build_training_data().get(
+            'rasa_nlu_data').get('common_examples')
+        self.assertEqual(
+            list(map(lambda x: x.get('text'), common_examples)),
+            ['meu nome é douglas', 'oi'])
+        self.assertEqual(
+            common_examples[0].get('entities'),
+            [{
+                'start': 11,
+                'end': 18,
+                'value': 'douglas',
+                'entity': 'name',
+            }])
+
+    def test_queries_count_independent_of_examples(self):
+        update = self.repository.current_update(languages.LANGUAGE_PT)
+        with CaptureQueriesContext(connection) as context:
+            update.build_training_data()
+        few_examples_queries = len(context.captured_queries)
+        for i in range(10):
+            example = RepositoryExample.objects.create(
+                repository_update=self.repository.current_update(),
+                text='my name is user{}'.format(i),
+                intent='greet')
+            translation = RepositoryTranslatedExample.objects.create(
+                original_example=example,
+                language=languages.LANGUAGE_PT,
+                text='meu nome é user{}'.format(i))
+            RepositoryTranslatedExampleEntity.objects.create(
+                repository_translated_example=translation,
+                start=11,
+                end=15,
+                entity='name')
+        with CaptureQueriesContext(connection) as context:
+            update.build_training_data()
+        self.assertEqual(len(context.captured_queries), few_examples_queries)
+
+
+class SearchBackendTestCase(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@user.com', 'owner')
+
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Test',
+            slug='test',
+            description='A bot to order pizza',
+            language=languages.LANGUAGE_EN)
+        self.example_1 = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='I want a pizza')
+        self.example_2 = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='pizza, pizza and more pizza')
+        self.example_3 = RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='hello')
+
+    def search(self, text, queryset=None, backend=None):
+        backend = backend or get_search_backend()
+        if queryset is None:
+            queryset = RepositoryExample.objects.all()
+        return list(backend.search(queryset, text).order_by('-search_rank'))
+
+    def test_ranked(self):
+        self.assertEqual(
+            self.search('pizza'),
+            [self.example_2, self.example_1])
+
+    def test_prefix_and_case(self):
+        self.assertEqual(self.search('HEL'), [self.example_3])
+        self.assertEqual(self.search('want piz'), [self.example_1])
+
+    def test_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"pizza OR'), [])
+        self.assertEqual(self.search("'hello' *"), [self.example_3])
+
+    def test_synced_on_save_and_delete(self):
+        self.example_3.text = 'pizza please'
+        self.example_3.save()
+        self.assertIn(self.example_3, self.search('please'))
+        self.assertEqual(self.search('hello'), [])
+        self.example_3.save(update_fields=['intent'])
+        self.assertIn(self.example_3, self.search('please'))
+        example_pk = self.example_3.pk
+        RepositoryExample.objects.filter(pk=example_pk).delete()
+        self.assertEqual(self.search('please'), [])
+
+    def test_sqlite_index_rowid(self):
+        backend = get_search_backend()
+        if not isinstance(backend, SQLiteSearchBackend):
+            return
+        table = backend.get_table(RepositoryExample)
+        # indexed again, after the other examples
+        self.example_1.save()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT text FROM {} WHERE rowid = %s'.format(table),
+                [self.example_1.pk])
+            self.assertEqual(cursor.fetchall(), [('I want a pizza',)])
+            backend.remove([self.example_1])
+            cursor.execute(
+                'SELECT count(*) FROM {} WHERE rowid = %s'.format(table),
+                [self.example_1.pk])
+            self.assertEqual(cursor.fetchone(), (0,))
+
+    def test_repository_description(self):
+        self.assertEqual(
+            self.search('order', Repository.objects.all()),
+            [self.repository])
+        self.repository.delete()
+        self.assertEqual(self.search('order', Repository.objects.all()), [])
+
+    def test_basic_backend(self):
+        backend = BasicSearchBackend(connection)
+        self.assertEqual(
+            set(self.search('PIZZA', backend=backend)),
+            {self.example_1, self.example_2})
+        self.assertEqual(
+            self.search('want piz', backend=backend),
+            [self.example_1])
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    def handle_error(self, request, client_address):
+        # clients closing timed out connections
+        pass
+
+
+class NLPStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.clients.add(self.client_address)
+        data = parse_qs(self.rfile.read(
+            int(self.headers.get('Content-Length', 0))).decode())
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        if server.delay:
+            time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        body = json.dumps({
+            'authorization': self.headers.get('Authorization'),
+            'text': data.get('text', [None])[0],
+        }).encode()
+        self.send_response(server.status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class NLPClientTestCase(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), NLPStubHandler)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.clients = set()
+        self.server.delay = 0
+        self.server.status_code = 200
+        self.server.lock = threading.Lock()
+        self.server.active = 0
+        self.server.max_active = 0
+        threading.Thread(target=self.server.serve_forever).start()
+
+        self.owner = User.objects.create_user('owner@user.com', 'owner')
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Test',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+        self.authorization = self.repository.get_user_authorization(
+            self.owner)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_client(self, **kwargs):
+        kwargs.setdefault('base_url', 'http://127.0.0.1:{}/'.format(
+            self.server.server_address[1]))
+        kwargs.setdefault('read_timeout', 1)
+        kwargs.setdefault('failure_threshold', 2)
+        kwargs.setdefault('recovery_timeout', 60)
+        return NLPClient(**kwargs)
+
+    def test_parse_reuses_connection(self):
+        client = self.get_client()
+        for i in range(3):
+            response = client.parse(self.authorization, 'hi', 'en')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.json().get('authorization'),
+                'Bearer {}'.format(self.authorization.uuid))
+        self.assertEqual(self.server.requests, ['/parse/'] * 3)
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_parse_many(self):
+        self.server.delay = 0.05
+        client = self.get_client(pool_size=4)
+        texts = ['text {}'.format(i) for i in range(8)]
+        results = list(client.parse_many(
+            self.authorization,
+            texts,
+            concurrency=2))
+        self.assertEqual(list(map(lambda r: r[0], results)), texts)
+        self.assertEqual(
+            list(map(lambda r: r[1].json().get('text'), results)),
+            texts)
+        self.assertEqual(self.server.max_active, 2)
+
+    def test_read_timeout(self):
+        self.server.delay = 0.5
+        client = self.get_client(read_timeout=0.1)
+        with self.assertRaises(NLPServiceUnavailable):
+            client.parse(self.authorization, 'hi')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_circuit_breaker_fails_fast(self):
+        self.server.status_code = 503
+        client = self.get_client()
+        for i in range(2):
+            self.assertEqual(
+                client.train(self.authorization).status_code,
+                503)
+        with self.assertRaises(NLPServiceUnavailable):
+            client.train(self.authorization)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_circuit_breaker_recovers(self):
+        now = [0]
+        client = self.get_client()
+        client.circuit_breaker.clock = lambda: now[0]
+        self.server.status_code = 500
+        client.parse(self.authorization, 'hi')
+        client.parse(self.authorization, 'hi')
+        self.assertEqual(
+            client.circuit_breaker.state,
+            CircuitBreaker.STATE_OPEN)
+        now[0] = 60
+        self.server.status_code = 200
+        client.parse(self.authorization, 'hi')
+        self.assertEqual(
+            client.circuit_breaker.state,
+            CircuitBreaker.STATE_CLOSED)
+
+    def test_connection_refused(self):
+        port = self.server.server_address[1]
+        self.server.shutdown()
+        self.server.server_close()
+        client = self.get_client(
+            base_url='http://127.0.0.1:{}/'.format(port),
+            retries=1)
+        with self.assertRaises(NLPServiceUnavailable):
+            client.parse(self.authorization, 'hi')
+        self.assertEqual(client.circuit_breaker.failures, 1)
+
+
+class AnalyzeCacheTestCase(TestCase):
+    def setUp(self):
+        analyze_cache.clear()
+        self.owner = User.objects.create_user('owner@user.com', 'owner')
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Test',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+        self.authorization = self.repository.get_user_authorization(
+            self.owner)
+        RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='hi',
+            intent='greet')
+
+    def train(self):
+        update = self.repository.current_update()
+        update.start_training(self.owner)
+        update.save_training(b'bot')
+
+    def test_lru_and_ttl(self):
+        now = [0]
+        cache = AnalyzeCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        now[0] = 11
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.metrics, {'hits': 2, 'misses': 2, 'size': 1})
+
+    def test_normalize_text(self):
+        self.assertEqual(AnalyzeCache.normalize_text('  hi \n there '),
+                         'hi there')
+
+    @patch('bothub.common.models.get_nlp_client')
+    def test_analyze_cached_until_trained(self, get_nlp_client):
+        parse = get_nlp_client.return_value.parse
+        parse.return_value = Mock(
+            status_code=200,
+            json=lambda: {'intent': 'greet'})
+        self.train()
+        data = {'text': 'hi ', 'language': languages.LANGUAGE_EN}
+        for i in range(3):
+            response = Repository.request_nlp_analyze(
+                self.authorization,
+                data)
+            self.assertEqual(response.json(), {'intent': 'greet'})
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(parse.call_args[0][1], 'hi ')
+        self.assertEqual(analyze_cache.hits, 2)
+
+        RepositoryExample.objects.create(
+            repository_update=self.repository.current_update(),
+            text='hello',
+            intent='greet')
+        self.train()
+        self.assertEqual(analyze_cache.metrics.get('size'), 0)
+        Repository.request_nlp_analyze(self.authorization, data)
+        self.assertEqual(parse.call_count, 2)
+
+    @patch('bothub.common.models.get_nlp_client')
+    def test_analyze_batch_uses_cache(self, get_nlp_client):
+        def parse_many(user_authorization, texts, language):
+            for text in texts:
+                yield text, Mock(status_code=200, json=lambda: {'n': 1})
+
+        parse_many_mock = get_nlp_client.return_value.parse_many
+        parse_many_mock.side_effect = parse_many
+        data = {'texts': ['hi', 'bye'], 'language': languages.LANGUAGE_EN}
+        list(Repository.request_nlp_analyze_batch(self.authorization, data))
+        data = {
+            'texts': [' yes  sir', 'hi '],
+            'language': languages.LANGUAGE_EN,
+        }
+        results = list(Repository.request_nlp_analyze_batch(
+            self.authorization,
+            data))
+        self.assertEqual(
+            list(map(lambda r: r[0], results)),
+            [' yes  sir', 'hi '])
+        self.assertEqual(
+            list(parse_many_mock.call_args[0][1]),
+            [' yes  sir'])
+
+
+class DownloadBotDataTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.owner = User.objects.create_user('owner@user.com', 'owner')
+        self.staff = User.objects.create_superuser(
+            'staff@user.com',
+            'staff',
+            'staff')
+        self.repository = Repository.objects.create(
+            owner=self.owner,
+            name='Test',
+            slug='test',
+            language=languages.LANGUAGE_EN)
+        self.bot_data = bytes(range(256)) * 100
+        self.update = self.repository.current_update()
+        self.update.start_training(self.owner)
+        self.update.save_training(self.bot_data)
+
+    def request(self, **headers):
+        request = self.factory.get('/', **headers)
+        request.user = self.staff
+        response = download_bot_data(request, update_id=self.update.id)
+        content = b''.join(response.streaming_content) \
+            if response.streaming else response.content
+        return (response, content,)
+
+    def test_download(self):
+        response, content = self.request()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, self.bot_data)
+        self.assertEqual(
+            int(response['Content-Length']),
+            len(self.bot_data))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range(self):
+        response, content = self.request(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, self.bot_data[10:20])
+        self.assertEqual(
+            response['Content-Range'],
+            'bytes 10-19/{}'.format(len(self.bot_data)))
+
+        response, content = self.request(HTTP_RANGE='bytes=25000-')
+        self.assertEqual(content, self.bot_data[25000:])
+
+        response, content = self.request(HTTP_RANGE='bytes=-100')
+        self.assertEqual(content, self.bot_data[-100:])
+
+    def test_size_without_loading(self):
+        update = RepositoryUpdate.objects.get(pk=self.update.pk)
+        self.assertEqual(update.get_bot_data_size(), len(self.bot_data))
+        self.assertIn('bot_data', update.get_deferred_fields())
+
+    def test_open_memoryview(self):
+        update = RepositoryUpdate.objects.get(pk=self.update.pk)
+        update.bot_data = memoryview(self.bot_data)
+        with update.open_bot_data() as f:
+            f.seek(-10, 2)
+            self.assertEqual(f.read(), self.bot_data[-10:])
+            f.seek(5)
+            self.assertEqual(f.read(3), self.bot_data[5:8])
+
+    def test_range_not_satisfiable(self):
+        response, content = self.request(HTTP_RANGE='bytes=999999-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_if_range_changed(self):
+        response, content = self.request(
+            HTTP_RANGE='bytes=10-19',
+            HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, self.bot_data)
+
+    def test_not_modified(self):
+        response, content = self.request()
+        etag = response['ETag']
+        response, content = self.request(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(content, b'')
+
+    def test_filesystem_store(self):
+        with tempfile.TemporaryDirectory() as root:
+            with self.settings(
+                    BOTHUB_ARTIFACT_STORE='filesystem',
+                    BOTHUB_ARTIFACTS_ROOT=root):
+                update = self.repository.current_update()
+                update.start_training(self.owner)
+                update.save_training(self.bot_data)
+                self.update = update
+                response, content = self.request()
+                self.assertIsInstance(response, FileResponse)
+                self.assertEqual(content, self.bot_data)
+                response, content = self.request(HTTP_RANGE='bytes=1-2')
+                self.assertEqual(content, self.bot_data[1:3])
@@ -0,0 +1,345 @@
+from collections import Counter
+from collections import namedtuple
+from functools import reduce
+
+from django.db import models
+from django.utils.translation import gettext as _
+
+from .models import RepositoryUpdate
+from .models import RepositoryExample
+from .models import RepositoryExampleEntity
+from .models import RepositoryTranslatedExample
+from .models import RepositoryTranslatedExampleEntity
+
+
+LanguageReadiness = namedtuple('LanguageReadiness', [
+    'language',
+    'update',
+    'requirements_to_train',
+    'ready_for_train',
+    'warnings',
+])
+
+
+class TrainingReadiness(object):
+    """
+    Evaluate the training requirements, readiness and warnings of every
+    language of a repository with a fixed number of grouped queries.
+    """
+
+    def __init__(self, repository, updates=None):
+        self.repository = repository
+        if updates is None:
+            updates = self.get_current_updates()
+        self.languages = dict(map(
+            lambda r: (r.language, r,),
+            self.evaluate(updates)))
+
+    @property
+    def requirements_to_train(self):
+        return dict(map(
+            lambda r: (r.language, r.requirements_to_train,),
+            filter(
+                lambda r: r.requirements_to_train,
+                self.languages.values())))
+
+    @property
+    def languages_ready_for_train(self):
+        return dict(map(
+            lambda r: (r.language, r.ready_for_train,),
+            self.languages.values()))
+
+    @property
+    def ready_for_train(self):
+        return reduce(
+            lambda current, r: r.ready_for_train or current,
+            self.languages.values(),
+            False)
+
+    @property
+    def languages_warnings(self):
+        return dict(map(
+            lambda r: (r.language, r.warnings,),
+            filter(
+                lambda r: len(r.warnings) > 0,
+                self.languages.values())))
+
+    def get_current_updates(self):
+        languages = self.repository.available_languages
+        current_updates = {}
+        for update in self.repository.updates.filter(
+                language__in=languages,
+                training_started_at__isnull=True).order_by('created_at'):
+            current_updates.setdefault(update.language, update)
+        # a missing current update would be created empty, so evaluate
+        # an unsaved one instead of writing it
+        return list(map(
+            lambda language: current_updates.get(language) or
+            RepositoryUpdate(
+                repository=self.repository,
+                language=language),
+            languages))
+
+    def evaluate(self, updates):
+        languages = list(map(lambda u: u.language, updates))
+        changed = self.get_changed_updates(updates)
+        previous_updates = self.get_previous_updates(updates)
+        intents = self.get_intents_count(languages)
+        entities = self.get_entities_count(languages)
+
+        for update in updates:
+            language = update.language
+            requirements = self.get_requirements(
+                update,
+                intents[language],
+                entities[language])
+            yield LanguageReadiness(
+                language=language,
+                update=update,
+                requirements_to_train=requirements,
+                ready_for_train=self.get_ready_for_train(
+                    update,
+                    requirements,
+                    previous_updates.get(language),
+                    update.pk in changed,
+                    sum(intents[language].values())),
+                warnings=self.get_warnings(intents[language]))
+
+    def get_changed_updates(self, updates):
+        pks = list(filter(None, map(lambda u: u.pk, updates)))
+        if not pks:
+            return set()
+        return set(RepositoryUpdate.objects.filter(pk__in=pks).annotate(
+            has_added=models.Exists(RepositoryExample.objects.filter(
+                repository_update=models.OuterRef('pk'))),
+            has_translated_added=models.Exists(
+                RepositoryTranslatedExample.objects.filter(
+                    repository_update=models.OuterRef('pk'))),
+            has_deleted=models.Exists(RepositoryExample.objects.filter(
+                deleted_in=models.OuterRef('pk')))).filter(
+                    models.Q(has_added=True) |
+                    models.Q(has_translated_added=True) |
+                    models.Q(has_deleted=True)).values_list(
+                        'pk',
+                        flat=True))
+
+    def get_previous_updates(self, updates):
+        conditions = list(map(
+            lambda u: models.Q(
+                language=u.language,
+                created_at__lt=u.created_at) if u.created_at else
+            models.Q(language=u.language),
+            updates))
+        if not conditions:
+            return {}
+        started = self.repository.updates.filter(
+            by__isnull=False,
+            training_started_at__isnull=False)
+        last_created = started.filter(
+            reduce(lambda a, b: a | b, conditions)).values(
+                'language').annotate(
+                    last_created_at=models.Max('created_at')).order_by()
+        last_conditions = list(map(
+            lambda x: models.Q(
+                language=x.get('language'),
+                created_at=x.get('last_created_at')),
+            last_created))
+        if not last_conditions:
+            return {}
+        return dict(map(
+            lambda u: (u.language, u,),
+            started.filter(reduce(lambda a, b: a | b, last_conditions))))
+
+    def get_intents_count(self, languages):
+        examples = self.get_examples()
+        r = dict(map(lambda language: (language, Counter(),), languages))
+        base = examples.filter(
+            repository_update__language__in=languages).values(
+                'repository_update__language',
+                'intent').annotate(
+                    examples_count=models.Count('id')).order_by()
+        for x in base:
+            r[x.get('repository_update__language')][x.get('intent')] += \
+                x.get('examples_count')
+        translated = RepositoryTranslatedExample.objects.filter(
+            original_example__in=examples,
+            language__in=languages).values(
+                'language',
+                'original_example__intent').annotate(
+                    examples_count=models.Count('id')).order_by()
+        for x in translated:
+            r[x.get('language')][x.get('original_example__intent')] += \
+                x.get('examples_count')
+        return r
+
+    def get_entities_count(self, languages):
+        examples = self.get_examples()
+        r = dict(map(lambda language: (language, Counter(),), languages))
+        entities = RepositoryExampleEntity.objects.filter(
+            repository_example__in=examples)
+        base = entities.filter(
+            repository_example__repository_update__language__in=languages
+        ).values(
+            'repository_example__repository_update__language',
+            'entity__value').annotate(
+                entities_count=models.Count('id')).order_by()
+        for x in base:
+            language = x.get(
+                'repository_example__repository_update__language')
+            r[language][x.get('entity__value')] += x.get('entities_count')
+        translated = entities.filter(
+            repository_example__translations__language__in=languages
+        ).values(
+            'repository_example__translations__language',
+            'entity__value').annotate(
+                entities_count=models.Count('id')).order_by()
+        for x in translated:
+            language = x.get('repository_example__translations__language')
+            r[language][x.get('entity__value')] += x.get('entities_count')
+        return r
+
+    def get_examples(self):
+        return RepositoryExample.objects.filter(
+            repository_update__repository=self.repository,
+            deleted_in__isnull=True)
+
+    def get_requirements(self, update, intents, entities):
+        if update.trained_at:
+            return [_('This bot version has already been trained.')]
+        if update.training_started_at:
+            return [_('This bot version is being trained.')]
+
+        r = []
+
+        if '' in intents:
+            r.append(_('All examples need have a intent.'))
+
+        for intent, count in sorted(intents.items()):
+            if count < RepositoryUpdate.MIN_EXAMPLES_PER_INTENT:
+                r.append(_('Intent "{}" has only {} examples. ' +
+                           'Minimum is {}.').format(
+                        intent,
+                        count,
+                        RepositoryUpdate.MIN_EXAMPLES_PER_INTENT))
+
+        for entity, count in sorted(entities.items()):
+            if count < RepositoryUpdate.MIN_EXAMPLES_PER_ENTITY:
+                r.append(_('Entity "{}" has only {} examples. ' +
+                           'Minimum is {}.').format(
+                        entity,
+                        count,
+                        RepositoryUpdate.MIN_EXAMPLES_PER_ENTITY))
+
+        return r
+
+    def get_ready_for_train(self, update, requirements, previous_update,
+                            changed, examples_count):
+        if update.training_started_at:
+            return False
+
+        if len(requirements) > 0:
+            return False
+
+        if previous_update:
+            if previous_update.use_language_model_featurizer != \
+               self.repository.use_language_model_featurizer:
+                return True
+            if previous_update.use_competing_intents != \
+               self.repository.use_competing_intents:
+                return True
+            if previous_update.failed_at:
+                return True
+
+        if not changed:
+            return False
+
+        return examples_count > 0
+
+    def get_warnings(self, intents):
+        w = []
+        if 0 < len(intents) < RepositoryUpdate.RECOMMENDED_INTENTS:
+            w.append(_('You need to have at least {} intents for the ' +
+                       'algorithm to identify intents.').format(
+                           RepositoryUpdate.RECOMMENDED_INTENTS))
+        return w
+
+
+class TrainingDataBuilder(object):
+    """
+    Assemble the rasa_nlu training data of a repository update, examples
+    texts and entities in the update language, with four queries whatever
+    the number of examples.
+    """
+
+    def __init__(self, update):
+        self.update = update
+        self.language = update.language
+
+    def build(self):
+        examples = self.update.examples
+        translations = RepositoryTranslatedExample.objects.filter(
+            original_example__in=examples.values('id'),
+            language=self.language)
+        entities = self.group_entities(
+            RepositoryExampleEntity.objects.filter(
+                repository_example__in=examples.filter(
+                    repository_update__language=self.language).values('id')),
+            'repository_example_id')
+        translated_entities = self.group_entities(
+            RepositoryTranslatedExampleEntity.objects.filter(
+                repository_translated_example__in=translations.values('id')),
+            'repository_translated_example_id')
+        translations = dict(map(
+            lambda t: (t.get('original_example'), t,),
+            translations.values('id', 'original_example', 'text')))
+
+        common_examples = []
+        label_examples = []
+        for example in examples.distinct().order_by('id').values(
+                'id',
+                'text',
+                'intent',
+                'repository_update__language'):
+            if example.get('repository_update__language') == self.language:
+                text = example.get('text')
+                example_entities = entities.get(example.get('id'), [])
+            else:
+                translation = translations.get(example.get('id'))
+                text = translation.get('text')
+                example_entities = translated_entities.get(
+                    translation.get('id'),
+                    [])
+            common_examples.append({
+                'text': text,
+                'intent': example.get('intent'),
+                'entities': list(map(
+                    lambda e: dict(
+                        e.get_rasa_nlu_data(),
+                        value=text[e.start:e.end]),
+                    example_entities)),
+            })
+            labeled_entities = list(filter(
+                lambda e: e.entity.label,
+                example_entities))
+            if labeled_entities:
+                label_examples.append({
+                    'text': text,
+                    'entities': list(map(
+                        lambda e: e.get_rasa_nlu_data(label_as_entity=True),
+                        labeled_entities)),
+                })
+
+        return {
+            'rasa_nlu_data': {
+                'common_examples': common_examples,
+            },
+            'label_rasa_nlu_data': {
+                'common_examples': label_examples,
+            },
+        }
+
+    def group_entities(self, queryset, key):
+        r = {}
+        for entity in queryset.select_related('entity__label').order_by('id'):
+            r.setdefault(getattr(entity, key), []).append(entity)
+        return r
@@ -1,18 +1,99 @@
+import re
+
 from django.shortcuts import get_object_or_404
+from django.http import FileResponse
 from django.http import HttpResponse
+from django.http import HttpResponseNotModified
+from django.http import StreamingHttpResponse
 from django.core.exceptions import ValidationError
 from django.contrib.admin.views.decorators import staff_member_required
+from django.utils.http import parse_etags
+from django.utils.http import quote_etag
 from .models import RepositoryUpdate
 
 
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Parse a single byte range header returning (start, end) inclusive,
+    None when the whole content should be sent or False when it is not
+    satisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.group('start'), match.group('end')
+    if not start and not end:
+        return None
+    if not start:
+        suffix = int(end)
+        if suffix == 0:
+            return False
+        return (max(size - suffix, 0), size - 1,)
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return (start, end,)
+
+
+def iter_range(f, start, length, chunk_size=FileResponse.block_size):
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
 @staff_member_required
-def download_bot_data(self, update_id):
+def download_bot_data(request, update_id):
     update = get_object_or_404(RepositoryUpdate, id=update_id)
     if not update.trained_at:
         raise ValidationError('Update #{} not trained at.'.format(update.id))
-    response = HttpResponse(
-        update.get_bot_data(),
-        content_type='application/gzip')
+
+    # trained bot data never changes, the training time identifies it
+    etag = quote_etag('{}-{}'.format(
+        update.id,
+        int(update.trained_at.timestamp())))
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (
+            etag in parse_etags(if_none_match) or if_none_match == '*'):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    size = update.get_bot_data_size()
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */{}'.format(size)
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_range(update.open_bot_data(), start, end - start + 1),
+            status=206,
+            content_type='application/gzip')
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, size)
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(
+            update.open_bot_data(),
+            content_type='application/gzip')
+        response['Content-Length'] = size
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
     response['Content-Disposition'] = 'inline; filename={}.tar.gz'.format(
         update.id)
     return response
@@ -4,6 +4,8 @@ from functools import reduce
 from django.http import HttpResponse
 from rest_framework import status
 
+from bothub.common.cache import analyze_cache
+
 from .checks import check_database_connection
 from .checks import check_accessible_api
 
@@ -21,11 +23,13 @@ def ping(request):
         lambda current, status: current and status,
         checks_status.values(),
         True)
-    content = '{}\n{}'.format(
+    content = '{}\n{}\n{}'.format(
         'OK' if healthy else 'something wrong happened',
         '\n'.join(map(
             lambda x: '{}: {}'.format(*x),
-            checks_status.items())))
+            checks_status.items())),
+        'analyze_cache: hits={hits} misses={misses} size={size}'.format(
+            **analyze_cache.metrics))
     status_code = status.HTTP_200_OK \
         if healthy else status.HTTP_503_SERVICE_UNAVAILABLE
     return HttpResponse(
@@ -201,6 +201,108 @@ BOTHUB_NLP_BASE_URL = config(
     'BOTHUB_NLP_BASE_URL',
     default='http://localhost:2657/')
 
+BOTHUB_NLP_CONNECT_TIMEOUT = config(
+    'BOTHUB_NLP_CONNECT_TIMEOUT',
+    default=3.05,
+    cast=float)
+
+BOTHUB_NLP_READ_TIMEOUT = config(
+    'BOTHUB_NLP_READ_TIMEOUT',
+    default=30,
+    cast=float)
+
+BOTHUB_NLP_TRAIN_READ_TIMEOUT = config(
+    'BOTHUB_NLP_TRAIN_READ_TIMEOUT',
+    default=600,
+    cast=float)
+
+BOTHUB_NLP_RETRIES = config(
+    'BOTHUB_NLP_RETRIES',
+    default=2,
+    cast=int)
+
+BOTHUB_NLP_POOL_SIZE = config(
+    'BOTHUB_NLP_POOL_SIZE',
+    default=10,
+    cast=int)
+
+BOTHUB_NLP_CIRCUIT_FAILURES = config(
+    'BOTHUB_NLP_CIRCUIT_FAILURES',
+    default=5,
+    cast=int)
+
+BOTHUB_NLP_CIRCUIT_RECOVERY = config(
+    'BOTHUB_NLP_CIRCUIT_RECOVERY',
+    default=30,
+    cast=float)
+
+BOTHUB_NLP_ANALYZE_BATCH_CONCURRENCY = config(
+    'BOTHUB_NLP_ANALYZE_BATCH_CONCURRENCY',
+    default=8,
+    cast=int)
+
+BOTHUB_NLP_ANALYZE_BATCH_MAX_TEXTS = config(
+    'BOTHUB_NLP_ANALYZE_BATCH_MAX_TEXTS',
+    default=1000,
+    cast=int)
+
+BOTHUB_ANALYZE_CACHE_SIZE = config(
+    'BOTHUB_ANALYZE_CACHE_SIZE',
+    default=10000,
+    cast=int)
+
+BOTHUB_ANALYZE_CACHE_TTL = config(
+    'BOTHUB_ANALYZE_CACHE_TTL',
+    default=3600,
+    cast=float)
+
+
+# Examples import and export
+
+BOTHUB_IMPORT_EXAMPLES_MAX = config(
+    'BOTHUB_IMPORT_EXAMPLES_MAX',
+    default=50000,
+    cast=int)
+
+BOTHUB_IMPORT_TRANSLATIONS_MAX = config(
+    'BOTHUB_IMPORT_TRANSLATIONS_MAX',
+    default=50000,
+    cast=int)
+
+BOTHUB_EXPORT_CHUNK_SIZE = config(
+    'BOTHUB_EXPORT_CHUNK_SIZE',
+    default=1000,
+    cast=int)
+
+BOTHUB_VALUES_CACHE_SIZE = config(
+    'BOTHUB_VALUES_CACHE_SIZE',
+    default=10000,
+    cast=int)
+
+
+# Trained bot data
+
+BOTHUB_ARTIFACT_STORE = config(
+    'BOTHUB_ARTIFACT_STORE',
+    default='database')
+
+BOTHUB_ARTIFACTS_ROOT = config(
+    'BOTHUB_ARTIFACTS_ROOT',
+    default=os.path.join(BASE_DIR, 'artifacts'))
+
+
+# Training jobs
+
+BOTHUB_TRAINING_WORKERS = config(
+    'BOTHUB_TRAINING_WORKERS',
+    default=4,
+    cast=int)
+
+BOTHUB_TRAINING_JOB_TIMEOUT = config(
+    'BOTHUB_TRAINING_JOB_TIMEOUT',
+    default=int(BOTHUB_NLP_TRAIN_READ_TIMEOUT) + 60,
+    cast=int)
+
 
 # CSRF
 